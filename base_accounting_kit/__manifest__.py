@@ -58,6 +58,8 @@
         'data/account_asset_data.xml',
         'data/recurring_entry_cron.xml',
         'data/multiple_invoice_data.xml',
+        'data/account_dashboard_data.xml',
+        'data/account_reconciliation_job_data.xml',
         'views/dashboard_views.xml',
         'views/reports_config_view.xml',
         'views/accounting_menu.xml',
@@ -76,6 +78,7 @@
         'views/account_move_views.xml',
         'views/product_template_views.xml',
         'views/payment_matching.xml',
+        'views/account_reconciliation_job_views.xml',
         'views/multiple_invoice_layout_view.xml',
         'views/multiple_invoice_form.xml',
         'wizard/financial_report.xml',
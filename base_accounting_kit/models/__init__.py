@@ -25,12 +25,18 @@ from . import account_followup
 from . import account_journal
 from . import account_move
 from . import account_payment
+from . import account_reconciliation_job
 from . import credit_limit
 from . import product_template
 from . import recurring_payments
+from . import res_company
 from . import res_config_settings
 from . import res_partner
 from . import account_dashboard
+from . import account_dashboard_monthly
+from . import account_dashboard_snapshot
+from . import account_dashboard_unreconciled
+from . import account_dashboard_bank_balance
 from . import payment_matching
 from . import multiple_invoice
 from . import multiple_invoice_layout
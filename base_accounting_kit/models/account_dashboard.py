@@ -19,705 +19,739 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-import calendar
-import datetime
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
-
-from odoo import api, models
-from odoo.http import request
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dateutil.relativedelta import relativedelta, MO
+from psycopg2.pool import PoolError
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools import config
+
+# tiles served by get_dashboard_bundle:
+# tile name -> (method, takes the posted filter, extra arguments)
+DASHBOARD_TILES = {
+    'currency': ('get_currency', False, ()),
+    'income_this_month': ('get_income_this_month', True, ()),
+    'income_last_month': ('get_income_last_month', True, ()),
+    'income_this_year': ('get_income_this_year', True, ()),
+    'income_last_year': ('get_income_last_year', True, ()),
+    # comparison mode: only the income/expense series is split per
+    # company, the single value tiles always show the consolidated total
+    'income_this_month_by_company': ('get_income_by_company', True,
+                                     ('this_month',)),
+    'income_last_month_by_company': ('get_income_by_company', True,
+                                     ('last_month',)),
+    'income_this_year_by_company': ('get_income_by_company', True,
+                                    ('this_year',)),
+    'income_last_year_by_company': ('get_income_by_company', True,
+                                    ('last_year',)),
+    'overdues': ('get_overdues', False, ()),
+    'overdues_this_month': ('get_overdues_this_month_and_year', True,
+                            ('this_month',)),
+    'overdues_this_year': ('get_overdues_this_month_and_year', True,
+                           ('this_year',)),
+    'latebills': ('get_latebills', False, ()),
+    'latebills_this_month': ('get_latebillss', True, ('this_month',)),
+    'latebills_this_year': ('get_latebillss', True, ('this_year',)),
+    'top_10_customers_this_month': ('get_top_10_customers_month', True,
+                                    ('this_month',)),
+    'top_10_customers_last_month': ('get_top_10_customers_month', True,
+                                    ('last_month',)),
+    'total_invoice': ('get_total_invoice', False, ()),
+    'total_invoice_current_month': ('get_total_invoice_current_month', True,
+                                    ()),
+    'total_invoice_current_year': ('get_total_invoice_current_year', True,
+                                   ()),
+    'total_invoice_this_month': ('get_total_invoice_this_month', True, ()),
+    'total_invoice_last_month': ('get_total_invoice_last_month', False, ()),
+    'total_invoice_this_year': ('get_total_invoice_this_year', False, ()),
+    'total_invoice_last_year': ('get_total_invoice_last_year', False, ()),
+    'unreconcile_items': ('unreconcile_items', False, ()),
+    'unreconcile_items_this_month': ('unreconcile_items_this_month', True,
+                                     ()),
+    'unreconcile_items_last_month': ('unreconcile_items_last_month', False,
+                                     ()),
+    'unreconcile_items_this_year': ('unreconcile_items_this_year', True, ()),
+    'unreconcile_items_last_year': ('unreconcile_items_last_year', False,
+                                    ()),
+    'month_income': ('month_income', False, ()),
+    'month_income_this_month': ('month_income_this_month', True, ()),
+    'month_income_last_month': ('month_income_last_month', False, ()),
+    'month_income_this_year': ('month_income_this_year', True, ()),
+    'month_income_last_year': ('month_income_last_year', False, ()),
+    'month_expense': ('month_expense', False, ()),
+    'month_expense_this_month': ('month_expense_this_month', True, ()),
+    'month_expense_this_year': ('month_expense_this_year', True, ()),
+    'profit_income_this_month': ('profit_income_this_month', True, ()),
+    'profit_income_this_year': ('profit_income_this_year', True, ()),
+    'bank_balance': ('bank_balance', True, ()),
+    'cash_forecast': ('get_cash_forecast', True, ()),
+}
+# bucket sizes of get_income_expense_series and their length
+BUCKET_INTERVALS = {
+    'day': relativedelta(days=1),
+    'week': relativedelta(weeks=1),
+    'month': relativedelta(months=1),
+    'quarter': relativedelta(months=3),
+    'year': relativedelta(years=1),
+}
+# tiles whose query is not restricted to the selected companies
+DASHBOARD_ALL_COMPANY_TILES = {
+    'total_invoice_last_month', 'total_invoice_last_year',
+    'unreconcile_items', 'unreconcile_items_last_month',
+    'unreconcile_items_last_year', 'month_income', 'month_income_last_month',
+    'month_income_last_year', 'month_expense',
+}
+# tiles depending on the language of the user, never precomputed
+DASHBOARD_LANG_TILES = {'currency', 'total_invoice_current_month'}
+# number of weeks of the cash forecast
+CASH_FORECAST_WEEKS = 13
+# maximum number of threads computing the tiles of a bundle
+DASHBOARD_THREADS = 4
+# the threads of a bundle use at most this fraction of the db connections
+DASHBOARD_MAXCONN_RATIO = 4
+# journal entry fields whose change invalidates the cached tiles
+DASHBOARD_CACHE_FIELDS = ['state', 'date', 'company_id']
+# journal item fields whose change invalidates the cached tiles
+DASHBOARD_CACHE_LINE_FIELDS = ['debit', 'credit', 'amount_currency',
+                               'account_id', 'partner_id', 'date_maturity',
+                               'company_id', 'full_reconcile_id']
+
+
+class DashboardCache(object):
+    """LRU cache of the dashboard tile values, shared by the threads of a
+    worker.
+
+    Entries expire after ``ttl`` seconds, which bounds the staleness of the
+    values when the change of a journal entry is made in another worker.
+    """
+
+    def __init__(self, size=1024, ttl=300):
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return ``(True, value)`` for a valid entry, ``(False, None)``
+        otherwise."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, dbname, company_ids):
+        """Drop the entries of the database depending on the companies."""
+        company_ids = set(company_ids)
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == dbname and (
+                        key[1] in DASHBOARD_ALL_COMPANY_TILES
+                        or company_ids.intersection(key[2])):
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'size': self.size,
+                'ttl': self.ttl,
+            }
+
+
+dashboard_cache = DashboardCache()
 
 
 class DashBoard(models.Model):
     _inherit = 'account.move'
 
-    # function to getting expenses
-
-    # function to getting income of this year
+    def init(self):
+        super(DashBoard, self).init()
+        # indexes matching the date range filters of the dashboard queries
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_move_line_dashboard_date_index
+            ON account_move_line (company_id, parent_state, date)
+        """)
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_move_line_dashboard_unreconciled_index
+            ON account_move_line (company_id, date)
+            WHERE full_reconcile_id IS NULL AND balance != 0
+        """)
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_move_dashboard_date_index
+            ON account_move (company_id, move_type, state, date)
+        """)
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_move_dashboard_due_index
+            ON account_move (move_type, payment_state, invoice_date_due)
+        """)
+        # freshness check of the dashboard snapshots
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_move_dashboard_write_date_index
+            ON account_move (company_id, write_date)
+        """)
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_move_line_dashboard_write_date_index
+            ON account_move_line (company_id, write_date)
+        """)
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_partial_reconcile_dashboard_write_date_index
+            ON account_partial_reconcile (company_id, write_date)
+        """)
+
+    # function to get several dashboard tiles in one call
 
     @api.model
-    def get_income_this_year(self, *post):
-
-        company_id = self.get_current_company_value()
-
-        month_list = []
-        for i in range(11, -1, -1):
-            l_month = datetime.now() - relativedelta(months=i)
-            text = format(l_month, '%B')
-            month_list.append(text)
+    def get_dashboard_bundle(self, tiles, state=False, parallel=False):
+        """Compute the requested dashboard tiles in a single request.
+
+        :param tiles: list of tile names, keys of ``DASHBOARD_TILES``
+        :param state: value of the posted entries toggle of the dashboard
+        :param parallel: compute the tiles missing from the cache at the
+                         same time on a pool of threads, each one holding
+                         a database connection
+        :return: dict mapping every requested tile to its value, and
+                 ``computed_at`` to the time of the oldest value
+        """
+        unknown = [tile for tile in tiles if tile not in DASHBOARD_TILES]
+        if unknown:
+            raise UserError(_("Unknown dashboard tile(s): %s")
+                            % ", ".join(unknown))
+        # resolve the companies once: the threads have no http request
+        company_ids = self.get_current_company_value()
+        self = self.with_context(dashboard_company_ids=company_ids)
+        keys = {tile: self._get_dashboard_cache_key(tile, state)
+                for tile in tiles}
+        result = {}
+        computed_at = []
+        missing = []
+        for tile in set(tiles):
+            found, value = dashboard_cache.get(keys[tile])
+            if found:
+                computed_at.append(value[0])
+                result[tile] = value[1]
+            else:
+                missing.append(tile)
+        if missing:
+            # tiles precomputed by the scheduled action
+            snapshot, snapshot_date = self.env[
+                'account.dashboard.snapshot'].sudo()._get_snapshot(
+                company_ids, state)
+            for tile in [tile for tile in missing if tile in snapshot]:
+                dashboard_cache.set(keys[tile], (snapshot_date, snapshot[tile]))
+                computed_at.append(snapshot_date)
+                result[tile] = snapshot[tile]
+                missing.remove(tile)
+        now = fields.Datetime.now()
+        # the cursors of the test registry are all the same test cursor
+        if parallel and len(missing) > 1 and not self.pool.in_test_mode():
+            values = self._compute_dashboard_tiles_parallel(missing, state)
+        else:
+            values = {tile: self._compute_dashboard_tile(tile, state)
+                      for tile in missing}
+        for tile, value in values.items():
+            dashboard_cache.set(keys[tile], (now, value))
+            computed_at.append(now)
+            result[tile] = value
+        result['computed_at'] = fields.Datetime.to_string(
+            min(computed_at or [now]))
+        return result
 
-        states_arg = ""
+    @api.model
+    def get_dashboard_cache_stats(self):
+        """Hit and miss counters of the dashboard cache of this worker."""
+        return dashboard_cache.stats()
+
+    def _get_dashboard_cache_key(self, tile, state):
+        # the currency and the period anchor are part of the key: the values
+        # depend on the language of the user and on the current date
+        return (self._cr.dbname, tile,
+                tuple(sorted(self.get_current_company_value())), state,
+                self.env.user.lang, fields.Date.context_today(self))
+
+    def _compute_dashboard_tiles_parallel(self, tiles, state):
+        """Compute the tiles on their own cursors, all reading the snapshot
+        of the current transaction. The tiles whose thread gets no database
+        connection are computed on the cursor of the request."""
+        workers = min(DASHBOARD_THREADS, len(tiles),
+                      config['db_maxconn'] // DASHBOARD_MAXCONN_RATIO)
+        if workers < 2:
+            return {tile: self._compute_dashboard_tile(tile, state)
+                    for tile in tiles}
+        self._cr.execute("SELECT pg_export_snapshot()")
+        snapshot = self._cr.fetchone()[0]
+        uid, context = self.env.uid, self.env.context
+        unavailable = object()
+
+        def compute(tile):
+            try:
+                cr = self.pool.cursor()
+            except PoolError:
+                # all the connections of the worker are in use
+                return unavailable
+            with cr:
+                # Odoo cursors are REPEATABLE READ, the snapshot can only be
+                # set before the first query of the transaction
+                cr.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+                env = api.Environment(cr, uid, context)
+                return env[self._name]._compute_dashboard_tile(tile, state)
+
+        values = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for tile, value in zip(tiles, executor.map(compute, tiles)):
+                if value is unavailable:
+                    value = self._compute_dashboard_tile(tile, state)
+                values[tile] = value
+        return values
+
+    def _compute_dashboard_tile(self, tile, state):
+        method, with_state, args = DASHBOARD_TILES[tile]
+        if with_state:
+            args = (state,) + args
+        return getattr(self, method)(*args)
+
+    def _invalidate_dashboard_cache(self, company_ids=None):
+        """Drop the cached tiles of the companies, of the companies of the
+        entries by default, once the transaction is committed."""
+        if company_ids is None:
+            company_ids = self.company_id.ids
+        data = self._cr.postcommit.data
+        if 'account_dashboard_cache' not in data:
+            # one invalidation per transaction for all the changed companies
+            data['account_dashboard_cache'] = set()
+            dbname = self._cr.dbname
+            self._cr.postcommit.add(lambda: dashboard_cache.invalidate(
+                dbname, data.pop('account_dashboard_cache', ())))
+        data['account_dashboard_cache'].update(company_ids)
+
+    def write(self, vals):
+        if any(field in vals for field in DASHBOARD_CACHE_FIELDS):
+            self._invalidate_dashboard_cache()
+            res = super(DashBoard, self).write(vals)
+            self._invalidate_dashboard_cache()
+            return res
+        return super(DashBoard, self).write(vals)
+
+    def _get_dashboard_states(self, post):
         if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
+            return ('posted', 'draft')
+        return ('posted',)
+
+    def _get_dashboard_period(self, period):
+        """Return the half-open date range [date_from, date_to) of a period."""
+        today = fields.Date.context_today(self)
+        if period in ('this_month', 'last_month'):
+            date_from = today.replace(day=1)
+            if period == 'last_month':
+                date_from -= relativedelta(months=1)
+            return date_from, date_from + relativedelta(months=1)
+        date_from = today.replace(month=1, day=1)
+        if period == 'last_year':
+            date_from -= relativedelta(years=1)
+        return date_from, date_from + relativedelta(years=1)
+
+    def _get_monthly_totals(self, post, period, groups=('income', 'expense')):
+        date_from, date_to = self._get_dashboard_period(period)
+        return self.env['account.dashboard.monthly']._get_totals(
+            self.get_current_company_value(),
+            self._get_dashboard_states(post), date_from, date_to, groups)
+
+    def _get_bucket_start(self, date, interval):
+        """Python counterpart of date_trunc(interval, date)."""
+        if interval == 'week':
+            return date + relativedelta(weekday=MO(-1))
+        if interval == 'month':
+            return date.replace(day=1)
+        if interval == 'quarter':
+            return date.replace(month=(date.month - 1) // 3 * 3 + 1, day=1)
+        if interval == 'year':
+            return date.replace(month=1, day=1)
+        return date
+
+    @api.model
+    def get_income_expense_series(self, post, date_from, date_to,
+                                  interval='month', by_company=False):
+        """Income, expense and profit per bucket on [date_from, date_to).
+
+        :param post: value of the posted entries toggle of the dashboard
+        :param interval: bucket size, one of ``BUCKET_INTERVALS``
+        :param by_company: also split the series per company, the totals
+                           being the consolidation of the companies
+        :return: dict of dense lists, one value per bucket, with the first
+                 day of every bucket under ``bucket`` and, if by_company,
+                 the series of every company under ``companies``
+        """
+        if interval not in BUCKET_INTERVALS:
+            raise UserError(_("Unknown interval: %s") % interval)
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        # the consolidation reads every company under the same key
+        company = 'NULL::integer'
+        if by_company:
+            company = 'aggregate.company_id'
+        # month aligned ranges are read from the monthly aggregate
+        if interval != 'day' and interval != 'week' \
+                and date_from.day == 1 and date_to.day == 1:
+            query = """
+                SELECT """ + company + """ AS company_id,
+                       date_trunc(%(interval)s, month)::date AS bucket,
+                       SUM(credit - debit) FILTER (
+                           WHERE internal_group = 'income') AS income,
+                       SUM(debit - credit) FILTER (
+                           WHERE internal_group = 'expense') AS expense
+                FROM account_dashboard_monthly aggregate
+                WHERE company_id IN %(company_ids)s
+                AND parent_state IN %(states)s
+                AND month >= %(date_from)s AND month < %(date_to)s
+                GROUP BY 1, bucket
+            """
         else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit)-sum(credit) as income ,to_char(account_move_line.date, 'Month')  as month ,
-                             internal_group from account_move_line ,account_account where 
-                             account_move_line.account_id=account_account.id AND internal_group = 'income' 
-                             AND to_char(DATE(NOW()), 'YY') = to_char(account_move_line.date, 'YY')
-                             AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''
-                             AND %s 
-                             group by internal_group,month                  
-                        ''') % (states_arg))
-        record = self._cr.dictfetchall()
+            query = """
+                SELECT """ + company + """ AS company_id,
+                       date_trunc(%(interval)s, aggregate.date)::date AS bucket,
+                       SUM(aggregate.credit - aggregate.debit) FILTER (
+                           WHERE account.internal_group = 'income') AS income,
+                       SUM(aggregate.debit - aggregate.credit) FILTER (
+                           WHERE account.internal_group = 'expense') AS expense
+                FROM account_move_line aggregate
+                JOIN account_account account
+                    ON account.id = aggregate.account_id
+                WHERE account.internal_group IN ('income', 'expense')
+                AND aggregate.company_id IN %(company_ids)s
+                AND aggregate.parent_state IN %(states)s
+                AND aggregate.date >= %(date_from)s
+                AND aggregate.date < %(date_to)s
+                GROUP BY 1, bucket
+            """
+        self._cr.execute(query, {
+            'interval': interval,
+            'company_ids': tuple(self.get_current_company_value()),
+            'states': self._get_dashboard_states(post),
+            'date_from': date_from,
+            'date_to': date_to,
+        })
+        values = defaultdict(dict)
+        for row in self._cr.dictfetchall():
+            values[row.get('company_id')][row['bucket']] = row
+        series = {'bucket': [], 'income': [], 'expense': [], 'profit': []}
+        companies = {company_id: {'income': [], 'expense': [], 'profit': []}
+                     for company_id in values}
+        step = BUCKET_INTERVALS[interval]
+        bucket = self._get_bucket_start(date_from, interval)
+        while bucket < date_to:
+            series['bucket'].append(bucket)
+            for key in ('income', 'expense'):
+                series[key].append(0.0)
+            for company_id, company_values in values.items():
+                row = company_values.get(bucket, {})
+                income = row.get('income') or 0.0
+                expense = row.get('expense') or 0.0
+                companies[company_id]['income'].append(income)
+                companies[company_id]['expense'].append(expense)
+                companies[company_id]['profit'].append(income - expense)
+                series['income'][-1] += income
+                series['expense'][-1] += expense
+            series['profit'].append(series['income'][-1] -
+                                    series['expense'][-1])
+            bucket += step
+        if by_company:
+            series['companies'] = [
+                dict(companies.get(company.id) or {
+                    'income': [0.0] * len(series['bucket']),
+                    'expense': [0.0] * len(series['bucket']),
+                    'profit': [0.0] * len(series['bucket']),
+                }, id=company.id, name=company.name)
+                for company in self.env['res.company'].browse(
+                    [company_id for company_id
+                     in self.get_current_company_value() if company_id])
+            ]
+        return series
+
+    def _get_income_series(self, post, period, by_company=False):
+        date_from, date_to = self._get_dashboard_period(period)
+        if period in ('this_month', 'last_month'):
+            series = self.get_income_expense_series(post, date_from, date_to,
+                                                    'day', by_company)
+            labels = {'date': [bucket.day for bucket in series['bucket']]}
+        else:
+            series = self.get_income_expense_series(post, date_from, date_to,
+                                                    'month', by_company)
+            labels = {'month': [format(bucket, '%B')
+                                for bucket in series['bucket']]}
+        del series['bucket']
+        series.update(labels)
+        return series
 
-        self._cr.execute(('''select sum(debit)-sum(credit) as expense ,to_char(account_move_line.date, 'Month')  as month ,
-                            internal_group from account_move_line ,account_account where 
-                            account_move_line.account_id=account_account.id AND internal_group = 'expense' 
-                            AND to_char(DATE(NOW()), 'YY') = to_char(account_move_line.date, 'YY')
-                            AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''
-                            AND %s 
-                            group by internal_group,month                  
-                        ''') % (states_arg))
-
-        result = self._cr.dictfetchall()
-        records = []
-        for month in month_list:
-            last_month_inc = list(filter(lambda m: m['month'].strip() == month, record))
-            last_month_exp = list(filter(lambda m: m['month'].strip() == month, result))
-            if not last_month_inc and not last_month_exp:
-                records.append({
-                    'month': month,
-                    'income': 0.0,
-                    'expense': 0.0,
-                    'profit': 0.0,
-                })
-            elif (not last_month_inc) and last_month_exp:
-                last_month_exp[0].update({
-                    'income': 0.0,
-                    'expense': -1 * last_month_exp[0]['expense'] if last_month_exp[0]['expense'] < 1 else
-                    last_month_exp[0]['expense']
-                })
-                last_month_exp[0].update({
-                    'profit': last_month_exp[0]['income'] - last_month_exp[0]['expense']
-                })
-                records.append(last_month_exp[0])
-            elif (not last_month_exp) and last_month_inc:
-                last_month_inc[0].update({
-                    'expense': 0.0,
-                    'income': -1 * last_month_inc[0]['income'] if last_month_inc[0]['income'] < 1 else
-                    last_month_inc[0]['income']
-                })
-                last_month_inc[0].update({
-                    'profit': last_month_inc[0]['income'] - last_month_inc[0]['expense']
-                })
-                records.append(last_month_inc[0])
-            else:
-                last_month_inc[0].update({
-                    'income': -1 * last_month_inc[0]['income'] if last_month_inc[0]['income'] < 1 else
-                    last_month_inc[0]['income'],
-                    'expense': -1 * last_month_exp[0]['expense'] if last_month_exp[0]['expense'] < 1 else
-                    last_month_exp[0]['expense']
-                })
-                last_month_inc[0].update({
-                    'profit': last_month_inc[0]['income'] - last_month_inc[0]['expense']
-                })
-                records.append(last_month_inc[0])
-        income = []
-        expense = []
-        month = []
-        profit = []
-        for rec in records:
-            income.append(rec['income'])
-            expense.append(rec['expense'])
-            month.append(rec['month'])
-            profit.append(rec['profit'])
-        return {
-            'income': income,
-            'expense': expense,
-            'month': month,
-            'profit': profit,
-        }
+    # function to getting income of this year
+
+    @api.model
+    def get_income_this_year(self, *post):
+        return self._get_income_series(post, 'this_year')
 
     # function to getting income of last year
 
     @api.model
     def get_income_last_year(self, *post):
-
-        company_id = self.get_current_company_value()
-
-        month_list = []
-        for i in range(11, -1, -1):
-            l_month = datetime.now() - relativedelta(months=i)
-            text = format(l_month, '%B')
-            month_list.append(text)
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit)-sum(credit) as income ,to_char(account_move_line.date, 'Month')  as month ,
-                            internal_group from account_move_line ,account_account
-                            where account_move_line.account_id=account_account.id AND internal_group = 'income' 
-                            AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) -1 
-                            AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''
-                            AND %s
-                            group by internal_group,month                  
-                 ''') % (states_arg))
-        record = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(debit)-sum(credit) as expense ,to_char(account_move_line.date, 'Month')  as month ,
-                            internal_group from account_move_line , account_account where 
-                            account_move_line.account_id=account_account.id AND internal_group = 'expense' 
-                            AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) -1 
-                            AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''
-                            AND %s 
-                            group by internal_group,month                  
-                         ''') % (states_arg))
-
-        result = self._cr.dictfetchall()
-        records = []
-        for month in month_list:
-            last_month_inc = list(filter(lambda m: m['month'].strip() == month, record))
-            last_month_exp = list(filter(lambda m: m['month'].strip() == month, result))
-            if not last_month_inc and not last_month_exp:
-                records.append({
-                    'month': month,
-                    'income': 0.0,
-                    'expense': 0.0,
-                    'profit': 0.0,
-                })
-            elif (not last_month_inc) and last_month_exp:
-                last_month_exp[0].update({
-                    'income': 0.0,
-                    'expense': -1 * last_month_exp[0]['expense'] if last_month_exp[0]['expense'] < 1 else
-                    last_month_exp[0]['expense']
-                })
-                last_month_exp[0].update({
-                    'profit': last_month_exp[0]['income'] - last_month_exp[0]['expense']
-                })
-                records.append(last_month_exp[0])
-            elif (not last_month_exp) and last_month_inc:
-                last_month_inc[0].update({
-                    'expense': 0.0,
-                    'income': -1 * last_month_inc[0]['income'] if last_month_inc[0]['income'] < 1 else
-                    last_month_inc[0]['income']
-                })
-                last_month_inc[0].update({
-                    'profit': last_month_inc[0]['income'] - last_month_inc[0]['expense']
-                })
-                records.append(last_month_inc[0])
-            else:
-                last_month_inc[0].update({
-                    'income': -1 * last_month_inc[0]['income'] if last_month_inc[0]['income'] < 1 else
-                    last_month_inc[0]['income'],
-                    'expense': -1 * last_month_exp[0]['expense'] if last_month_exp[0]['expense'] < 1 else
-                    last_month_exp[0]['expense']
-                })
-                last_month_inc[0].update({
-                    'profit': last_month_inc[0]['income'] - last_month_inc[0]['expense']
-                })
-                records.append(last_month_inc[0])
-        income = []
-        expense = []
-        month = []
-        profit = []
-        for rec in records:
-            income.append(rec['income'])
-            expense.append(rec['expense'])
-            month.append(rec['month'])
-            profit.append(rec['profit'])
-        return {
-            'income': income,
-            'expense': expense,
-            'month': month,
-            'profit': profit,
-        }
+        return self._get_income_series(post, 'last_year')
 
     # function to getting income of last month
 
     @api.model
     def get_income_last_month(self, *post):
-
-        company_id = self.get_current_company_value()
-        day_list = []
-        now = datetime.now()
-        day = \
-            calendar.monthrange(now.year - 1 if now.month == 1 else now.year,
-                                now.month - 1 if not now.month == 1 else 12)[
-                1]
-
-        for x in range(1, day + 1):
-            day_list.append(x)
-
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit)-sum(credit) as income ,cast(to_char(account_move_line.date, 'DD')as int)
-                                    as date , internal_group from account_move_line , account_account
-                                    where   Extract(month FROM account_move_line.date) = '''+str((datetime.now() - relativedelta(months=1)).month)+'''
-                                    AND Extract(YEAR FROM account_move_line.date) = '''+str((datetime.now() - relativedelta(months=1)).year)+'''  
-                                    AND %s
-                                    AND account_move_line.company_id in ''' + str(tuple(company_id)) + ''' 
-                                    AND account_move_line.account_id=account_account.id AND internal_group='income'
-                                    group by internal_group,date                 
-                                ''') % (states_arg))
-
-        record = self._cr.dictfetchall()
-        self._cr.execute(('''select sum(debit)-sum(credit) as expense ,cast(to_char(account_move_line.date, 'DD')as int)
-                                    as date , internal_group from account_move_line , account_account where  
-                                    Extract(month FROM account_move_line.date) = '''+str((datetime.now() - relativedelta(months=1)).month)+''' 
-                                    AND Extract(YEAR FROM account_move_line.date) = '''+str((datetime.now() - relativedelta(months=1)).year)+''' 
-                                    AND %s
-                                    AND account_move_line.company_id in ''' + str(tuple(company_id)) + ''' 
-                                    AND account_move_line.account_id=account_account.id AND internal_group='expense'
-                                    group by internal_group,date                 
-                                 ''') % (states_arg))
-        result = self._cr.dictfetchall()
-        records = []
-        for date in day_list:
-            last_month_inc = list(filter(lambda m: m['date'] == date, record))
-            last_month_exp = list(filter(lambda m: m['date'] == date, result))
-            if not last_month_inc and not last_month_exp:
-                records.append({
-                    'date': date,
-                    'income': 0.0,
-                    'expense': 0.0,
-                    'profit': 0.0
-                })
-            elif (not last_month_inc) and last_month_exp:
-                last_month_exp[0].update({
-                    'income': 0.0,
-                    'expense': -1 * last_month_exp[0]['expense'] if last_month_exp[0]['expense'] < 1 else
-                    last_month_exp[0]['expense']
-                })
-                last_month_exp[0].update({
-                    'profit': last_month_exp[0]['income'] - last_month_exp[0]['expense']
-                })
-                records.append(last_month_exp[0])
-            elif (not last_month_exp) and last_month_inc:
-                last_month_inc[0].update({
-                    'expense': 0.0,
-                    'income': -1 * last_month_inc[0]['income'] if last_month_inc[0]['income'] < 1 else
-                    last_month_inc[0]['income']
-                })
-                last_month_inc[0].update({
-                    'profit': last_month_inc[0]['income'] - last_month_inc[0]['expense']
-                })
-                records.append(last_month_inc[0])
-            else:
-                last_month_inc[0].update({
-                    'income': -1 * last_month_inc[0]['income'] if last_month_inc[0]['income'] < 1 else
-                    last_month_inc[0]['income'],
-                    'expense': -1 * last_month_exp[0]['expense'] if last_month_exp[0]['expense'] < 1 else
-                    last_month_exp[0]['expense']
-                })
-                last_month_inc[0].update({
-                    'profit': last_month_inc[0]['income'] - last_month_inc[0]['expense']
-                })
-                records.append(last_month_inc[0])
-        income = []
-        expense = []
-        date = []
-        profit = []
-        for rec in records:
-            income.append(rec['income'])
-            expense.append(rec['expense'])
-            date.append(rec['date'])
-            profit.append(rec['profit'])
-        return {
-            'income': income,
-            'expense': expense,
-            'date': date,
-            'profit': profit
-
-        }
+        return self._get_income_series(post, 'last_month')
 
     # function to getting income of this month
 
     @api.model
     def get_income_this_month(self, *post):
+        return self._get_income_series(post, 'this_month')
 
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        day_list = []
-        now = datetime.now()
-        day = calendar.monthrange(now.year, now.month)[1]
-        for x in range(1, day + 1):
-            day_list.append(x)
-
-        self._cr.execute(('''select sum(debit)-sum(credit) as income ,cast(to_char(account_move_line.date, 'DD')as int)
-                            as date , internal_group from account_move_line , account_account
-                            where   Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW()))  
-                            AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW()))  
-                            AND %s
-                            AND account_move_line.company_id in ''' + str(tuple(company_id)) + ''' 
-                            AND account_move_line.account_id=account_account.id AND internal_group='income'
-                            group by internal_group,date                 
-                        ''') % (states_arg))
-
-        record = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(debit)-sum(credit) as expense ,cast(to_char(account_move_line.date, 'DD')as int)
-                            as date , internal_group from account_move_line , account_account where  
-                            Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW()))  
-                            AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW()))  
-                            AND %s
-                            AND account_move_line.company_id in ''' + str(tuple(company_id)) + ''' 
-                            AND account_move_line.account_id=account_account.id AND internal_group='expense'
-                            group by internal_group,date                 
-                         ''') % (states_arg))
-        result = self._cr.dictfetchall()
-        records = []
-        for date in day_list:
-            last_month_inc = list(filter(lambda m: m['date'] == date, record))
-            last_month_exp = list(filter(lambda m: m['date'] == date, result))
-            if not last_month_inc and not last_month_exp:
-                records.append({
-                    'date': date,
-                    'income': 0.0,
-                    'expense': 0.0,
-                    'profit': 0.0
-                })
-            elif (not last_month_inc) and last_month_exp:
-                last_month_exp[0].update({
-                    'income': 0.0,
-                    'expense': -1 * last_month_exp[0]['expense'] if last_month_exp[0]['expense'] < 1 else
-                    last_month_exp[0]['expense']
-                })
-                last_month_exp[0].update({
-                    'profit': last_month_exp[0]['income'] - last_month_exp[0]['expense']
-                })
-                records.append(last_month_exp[0])
-            elif (not last_month_exp) and last_month_inc:
-                last_month_inc[0].update({
-                    'expense': 0.0,
-                    'income': -1 * last_month_inc[0]['income'] if last_month_inc[0]['income'] < 1 else
-                    last_month_inc[0]['income']
-                })
-                last_month_inc[0].update({
-                    'profit': last_month_inc[0]['income'] - last_month_inc[0]['expense']
-                })
-                records.append(last_month_inc[0])
-            else:
-                last_month_inc[0].update({
-                    'income': -1 * last_month_inc[0]['income'] if last_month_inc[0]['income'] < 1 else
-                    last_month_inc[0]['income'],
-                    'expense': -1 * last_month_exp[0]['expense'] if last_month_exp[0]['expense'] < 1 else
-                    last_month_exp[0]['expense']
-                })
-                last_month_inc[0].update({
-                    'profit': last_month_inc[0]['income'] - last_month_inc[0]['expense']
-                })
-                records.append(last_month_inc[0])
-        income = []
-        expense = []
-        date = []
-        profit = []
-        for rec in records:
-            income.append(rec['income'])
-            expense.append(rec['expense'])
-            date.append(rec['date'])
-            profit.append(rec['profit'])
-        return {
-            'income': income,
-            'expense': expense,
-            'date': date,
-            'profit': profit
+    # function to getting income of every selected company side by side
 
-        }
+    @api.model
+    def get_income_by_company(self, *post):
+        return self._get_income_series(post[:1], post[1], by_company=True)
+
+    def _get_top_partners(self, query, params, limit, others=True):
+        """Rank the rows of a query grouped by partner on their amount.
+
+        :param query: query returning the ``partner``, ``parent`` and
+                      ``amount`` columns, one row per partner
+        :param limit: number of ranked rows to return
+        :param others: add a row summing the amounts of the other partners
+        :return: list of dicts with the ``partner``, ``parent`` and
+                 ``amount`` keys
+        """
+        others_query = """
+            UNION ALL
+            SELECT %s + 1, 'Others', NULL, COALESCE(SUM(amount), 0)
+            FROM ranked WHERE rank > %s
+        """ if others else ""
+        self._cr.execute("""
+            WITH ranked AS (
+                SELECT totals.*, row_number() OVER (
+                    ORDER BY amount DESC, partner) AS rank
+                FROM (""" + query + """) totals
+            )
+            SELECT rank, partner, parent, amount FROM ranked WHERE rank <= %s
+        """ + others_query + """
+            ORDER BY rank
+        """, tuple(params) + (limit,) + ((limit, limit) if others else ()))
+        return self._cr.dictfetchall()
 
     # function to getting late bills
 
     @api.model
     def get_latebills(self, *post):
+        query = """
+            SELECT res_partner.name AS partner,
+                   account_move.commercial_partner_id AS parent,
+                   sum(account_move.amount_total) AS amount
+            FROM account_move
+            JOIN res_partner
+                ON res_partner.id = account_move.commercial_partner_id
+            WHERE account_move.move_type = 'in_invoice'
+                AND payment_state = 'not_paid'
+                AND account_move.state IN %s
+                AND account_move.company_id IN %s
+            GROUP BY parent, partner
+        """
+        record = self._get_top_partners(
+            query, (self._get_dashboard_states(post),
+                    tuple(self.get_current_company_value())), 9)
+        return {
+            'bill_partner': [item['partner'] for item in record],
+            'bill_amount': [item['amount'] for item in record],
+            'result': [],
+        }
 
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-
-        self._cr.execute(('''  select res_partner.name as partner, res_partner.commercial_partner_id as res  ,
-                            account_move.commercial_partner_id as parent, sum(account_move.amount_total) as amount
-                            from account_move,res_partner where 
-                            account_move.partner_id=res_partner.id AND account_move.move_type = 'in_invoice' AND
-                            payment_state = 'not_paid' AND 
-                              account_move.company_id in ''' + str(tuple(company_id)) + ''' AND
-                            %s 
-                            AND  account_move.commercial_partner_id=res_partner.commercial_partner_id 
-                            group by parent,partner,res
-                            order by amount desc ''') % (states_arg))
-
-        record = self._cr.dictfetchall()
-
-        bill_partner = [item['partner'] for item in record]
-
-        bill_amount = [item['amount'] for item in record]
-
-        amounts = sum(bill_amount[9:])
-        name = bill_partner[9:]
-        results = []
-        pre_partner = []
-
-        bill_amount = bill_amount[:9]
-        bill_amount.append(amounts)
-        bill_partner = bill_partner[:9]
-        bill_partner.append("Others")
-        records = {
-            'bill_partner': bill_partner,
-            'bill_amount': bill_amount,
-            'result': results,
+    # function to get the cash forecast of the next weeks
 
+    @api.model
+    def get_cash_forecast(self, *post):
+        """Bank balance plus the open invoices and bills, per week of due
+        date. Overdue items are expected in the first week."""
+        company_ids = self.get_current_company_value()
+        states = self._get_dashboard_states(post)
+        today = fields.Date.context_today(self)
+        balances = self.env['account.dashboard.bank.balance']._get_balances(
+            company_ids, states)
+        self._cr.execute("""
+            SELECT GREATEST(invoice_date_due - %(today)s, 0) / 7 AS week,
+                   SUM(amount_residual_signed) FILTER (
+                       WHERE move_type IN ('out_invoice', 'out_refund'))
+                       AS receivable,
+                   SUM(amount_residual_signed) FILTER (
+                       WHERE move_type IN ('in_invoice', 'in_refund'))
+                       AS payable
+            FROM account_move
+            WHERE move_type IN ('out_invoice', 'out_refund',
+                                'in_invoice', 'in_refund')
+            AND state IN %(states)s
+            AND company_id IN %(company_ids)s
+            AND amount_residual_signed != 0
+            AND invoice_date_due < %(date_to)s
+            GROUP BY week
+        """, {
+            'today': today,
+            'states': states,
+            'company_ids': tuple(company_ids),
+            'date_to': today + relativedelta(weeks=CASH_FORECAST_WEEKS),
+        })
+        weeks = {row['week']: row for row in self._cr.dictfetchall()}
+        balance = sum(item['balance'] or 0.0 for item in balances)
+        forecast = {
+            'opening_balance': balance,
+            'weeks': [],
+            'receivable': [],
+            'payable': [],
+            'balance': [],
         }
-        return records
-
-        # return record
+        for week in range(CASH_FORECAST_WEEKS):
+            row = weeks.get(week, {})
+            receivable = row.get('receivable') or 0.0
+            # the residual of the bills is signed negatively
+            payable = -(row.get('payable') or 0.0)
+            balance += receivable - payable
+            forecast['weeks'].append(fields.Date.to_string(
+                today + relativedelta(weeks=week)))
+            forecast['receivable'].append(receivable)
+            forecast['payable'].append(payable)
+            forecast['balance'].append(balance)
+        return forecast
 
     # function to getting over dues
 
     @api.model
     def get_overdues(self, *post):
-
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-
-        self._cr.execute((''' select res_partner.name as partner, res_partner.commercial_partner_id as res,
-                             account_move.commercial_partner_id as parent, sum(account_move.amount_total) as amount
-                            from account_move, account_move_line, res_partner, account_account where 
-                            account_move.partner_id=res_partner.id AND account_move.move_type = 'out_invoice' 
-                            AND payment_state = 'not_paid' 
-                            AND %s
-                            AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                            AND account_account.internal_type = 'payable'
-                            AND account_move.commercial_partner_id=res_partner.commercial_partner_id 
-                            group by parent,partner,res
-                            order by amount desc
-                            ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        due_partner = [item['partner'] for item in record]
-        due_amount = [item['amount'] for item in record]
-
-        amounts = sum(due_amount[9:])
-        name = due_partner[9:]
-        result = []
-        pre_partner = []
-
-        due_amount = due_amount[:9]
-        due_amount.append(amounts)
-        due_partner = due_partner[:9]
-        due_partner.append("Others")
-        records = {
-            'due_partner': due_partner,
-            'due_amount': due_amount,
-            'result': result,
-
+        query = """
+            SELECT res_partner.name AS partner,
+                   account_move.commercial_partner_id AS parent,
+                   sum(account_move.amount_total) AS amount
+            FROM account_move
+            JOIN res_partner
+                ON res_partner.id = account_move.commercial_partner_id
+            WHERE account_move.move_type = 'out_invoice'
+                AND payment_state = 'not_paid'
+                AND account_move.state IN %s
+                AND account_move.company_id IN %s
+            GROUP BY parent, partner
+        """
+        record = self._get_top_partners(
+            query, (self._get_dashboard_states(post),
+                    tuple(self.get_current_company_value())), 9)
+        return {
+            'due_partner': [item['partner'] for item in record],
+            'due_amount': [item['amount'] for item in record],
+            'result': [],
         }
-        return records
 
     @api.model
     def get_overdues_this_month_and_year(self, *post):
-
-        states_arg = ""
-        if post[0] != 'posted':
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-
-        company_id = self.get_current_company_value()
-        if post[1] == 'this_month':
-            self._cr.execute((''' 
-                               select to_char(account_move.date, 'Month') as month, res_partner.name as due_partner, account_move.partner_id as parent,
-                               sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                               AND account_move.move_type = 'out_invoice'
-                               AND payment_state = 'not_paid'
-                               AND %s 
-                               AND Extract(month FROM account_move.invoice_date_due) = Extract(month FROM DATE(NOW()))
-                               AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))
-                               AND account_move.partner_id = res_partner.commercial_partner_id
-                               AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                               group by parent, due_partner, month
-                               order by amount desc ''') % (states_arg))
-        else:
-            self._cr.execute((''' select  res_partner.name as due_partner, account_move.partner_id as parent,
-                                            sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                                            AND account_move.move_type = 'out_invoice'
-                                            AND payment_state = 'not_paid'
-                                            AND %s
-                                            AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))
-                                            AND account_move.partner_id = res_partner.commercial_partner_id
-                                            AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-    
-                                            group by parent, due_partner
-                                            order by amount desc ''') % (states_arg))
-
-        record = self._cr.dictfetchall()
-        due_partner = [item['due_partner'] for item in record]
-        due_amount = [item['amount'] for item in record]
-
-        amounts = sum(due_amount[9:])
-        name = due_partner[9:]
-        result = []
-        pre_partner = []
-
-        due_amount = due_amount[:9]
-        due_amount.append(amounts)
-        due_partner = due_partner[:9]
-        due_partner.append("Others")
-        records = {
-            'due_partner': due_partner,
-            'due_amount': due_amount,
-            'result': result,
-
+        date_from, date_to = self._get_dashboard_period(
+            'this_month' if post[1] == 'this_month' else 'this_year')
+        query = """
+            SELECT res_partner.name AS partner,
+                   account_move.commercial_partner_id AS parent,
+                   sum(account_move.amount_total) AS amount
+            FROM account_move
+            JOIN res_partner
+                ON res_partner.id = account_move.commercial_partner_id
+            WHERE account_move.move_type = 'out_invoice'
+                AND payment_state = 'not_paid'
+                AND account_move.state IN %s
+                AND account_move.invoice_date_due >= %s
+                AND account_move.invoice_date_due < %s
+                AND account_move.company_id IN %s
+            GROUP BY parent, partner
+        """
+        record = self._get_top_partners(
+            query, (self._get_dashboard_states(post[:1]), date_from, date_to,
+                    tuple(self.get_current_company_value())), 9)
+        return {
+            'due_partner': [item['partner'] for item in record],
+            'due_amount': [item['amount'] for item in record],
+            'result': [],
         }
-        return records
 
     @api.model
     def get_latebillss(self, *post):
-        company_id = self.get_current_company_value()
-
-        partners = self.env['res.partner'].search([('active', '=', True)])
-
-        states_arg = ""
-        if post[0] != 'posted':
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-
-        if post[1] == 'this_month':
-            self._cr.execute((''' 
-                                select to_char(account_move.date, 'Month') as month, res_partner.name as bill_partner, account_move.partner_id as parent,
-                                sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                                AND account_move.move_type = 'in_invoice'
-                                AND payment_state = 'not_paid'
-                                AND %s 
-                                AND Extract(month FROM account_move.invoice_date_due) = Extract(month FROM DATE(NOW()))
-                                AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))
-                                AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                AND account_move.partner_id = res_partner.commercial_partner_id
-                                group by parent, bill_partner, month
-                                order by amount desc ''') % (states_arg))
-        else:
-            self._cr.execute((''' select res_partner.name as bill_partner, account_move.partner_id as parent,
-                                            sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                                            AND account_move.move_type = 'in_invoice'
-                                            AND payment_state = 'not_paid'
-                                            AND %s
-                                            AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))
-                                            AND account_move.partner_id = res_partner.commercial_partner_id
-                                            AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                            group by parent, bill_partner
-                                            order by amount desc ''') % (states_arg))
-
-        result = self._cr.dictfetchall()
-        bill_partner = [item['bill_partner'] for item in result]
-
-        bill_amount = [item['amount'] for item in result]
-
-        amounts = sum(bill_amount[9:])
-        name = bill_partner[9:]
-        results = []
-        pre_partner = []
-
-        bill_amount = bill_amount[:9]
-        bill_amount.append(amounts)
-        bill_partner = bill_partner[:9]
-        bill_partner.append("Others")
-        records = {
-            'bill_partner': bill_partner,
-            'bill_amount': bill_amount,
-            'result': results,
-
+        date_from, date_to = self._get_dashboard_period(
+            'this_month' if post[1] == 'this_month' else 'this_year')
+        query = """
+            SELECT res_partner.name AS partner,
+                   account_move.commercial_partner_id AS parent,
+                   sum(account_move.amount_total) AS amount
+            FROM account_move
+            JOIN res_partner
+                ON res_partner.id = account_move.commercial_partner_id
+            WHERE account_move.move_type = 'in_invoice'
+                AND payment_state = 'not_paid'
+                AND account_move.state IN %s
+                AND account_move.invoice_date_due >= %s
+                AND account_move.invoice_date_due < %s
+                AND account_move.company_id IN %s
+            GROUP BY parent, partner
+        """
+        record = self._get_top_partners(
+            query, (self._get_dashboard_states(post[:1]), date_from, date_to,
+                    tuple(self.get_current_company_value())), 9)
+        return {
+            'bill_partner': [item['partner'] for item in record],
+            'bill_amount': [item['amount'] for item in record],
+            'result': [],
         }
-        return records
 
     @api.model
     def get_top_10_customers_month(self, *post):
-        record_invoice = {}
-        record_refund = {}
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post[0] != 'posted':
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-        if post[1] == 'this_month':
-            self._cr.execute((''' select res_partner.name as customers, account_move.commercial_partner_id as parent, 
-                                    sum(account_move.amount_total) as amount from account_move, res_partner
-                                    where account_move.commercial_partner_id = res_partner.id
-                                    AND account_move.company_id in %s 
-                                    AND account_move.move_type = 'out_invoice' 
-                                    AND %s   
-                                    AND Extract(month FROM account_move.invoice_date) = Extract(month FROM DATE(NOW()))
-                                    AND Extract(YEAR FROM account_move.invoice_date) = Extract(YEAR FROM DATE(NOW()))                      
-                                    group by parent, customers
-                                    order by amount desc 
-                                    limit 10
-                                    ''') % (tuple(company_id), states_arg))
-            record_invoice = self._cr.dictfetchall()
-            self._cr.execute((''' select res_partner.name as customers, account_move.commercial_partner_id as parent, 
-                                    sum(account_move.amount_total) as amount from account_move, res_partner
-                                    where account_move.commercial_partner_id = res_partner.id
-                                    AND account_move.company_id in %s
-                                    AND account_move.move_type = 'out_refund' 
-                                    AND %s      
-                                    AND Extract(month FROM account_move.invoice_date) = Extract(month FROM DATE(NOW()))
-                                    AND Extract(YEAR FROM account_move.invoice_date) = Extract(YEAR FROM DATE(NOW()))                   
-                                    group by parent, customers
-                                    order by amount desc 
-                                    limit 10
-                                    ''') % (tuple(company_id), states_arg))
-            record_refund = self._cr.dictfetchall()
-        else:
-            one_month_ago = (datetime.now() - relativedelta(months=1)).month
-            self._cr.execute((''' select res_partner.name as customers, account_move.commercial_partner_id as parent, 
-                                            sum(account_move.amount_total) as amount from account_move, res_partner
-                                            where account_move.commercial_partner_id = res_partner.id
-                                            AND account_move.company_id in %s
-                                            AND account_move.move_type = 'out_invoice' 
-                                            AND %s            
-                                            AND Extract(month FROM account_move.invoice_date) = ''' + str(
-                one_month_ago) + '''
-                                            group by parent, customers
-                                            order by amount desc 
-                                            limit 10
-                                            ''') % (tuple(company_id), states_arg))
-            record_invoice = self._cr.dictfetchall()
-            self._cr.execute((''' select res_partner.name as customers, account_move.commercial_partner_id as parent, 
-                                            sum(account_move.amount_total) as amount from account_move, res_partner
-                                            where account_move.commercial_partner_id = res_partner.id
-                                            AND account_move.company_id in %s 
-                                            AND account_move.move_type = 'out_refund' 
-                                            AND %s       
-                                            AND Extract(month FROM account_move.invoice_date) = ''' + str(
-                one_month_ago) + '''                  
-                                            group by parent, customers
-                                            order by amount desc 
-                                            limit 10
-                                            ''') % (tuple(company_id), states_arg))
-            record_refund = self._cr.dictfetchall()
-        summed = []
-        for out_sum in record_invoice:
-            parent = out_sum['parent']
-            su = out_sum['amount'] - \
-                 (list(filter(lambda refund: refund['parent'] == out_sum['parent'], record_refund))[0][
-                      'amount'] if len(
-                     list(filter(lambda refund: refund['parent'] == out_sum['parent'], record_refund))) > 0 else 0.0)
-            summed.append({
-                'customers': out_sum['customers'],
-                'amount': su,
-                'parent': parent
-            })
-        return summed
+        date_from, date_to = self._get_dashboard_period(
+            'this_month' if post[1] == 'this_month' else 'last_month')
+        # credit notes are deducted from the invoiced amount of the customer
+        query = """
+            SELECT res_partner.name AS partner,
+                   account_move.commercial_partner_id AS parent,
+                   sum(CASE WHEN account_move.move_type = 'out_refund'
+                       THEN -account_move.amount_total
+                       ELSE account_move.amount_total END) AS amount
+            FROM account_move
+            JOIN res_partner
+                ON res_partner.id = account_move.commercial_partner_id
+            WHERE account_move.company_id IN %s
+                AND account_move.move_type IN ('out_invoice', 'out_refund')
+                AND account_move.state IN %s
+                AND account_move.invoice_date >= %s
+                AND account_move.invoice_date < %s
+            GROUP BY parent, partner
+        """
+        record = self._get_top_partners(
+            query, (tuple(self.get_current_company_value()),
+                    self._get_dashboard_states(post[:1]), date_from, date_to),
+            10, others=False)
+        return [{
+            'customers': item['partner'],
+            'amount': item['amount'],
+            'parent': item['parent'],
+        } for item in record]
 
     # function to get total invoice
 
@@ -725,31 +759,25 @@ class DashBoard(models.Model):
     def get_total_invoice(self, *post):
 
         company_id = self.get_current_company_value()
+        states = self._get_dashboard_states(post)
 
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-
-        self._cr.execute(('''select sum(amount_total) as customer_invoice from account_move where move_type ='out_invoice'
-                            AND  %s  AND account_move.company_id in ''' + str(tuple(company_id)) + '''           
-                        ''') % (states_arg))
+        query = '''select sum(amount_total) as %s from account_move where move_type = %%s
+                   AND account_move.state in %%s AND account_move.company_id in %%s
+                '''
+        self._cr.execute(query % 'customer_invoice',
+                         ('out_invoice', states, tuple(company_id)))
         record_customer = self._cr.dictfetchall()
 
-        self._cr.execute(('''select sum(amount_total) as supplier_invoice from account_move where move_type ='in_invoice' 
-                          AND  %s  AND account_move.company_id in ''' + str(tuple(company_id)) + '''      
-                        ''') % (states_arg))
+        self._cr.execute(query % 'supplier_invoice',
+                         ('in_invoice', states, tuple(company_id)))
         record_supplier = self._cr.dictfetchall()
 
-        self._cr.execute(('''select sum(amount_total) as credit_note from account_move where move_type ='out_refund'
-                          AND  %s  AND account_move.company_id in ''' + str(tuple(company_id)) + '''      
-                        ''') % (states_arg))
+        self._cr.execute(query % 'credit_note',
+                         ('out_refund', states, tuple(company_id)))
         result_credit_note = self._cr.dictfetchall()
 
-        self._cr.execute(('''select sum(amount_total) as refund from account_move where move_type ='in_refund'
-                          AND  %s  AND account_move.company_id in ''' + str(tuple(company_id)) + '''   
-                        ''') % (states_arg))
+        self._cr.execute(query % 'refund',
+                         ('in_refund', states, tuple(company_id)))
         result_refund = self._cr.dictfetchall()
 
         customer_invoice = [item['customer_invoice'] for item in record_customer]
@@ -763,55 +791,42 @@ class DashBoard(models.Model):
     def get_total_invoice_current_year(self, *post):
 
         company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-
-        self._cr.execute(('''select sum(amount_total_signed) as customer_invoice from account_move where move_type ='out_invoice'
-                            AND   %s                               
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                            AND account_move.company_id in ''' + str(tuple(company_id)) + '''           
-                        ''') % (states_arg))
+        states = self._get_dashboard_states(post)
+        date_from, date_to = self._get_dashboard_period('this_year')
+        params = (states, date_from, date_to, tuple(company_id))
+
+        self._cr.execute('''select sum(amount_total_signed) as customer_invoice,
+                            sum(amount_total_signed) filter (where payment_state = 'paid')
+                                - sum(amount_residual_signed) filter (where payment_state = 'paid') as customer_invoice_paid
+                            from account_move where move_type ='out_invoice'
+                            AND account_move.state in %s
+                            AND account_move.date >= %s AND account_move.date < %s
+                            AND account_move.company_id in %s
+                        ''', params)
         record_customer_current_year = self._cr.dictfetchall()
 
-        self._cr.execute(('''select sum(-(amount_total_signed)) as supplier_invoice from account_move where move_type ='in_invoice'
-                            AND  %s                              
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                            AND account_move.company_id in ''' + str(tuple(company_id)) + '''      
-                        ''') % (states_arg))
+        self._cr.execute('''select sum(-(amount_total_signed)) as supplier_invoice,
+                            sum(-(amount_total_signed)) filter (where payment_state = 'paid')
+                                - sum(-(amount_residual_signed)) filter (where payment_state = 'paid') as supplier_invoice_paid
+                            from account_move where move_type ='in_invoice'
+                            AND account_move.state in %s
+                            AND account_move.date >= %s AND account_move.date < %s
+                            AND account_move.company_id in %s
+                        ''', params)
         record_supplier_current_year = self._cr.dictfetchall()
         result_credit_note_current_year = [{'credit_note': 0.0}]
         result_refund_current_year = [{'refund': 0.0}]
-        self._cr.execute(('''select sum(amount_total_signed) - sum(amount_residual_signed)  as customer_invoice_paid from account_move where move_type ='out_invoice'
-                                    AND   %s
-                                    AND payment_state = 'paid'
-                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                    AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                ''') % (states_arg))
-        record_paid_customer_invoice_current_year = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) - sum(-(amount_residual_signed))  as supplier_invoice_paid from account_move where move_type ='in_invoice'
-                                    AND   %s
-                                    AND  payment_state = 'paid'
-                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                    AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                ''') % (states_arg))
-        result_paid_supplier_invoice_current_year = self._cr.dictfetchall()
         record_paid_customer_credit_current_year = [{'customer_credit_paid': 0.0}]
         result_paid_supplier_refund_current_year = [{'supplier_refund_paid': 0.0}]
+
         customer_invoice_current_year = [item['customer_invoice'] for item in record_customer_current_year]
         supplier_invoice_current_year = [item['supplier_invoice'] for item in record_supplier_current_year]
-
         credit_note_current_year = [item['credit_note'] for item in result_credit_note_current_year]
         refund_current_year = [item['refund'] for item in result_refund_current_year]
-
         paid_customer_invoice_current_year = [item['customer_invoice_paid'] for item in
-                                              record_paid_customer_invoice_current_year]
+                                              record_customer_current_year]
         paid_supplier_invoice_current_year = [item['supplier_invoice_paid'] for item in
-                                              result_paid_supplier_invoice_current_year]
+                                              record_supplier_current_year]
 
         paid_customer_credit_current_year = [item['customer_credit_paid'] for item in
                                              record_paid_customer_credit_current_year]
@@ -824,47 +839,31 @@ class DashBoard(models.Model):
     def get_total_invoice_current_month(self, *post):
 
         company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-
-        self._cr.execute(('''select sum(amount_total_signed) as customer_invoice from account_move where move_type ='out_invoice'
-                                    AND   %s                               
-                                    AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                                    AND account_move.company_id in ''' + str(tuple(company_id)) + '''           
-                                ''') % (states_arg))
+        states = self._get_dashboard_states(post)
+        date_from, date_to = self._get_dashboard_period('this_month')
+        params = (states, date_from, date_to, tuple(company_id))
+
+        self._cr.execute('''select sum(amount_total_signed) as customer_invoice,
+                            sum(amount_total_signed) filter (where payment_state = 'paid')
+                                - sum(amount_residual_signed) filter (where payment_state = 'paid') as customer_invoice_paid
+                            from account_move where move_type ='out_invoice'
+                            AND account_move.state in %s
+                            AND account_move.date >= %s AND account_move.date < %s
+                            AND account_move.company_id in %s
+                        ''', params)
         record_customer_current_month = self._cr.dictfetchall()
 
-        self._cr.execute(('''select sum(-(amount_total_signed)) as supplier_invoice from account_move where move_type ='in_invoice'
-                                    AND  %s                              
-                                    AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                                    AND account_move.company_id in ''' + str(tuple(company_id)) + '''      
-                                ''') % (states_arg))
+        self._cr.execute('''select sum(-(amount_total_signed)) as supplier_invoice,
+                            sum(-(amount_total_signed)) filter (where payment_state = 'paid')
+                                - sum(-(amount_residual_signed)) filter (where payment_state = 'paid') as supplier_invoice_paid
+                            from account_move where move_type ='in_invoice'
+                            AND account_move.state in %s
+                            AND account_move.date >= %s AND account_move.date < %s
+                            AND account_move.company_id in %s
+                        ''', params)
         record_supplier_current_month = self._cr.dictfetchall()
         result_credit_note_current_month = [{'credit_note': 0.0}]
         result_refund_current_month = [{'refund': 0.0}]
-        self._cr.execute(('''select sum(amount_total_signed) - sum(amount_residual_signed)  as customer_invoice_paid from account_move where move_type ='out_invoice'
-                                            AND   %s
-                                            AND payment_state = 'paid'
-                                            AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                            AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                        ''') % (states_arg))
-        record_paid_customer_invoice_current_month = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) - sum(-(amount_residual_signed))  as supplier_invoice_paid from account_move where move_type ='in_invoice'
-                                            AND   %s
-                                            AND payment_state = 'paid'
-                                            AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                            AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                        ''') % (states_arg))
-        result_paid_supplier_invoice_current_month = self._cr.dictfetchall()
         record_paid_customer_credit_current_month = [{'customer_credit_paid': 0.0}]
         result_paid_supplier_refund_current_month = [{'supplier_refund_paid': 0.0}]
 
@@ -873,14 +872,14 @@ class DashBoard(models.Model):
         credit_note_current_month = [item['credit_note'] for item in result_credit_note_current_month]
         refund_current_month = [item['refund'] for item in result_refund_current_month]
         paid_customer_invoice_current_month = [item['customer_invoice_paid'] for item in
-                                               record_paid_customer_invoice_current_month]
+                                              record_customer_current_month]
         paid_supplier_invoice_current_month = [item['supplier_invoice_paid'] for item in
-                                               result_paid_supplier_invoice_current_month]
+                                              record_supplier_current_month]
 
         paid_customer_credit_current_month = [item['customer_credit_paid'] for item in
-                                              record_paid_customer_credit_current_month]
+                                             record_paid_customer_credit_current_month]
         paid_supplier_refund_current_month = [item['supplier_refund_paid'] for item in
-                                              result_paid_supplier_refund_current_month]
+                                             result_paid_supplier_refund_current_month]
 
         currency = self.get_currency()
         return customer_invoice_current_month, credit_note_current_month, supplier_invoice_current_month, refund_current_month, paid_customer_invoice_current_month, paid_supplier_invoice_current_month, paid_customer_credit_current_month, paid_supplier_refund_current_month, currency
@@ -888,20 +887,12 @@ class DashBoard(models.Model):
     @api.model
     def get_total_invoice_this_month(self, *post):
 
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-
-        self._cr.execute(('''select sum(amount_total) from account_move where move_type = 'out_invoice' 
-                            AND %s
-                            AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))      
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))   
-                            AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                            ''') % (states_arg))
+        date_from, date_to = self._get_dashboard_period('this_month')
+        self._cr.execute('''select sum(amount_total) from account_move where move_type = 'out_invoice'
+                            AND account_move.state in %s
+                            AND account_move.date >= %s AND account_move.date < %s
+                            AND account_move.company_id in %s
+                            ''', (self._get_dashboard_states(post), date_from, date_to, tuple(self.get_current_company_value())))
         record = self._cr.dictfetchall()
         return record
 
@@ -910,12 +901,11 @@ class DashBoard(models.Model):
     @api.model
     def get_total_invoice_last_month(self):
 
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-
-        self._cr.execute('''select sum(amount_total) from account_move where move_type = 'out_invoice' AND
-                               account_move.state = 'posted'
-                            AND Extract(month FROM account_move.date) = ''' + str(one_month_ago) + ''' 
-                            ''')
+        date_from, date_to = self._get_dashboard_period('last_month')
+        self._cr.execute('''select sum(amount_total) from account_move where move_type = 'out_invoice'
+                            AND account_move.state in %s
+                            AND account_move.date >= %s AND account_move.date < %s
+                            ''', (('posted',), date_from, date_to))
         record = self._cr.dictfetchall()
         return record
 
@@ -924,10 +914,11 @@ class DashBoard(models.Model):
     @api.model
     def get_total_invoice_last_year(self):
 
-        self._cr.execute(''' select sum(amount_total) from account_move where move_type = 'out_invoice' 
-                            AND account_move.state = 'posted'
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW())) - 1    
-                                ''')
+        date_from, date_to = self._get_dashboard_period('last_year')
+        self._cr.execute('''select sum(amount_total) from account_move where move_type = 'out_invoice'
+                            AND account_move.state in %s
+                            AND account_move.date >= %s AND account_move.date < %s
+                            ''', (('posted',), date_from, date_to))
         record = self._cr.dictfetchall()
         return record
 
@@ -936,13 +927,12 @@ class DashBoard(models.Model):
     @api.model
     def get_total_invoice_this_year(self):
 
-        company_id = self.get_current_company_value()
-
-        self._cr.execute(''' select sum(amount_total) from account_move where move_type = 'out_invoice'
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW())) AND
-                               account_move.state = 'posted'   AND
-                                account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                    ''')
+        date_from, date_to = self._get_dashboard_period('this_year')
+        self._cr.execute('''select sum(amount_total) from account_move where move_type = 'out_invoice'
+                            AND account_move.state in %s
+                            AND account_move.date >= %s AND account_move.date < %s
+                            AND account_move.company_id in %s
+                            ''', (('posted',), date_from, date_to, tuple(self.get_current_company_value())))
         record = self._cr.dictfetchall()
         return record
 
@@ -950,406 +940,157 @@ class DashBoard(models.Model):
 
     @api.model
     def unreconcile_items(self):
-        self._cr.execute('''
-                            select count(*) FROM account_move_line l,account_account a
-                            where L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                            l.balance != 0 AND a.reconcile IS TRUE ''')
-        record = self._cr.dictfetchall()
-        return record
+        return self.env['account.dashboard.unreconciled']._get_count()
 
     # function to get unreconcile items this month
 
     @api.model
     def unreconcile_items_this_month(self, *post):
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        qry = ''' select count(*) FROM account_move_line l,account_account a
-                              where Extract(month FROM l.date) = Extract(month FROM DATE(NOW())) AND
-                              Extract(YEAR FROM l.date) = Extract(YEAR FROM DATE(NOW())) AND
-                              L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                              l.balance != 0 AND a.reconcile IS F 
-                              AND l.''' + states_arg + '''
-                              AND  l.company_id in ''' + str(tuple(company_id)) + '''                              
-                               '''
-
-        self._cr.execute((''' select count(*) FROM account_move_line l,account_account a
-                              where Extract(month FROM l.date) = Extract(month FROM DATE(NOW())) AND
-                              Extract(YEAR FROM l.date) = Extract(YEAR FROM DATE(NOW())) AND
-                              L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                              l.balance != 0 AND a.reconcile IS TRUE 
-                              AND l.%s
-                              AND  l.company_id in ''' + str(tuple(company_id)) + '''                              
-                               ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
+        date_from, date_to = self._get_dashboard_period('this_month')
+        return self.env['account.dashboard.unreconciled']._get_count(
+            date_from, date_to, self.get_current_company_value(),
+            self._get_dashboard_states(post))
 
     # function to get unreconcile items last month
 
     @api.model
     def unreconcile_items_last_month(self):
-
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-
-        self._cr.execute('''  select count(*) FROM account_move_line l,account_account a 
-                              where Extract(month FROM l.date) = ''' + str(one_month_ago) + ''' AND
-                              L.account_id=a.id AND l.full_reconcile_id IS NULL AND l.balance != 0 AND a.reconcile IS TRUE 
-                         ''')
-        record = self._cr.dictfetchall()
-        return record
+        date_from, date_to = self._get_dashboard_period('last_month')
+        return self.env['account.dashboard.unreconciled']._get_count(
+            date_from, date_to)
 
     # function to get unreconcile items this year
 
     @api.model
     def unreconcile_items_this_year(self, *post):
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''  select count(*) FROM account_move_line l,account_account a
-                                  where Extract(year FROM l.date) = Extract(year FROM DATE(NOW())) AND
-                                  l.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                                  l.balance != 0 AND a.reconcile IS TRUE  
-                                  AND l.%s
-                                  AND  l.company_id in ''' + str(tuple(company_id)) + '''       
-                                  ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
+        date_from, date_to = self._get_dashboard_period('this_year')
+        return self.env['account.dashboard.unreconciled']._get_count(
+            date_from, date_to, self.get_current_company_value(),
+            self._get_dashboard_states(post))
+
+    def _get_dashboard_line_domain(self, post, period):
+        """Domain of the journal items of a dashboard period."""
+        date_from, date_to = self._get_dashboard_period(period)
+        return [
+            ('parent_state', 'in', self._get_dashboard_states(post)),
+            ('date', '>=', fields.Date.to_string(date_from)),
+            ('date', '<', fields.Date.to_string(date_to)),
+            ('company_id', 'in', self.get_current_company_value()),
+        ]
+
+    def _get_dashboard_move_domain(self, post, period, move_type):
+        """Domain of the journal entries of a dashboard period."""
+        date_from, date_to = self._get_dashboard_period(period)
+        return [
+            ('move_type', '=', move_type),
+            ('state', 'in', self._get_dashboard_states(post)),
+            ('date', '>=', fields.Date.to_string(date_from)),
+            ('date', '<', fields.Date.to_string(date_to)),
+            ('company_id', 'in', self.get_current_company_value()),
+        ]
 
     @api.model
     def click_expense_month(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-        self._cr.execute((''' select account_move_line.id from  account_account, account_move_line where 
-                            account_move_line.account_id = account_account.id AND account_account.internal_group = 'expense' AND  
-                            %s                
-                            AND Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW()))
-                            AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) 
-                            AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''
-                                 ''') % (states_arg))
-        record = [row[0] for row in self._cr.fetchall()]
-        return record
+        return [('account_id.internal_group', 'in', ['expense'])] + \
+            self._get_dashboard_line_domain(post, 'this_month')
 
     @api.model
     def click_expense_year(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-        self._cr.execute((''' select account_move_line.id from  account_account, account_move_line where
-                                account_move_line.account_id = account_account.id AND account_account.internal_group = 'expense' AND  
-                                %s                         
-                                AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW())) 
-                                AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''
-                                ''') % (states_arg))
-        record = [row[0] for row in self._cr.fetchall()]
-        return record
+        return [('account_id.internal_group', 'in', ['expense'])] + \
+            self._get_dashboard_line_domain(post, 'this_year')
 
     @api.model
     def click_total_income_month(self, *post):
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select account_move_line.id from account_account, account_move_line where
-                                account_move_line.account_id = account_account.id AND account_account.internal_group = 'income'
-                               AND %s
-                               AND Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW())) 
-                               AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) 
-                               AND account_move_line.company_id in ''' + str(tuple(company_id)) + ''' 
-
-                                     ''') % (states_arg))
-        record = [row[0] for row in self._cr.fetchall()]
-        return record
+        return [('account_id.internal_group', 'in', ['income'])] + \
+            self._get_dashboard_line_domain(post, 'this_month')
 
     @api.model
     def click_total_income_year(self, *post):
-
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute((''' select account_move_line.id from account_account, account_move_line where                           
-                             account_move_line.account_id = account_account.id AND account_account.internal_group = 'income'
-                             AND %s
-                          AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW())) 
-                          AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''
-                        ''') % (states_arg))
-        record = [row[0] for row in self._cr.fetchall()]
-        return record
+        return [('account_id.internal_group', 'in', ['income'])] + \
+            self._get_dashboard_line_domain(post, 'this_year')
 
     @api.model
     def click_profit_income_month(self, *post):
-
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select account_move_line.id from  account_account, account_move_line where 
-                                       account_move_line.account_id = account_account.id AND
-                                       %s AND
-                                       (account_account.internal_group = 'income' or    
-                                       account_account.internal_group = 'expense' ) 
-                                       AND Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW())) 
-                                       AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW()))   
-                                       AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''        
-                                        ''') % (states_arg))
-        profit = [row[0] for row in self._cr.fetchall()]
-        return profit
+        return [('account_id.internal_group', 'in', ['income', 'expense'])] + \
+            self._get_dashboard_line_domain(post, 'this_month')
 
     @api.model
     def click_profit_income_year(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select account_move_line.id from  account_account, account_move_line where 
-                                            account_move_line.account_id = account_account.id AND
-                                            %s AND
-                                           (account_account.internal_group = 'income' or    
-                                           account_account.internal_group = 'expense' )                                       
-                                           AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW()))  
-                                           AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''           
-                                            ''') % (states_arg))
-        profit = [row[0] for row in self._cr.fetchall()]
-        return profit
+        return [('account_id.internal_group', 'in', ['income', 'expense'])] + \
+            self._get_dashboard_line_domain(post, 'this_year')
 
     @api.model
     def click_bill_year(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-        self._cr.execute(('''select account_move.id from account_move where move_type ='in_invoice'
-                               AND  %s                              
-                               AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                               AND account_move.company_id in ''' + str(tuple(company_id)) + '''      
-                           ''') % (states_arg))
-        record_supplier_current_year = [row[0] for row in self._cr.fetchall()]
-        return record_supplier_current_year
+        return self._get_dashboard_move_domain(post, 'this_year', 'in_invoice')
 
     @api.model
     def click_bill_year_paid(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-
-        self._cr.execute(('''select account_move.id from account_move where move_type ='in_invoice'
-                                       AND   %s
-                                       AND  payment_state = 'paid'
-                                       AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                       AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                   ''') % (states_arg))
-        result_paid_supplier_invoice_current_year = [row[0] for row in self._cr.fetchall()]
-        return result_paid_supplier_invoice_current_year
+        return self._get_dashboard_move_domain(post, 'this_year', 'in_invoice') + \
+            [('payment_state', '=', 'paid')]
 
     @api.model
     def click_invoice_year_paid(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-        self._cr.execute(('''select account_move.id from account_move where move_type ='out_invoice'
-                                       AND   %s
-                                       AND payment_state = 'paid'
-                                       AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                       AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                   ''') % (states_arg))
-        record_paid_customer_invoice_current_year = [row[0] for row in self._cr.fetchall()]
-        return record_paid_customer_invoice_current_year
+        return self._get_dashboard_move_domain(post, 'this_year', 'out_invoice') + \
+            [('payment_state', '=', 'paid')]
 
     @api.model
     def click_invoice_year(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-        self._cr.execute(('''select account_move.id  from account_move where move_type ='out_invoice'
-                               AND   %s                               
-                               AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                               AND account_move.company_id in ''' + str(tuple(company_id)) + '''           
-                           ''') % (states_arg))
-        record_customer_current_year = [row[0] for row in self._cr.fetchall()]
-        return record_customer_current_year
+        return self._get_dashboard_move_domain(post, 'this_year', 'out_invoice')
 
     @api.model
     def click_bill_month(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-        self._cr.execute(('''select account_move.id from account_move where move_type ='in_invoice'
-                                            AND   %s
-                                            AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                            AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                        ''') % (states_arg))
-        bill_month = [row[0] for row in self._cr.fetchall()]
-        return bill_month
+        return self._get_dashboard_move_domain(post, 'this_month', 'in_invoice')
 
     @api.model
     def click_bill_month_paid(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-        self._cr.execute(('''select account_move.id from account_move where move_type ='in_invoice'
-                                            AND   %s
-                                            AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                            AND payment_state = 'paid'
-                                            AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                        ''') % (states_arg))
-        result_paid_supplier_invoice_current_month = [row[0] for row in self._cr.fetchall()]
-        return result_paid_supplier_invoice_current_month
+        return self._get_dashboard_move_domain(post, 'this_month', 'in_invoice') + \
+            [('payment_state', '=', 'paid')]
 
     @api.model
     def click_invoice_month_paid(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-        self._cr.execute(('''select account_move.id from account_move where move_type ='out_invoice'
-                                            AND   %s
-                                            AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                            AND payment_state = 'paid'
-                                            AND account_move.company_id in ''' + str(tuple(company_id)) + '''
-                                        ''') % (states_arg))
-        record_paid_customer_invoice_current_month = [row[0] for row in self._cr.fetchall()]
-        return record_paid_customer_invoice_current_month
+        return self._get_dashboard_move_domain(post, 'this_month', 'out_invoice') + \
+            [('payment_state', '=', 'paid')]
 
     @api.model
     def click_invoice_month(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ account_move.state in ('posted', 'draft')"""
-        else:
-            states_arg = """ account_move.state = 'posted'"""
-        self._cr.execute(('''select account_move.id from account_move where move_type ='out_invoice'
-                                    AND   %s                               
-                                    AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                                    AND account_move.company_id in ''' + str(tuple(company_id)) + '''           
-                                ''') % (states_arg))
-        record_customer_current_month = [row[0] for row in self._cr.fetchall()]
-        return record_customer_current_month
+        return self._get_dashboard_move_domain(post, 'this_month', 'out_invoice')
 
     @api.model
     def click_unreconcile_month(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-        qry = ''' select count(*) FROM account_move_line l,account_account a
-                              where Extract(month FROM l.date) = Extract(month FROM DATE(NOW())) AND
-                              Extract(YEAR FROM l.date) = Extract(YEAR FROM DATE(NOW())) AND
-                              L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                              l.balance != 0 AND a.reconcile IS F 
-                              AND l.''' + states_arg + '''
-                              AND  l.company_id in ''' + str(tuple(company_id)) + '''                              
-                               '''
-
-        self._cr.execute((''' select l.id FROM account_move_line l,account_account a
-                              where Extract(month FROM l.date) = Extract(month FROM DATE(NOW())) AND
-                              Extract(YEAR FROM l.date) = Extract(YEAR FROM DATE(NOW())) AND
-                              L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                              l.balance != 0 AND a.reconcile IS TRUE 
-                              AND l.%s
-                              AND  l.company_id in ''' + str(tuple(company_id)) + '''                              
-                               ''') % (states_arg))
-        record = [row[0] for row in self._cr.fetchall()]
-        return record
+        return [
+            ('full_reconcile_id', '=', False),
+            ('balance', '!=', 0),
+            ('account_id.reconcile', '=', True),
+        ] + self._get_dashboard_line_domain(post, 'this_month')
 
     @api.model
     def click_unreconcile_year(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-        self._cr.execute(('''  select l.id FROM account_move_line l,account_account a
-                                  where Extract(year FROM l.date) = Extract(year FROM DATE(NOW())) AND
-                                  L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                                  l.balance != 0 AND a.reconcile IS TRUE  
-                                  AND l.%s
-                                  AND  l.company_id in ''' + str(tuple(company_id)) + '''       
-                                  ''') % (states_arg))
-        record = [row[0] for row in self._cr.fetchall()]
-        return record
+        return [
+            ('full_reconcile_id', '=', False),
+            ('balance', '!=', 0),
+            ('account_id.reconcile', '=', True),
+        ] + self._get_dashboard_line_domain(post, 'this_year')
 
     # function to get unreconcile items last year
 
     @api.model
     def unreconcile_items_last_year(self):
-
-        self._cr.execute('''  select count(*) FROM account_move_line l,account_account a
-                                      where Extract(year FROM l.date) = Extract(year FROM DATE(NOW())) - 1 AND
-                                      L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                                      l.balance != 0 AND a.reconcile IS TRUE
-                                      ''')
-        record = self._cr.dictfetchall()
-        return record
+        date_from, date_to = self._get_dashboard_period('last_year')
+        return self.env['account.dashboard.unreconciled']._get_count(
+            date_from, date_to)
 
     # function to get total income
 
     @api.model
     def month_income(self):
 
-        self._cr.execute(''' select sum(debit) as debit , sum(credit) as credit  from account_move, account_account,account_move_line
-                            where  account_move.move_type = 'entry'  AND account_move.state = 'posted' AND  account_move_line.account_id=account_account.id AND
-                             account_account.internal_group='income'
-                              AND to_char(DATE(NOW()), 'MM') = to_char(account_move_line.date, 'MM')
-                              ''')
+        date_from, date_to = self._get_dashboard_period('this_month')
+        self._cr.execute(''' select sum(debit) as debit , sum(credit) as credit from account_move, account_account,account_move_line
+                            where account_move_line.move_id = account_move.id AND
+                            account_move.move_type = 'entry'  AND account_move.state = 'posted' AND  account_move_line.account_id=account_account.id AND
+                             account_account.internal_group = 'income'
+                              AND account_move_line.date >= %s AND account_move_line.date < %s
+                              ''', (date_from, date_to))
         record = self._cr.dictfetchall()
         return record
 
@@ -1357,164 +1098,58 @@ class DashBoard(models.Model):
 
     @api.model
     def month_income_this_month(self, *post):
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit) as debit, sum(credit) as credit from account_account, account_move_line where
-                            account_move_line.account_id = account_account.id AND account_account.internal_group = 'income'
-                           AND %s
-                           AND Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW())) 
-                           AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) 
-                           AND account_move_line.company_id in ''' + str(tuple(company_id)) + ''' 
-
-                                 ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
+        totals = self._get_monthly_totals(post, 'this_month', ('income',))
+        record = totals.get('income', {'debit': None, 'credit': None})
+        return [{'debit': record['debit'], 'credit': record['credit']}]
 
     @api.model
     def profit_income_this_month(self, *post):
-
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit) - sum(credit) as profit, account_account.internal_group from  account_account, account_move_line where 
-                                  
-                                    account_move_line.account_id = account_account.id AND
-                                    %s AND
-                                    (account_account.internal_group = 'income' or    
-                                    account_account.internal_group = 'expense' ) 
-                                    AND Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW())) 
-                                    AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW()))   
-                                    AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''        
-                                    group by internal_group 
-                                     ''') % (states_arg))
-        income = self._cr.dictfetchall()
-        profit = [item['profit'] for item in income]
-        internal_group = [item['internal_group'] for item in income]
-        net_profit = True
-        loss = True
-        if profit and profit == 0:
-            if (-profit[1]) > (profit[0]):
-                net_profit = -profit[1] - profit[0]
-            elif (profit[1]) > (profit[0]):
-                net_profit = -profit[1] - profit[0]
-            else:
-                net_profit = -profit[1] - profit[0]
-
-        return profit
+        totals = self._get_monthly_totals(post, 'this_month')
+        return [item['debit'] - item['credit'] for item in totals.values()]
 
     def get_current_company_value(self):
-
-        cookies_cids = [int(r) for r in request.httprequest.cookies.get('cids').split(",")] \
-            if request.httprequest.cookies.get('cids') \
-            else [request.env.user.company_id.id]
-
-        for company_id in cookies_cids:
-            if company_id not in self.env.user.company_ids.ids:
-                cookies_cids.remove(company_id)
-        if not cookies_cids:
-            cookies_cids = [self.env.company.id]
-        if len(cookies_cids) == 1:
-            cookies_cids.append(0)
-        return cookies_cids
+        if 'dashboard_company_ids' in self.env.context:
+            return list(self.env.context['dashboard_company_ids'])
+        return self.env['res.company']._get_report_company_ids()
 
     @api.model
     def profit_income_this_year(self, *post):
-        company_id = self.get_current_company_value()
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit) - sum(credit) as profit, account_account.internal_group from  account_account, account_move_line where 
-                                        
-                                         account_move_line.account_id = account_account.id AND
-                                         %s AND
-                                        (account_account.internal_group = 'income' or    
-                                        account_account.internal_group = 'expense' )                                       
-                                        AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW()))  
-                                        AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''           
-                                        group by internal_group 
-                                         ''') % (states_arg))
-        income = self._cr.dictfetchall()
-        profit = [item['profit'] for item in income]
-        internal_group = [item['internal_group'] for item in income]
-        net_profit = True
-        loss = True
-
-        if profit and profit == 0:
-            if (-profit[1]) > (profit[0]):
-                net_profit = -profit[1] - profit[0]
-            elif (profit[1]) > (profit[0]):
-                net_profit = -profit[1] - profit[0]
-            else:
-                net_profit = -profit[1] - profit[0]
-
-        return profit
+        totals = self._get_monthly_totals(post, 'this_year')
+        return [item['debit'] - item['credit'] for item in totals.values()]
 
     # function to get total income last month
 
     @api.model
     def month_income_last_month(self):
 
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-
-        self._cr.execute('''
-                            select sum(debit) as debit, sum(credit) as credit from  account_account, 
-        account_move_line where 
-         account_move_line.account_id = account_account.id 
-        AND account_account.internal_group = 'income' AND 
-        account_move_line.parent_state = 'posted'  
-        AND Extract(month FROM account_move_line.date) = ''' + str(one_month_ago) + '''
-        ''')
-
+        date_from, date_to = self._get_dashboard_period('last_month')
+        self._cr.execute(''' select sum(debit) as debit, sum(credit) as credit from  account_account, account_move_line where
+                            account_move_line.parent_state = 'posted' 
+                            AND  account_move_line.account_id = account_account.id AND account_account.internal_group = 'income'
+                            AND account_move_line.date >= %s AND account_move_line.date < %s
+                         ''', (date_from, date_to))
         record = self._cr.dictfetchall()
-
         return record
 
     # function to get total income this year
 
     @api.model
     def month_income_this_year(self, *post):
-
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute((''' select sum(debit) as debit, sum(credit) as credit from account_account, account_move_line where                           
-                             account_move_line.account_id = account_account.id AND account_account.internal_group = 'income'
-                             AND %s
-                          AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW())) 
-                          AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''
-                        ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
+        totals = self._get_monthly_totals(post, 'this_year', ('income',))
+        record = totals.get('income', {'debit': None, 'credit': None})
+        return [{'debit': record['debit'], 'credit': record['credit']}]
 
     # function to get total income last year
 
     @api.model
     def month_income_last_year(self):
 
+        date_from, date_to = self._get_dashboard_period('last_year')
         self._cr.execute(''' select sum(debit) as debit, sum(credit) as credit from  account_account, account_move_line where
                             account_move_line.parent_state = 'posted' 
                             AND  account_move_line.account_id = account_account.id AND account_account.internal_group = 'income'
-                            AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW())) - 1
-                         ''')
+                            AND account_move_line.date >= %s AND account_move_line.date < %s
+                         ''', (date_from, date_to))
         record = self._cr.dictfetchall()
         return record
 
@@ -1540,11 +1175,13 @@ class DashBoard(models.Model):
     @api.model
     def month_expense(self):
 
+        date_from, date_to = self._get_dashboard_period('this_month')
         self._cr.execute(''' select sum(debit) as debit , sum(credit) as credit from account_move, account_account,account_move_line
-                            where account_move.move_type = 'entry'  AND account_move.state = 'posted' AND   account_move_line.account_id=account_account.id AND
-                             account_account.internal_group='expense' 
-                             AND to_char(DATE(NOW()), 'MM') = to_char(account_move_line.date, 'MM')
-                             ''')
+                            where account_move_line.move_id = account_move.id AND
+                            account_move.move_type = 'entry'  AND account_move.state = 'posted' AND  account_move_line.account_id=account_account.id AND
+                             account_account.internal_group = 'expense'
+                              AND account_move_line.date >= %s AND account_move_line.date < %s
+                              ''', (date_from, date_to))
         record = self._cr.dictfetchall()
         return record
 
@@ -1552,77 +1189,27 @@ class DashBoard(models.Model):
 
     @api.model
     def month_expense_this_month(self, *post):
-
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute((''' select sum(debit) as debit, sum(credit) as credit from  account_account, account_move_line where 
-                        
-                            account_move_line.account_id = account_account.id AND account_account.internal_group = 'expense' AND  
-                            %s                
-                            AND Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW()))
-                            AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) 
-                            AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''
-
-
-                                 ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
+        totals = self._get_monthly_totals(post, 'this_month', ('expense',))
+        record = totals.get('expense', {'debit': None, 'credit': None})
+        return [{'debit': record['debit'], 'credit': record['credit']}]
 
     # function to get total expense this year
 
     @api.model
     def month_expense_this_year(self, *post):
-
-        company_id = self.get_current_company_value()
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute((''' select sum(debit) as debit, sum(credit) as credit from  account_account, account_move_line where
-                        
-                            account_move_line.account_id = account_account.id AND account_account.internal_group = 'expense' AND  
-                            %s                         
-                            AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW())) 
-                            AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''
-
-
-
-                            ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
+        totals = self._get_monthly_totals(post, 'this_year', ('expense',))
+        record = totals.get('expense', {'debit': None, 'credit': None})
+        return [{'debit': record['debit'], 'credit': record['credit']}]
 
     @api.model
     def bank_balance(self, *post):
 
         company_id = self.get_current_company_value()
 
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state = 'posted'"""
-        else:
-            states_arg = """ parent_state in ('posted', 'draft')"""
-
-        self._cr.execute((''' select account_account.name as name, sum(balance) as balance,
-                            min(account_account.id) as id from account_move_line left join
-                            account_account on account_account.id = account_move_line.account_id join
-                            account_account_type on account_account_type.id = account_account.user_type_id
-                            where account_account_type.name = 'Bank and Cash'
-                            AND %s
-                            AND account_move_line.company_id in ''' + str(tuple(company_id)) + '''
-                            group by account_account.name
-                                                   
-                            ''') % (states_arg))
+        states = ('posted', 'draft') if post == ('posted',) else ('posted',)
 
-        record = self._cr.dictfetchall()
+        record = self.env['account.dashboard.bank.balance']._get_balances(
+            company_id, states)
 
         banks = [item['name'] for item in record]
 
@@ -1637,3 +1224,50 @@ class DashBoard(models.Model):
 
         }
         return records
+
+
+class DashBoardMoveLine(models.Model):
+    _inherit = 'account.move.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(DashBoardMoveLine, self).create(vals_list)
+        self.env['account.move']._invalidate_dashboard_cache(
+            lines.company_id.ids)
+        return lines
+
+    def write(self, vals):
+        if any(field in vals for field in DASHBOARD_CACHE_LINE_FIELDS):
+            self.env['account.move']._invalidate_dashboard_cache(
+                self.company_id.ids)
+            res = super(DashBoardMoveLine, self).write(vals)
+            self.env['account.move']._invalidate_dashboard_cache(
+                self.company_id.ids)
+            return res
+        return super(DashBoardMoveLine, self).write(vals)
+
+    def unlink(self):
+        self.env['account.move']._invalidate_dashboard_cache(
+            self.company_id.ids)
+        # a deleted item leaves no write date for the snapshot check
+        self.env['account.dashboard.snapshot'].sudo()._invalidate_companies(
+            self.company_id.ids)
+        return super(DashBoardMoveLine, self).unlink()
+
+
+class DashBoardPartialReconcile(models.Model):
+    _inherit = 'account.partial.reconcile'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super(DashBoardPartialReconcile, self).create(vals_list)
+        self.env['account.move']._invalidate_dashboard_cache(
+            partials.company_id.ids)
+        return partials
+
+    def unlink(self):
+        self.env['account.move']._invalidate_dashboard_cache(
+            self.company_id.ids)
+        self.env['account.dashboard.snapshot'].sudo()._invalidate_companies(
+            self.company_id.ids)
+        return super(DashBoardPartialReconcile, self).unlink()
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import logging
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# journal item fields changing the balance of an account on a date
+LINE_FIELDS = ['debit', 'credit', 'amount_currency', 'account_id', 'date',
+               'parent_state']
+# journal entry fields propagated to the stored fields of its items
+MOVE_FIELDS = ['state', 'date']
+# journal item states with a snapshot
+SNAPSHOT_STATES = ('posted', 'draft')
+# first key of the advisory locks of the snapshots of an account
+SNAPSHOT_LOCK = 739412
+
+
+class AccountDashboardBankBalance(models.Model):
+    """Closing balance of the bank and cash accounts at the end of every day.
+
+    The balance at a date is the last snapshot before it plus the items
+    posted since the snapshot. Changing an item dated on or before a
+    snapshot deletes the snapshots of its account from that date on, the
+    daily rollforward recreates them.
+    """
+    _name = 'account.dashboard.bank.balance'
+    _description = 'Dashboard Bank Balance Snapshot'
+    _log_access = False
+    _order = 'date desc'
+
+    company_id = fields.Many2one('res.company', string='Company',
+                                 required=True, index=True)
+    account_id = fields.Many2one('account.account', string='Account',
+                                 required=True, index=True)
+    parent_state = fields.Char(string='Status', required=True)
+    date = fields.Date(string='Date', required=True, index=True)
+    balance = fields.Float(string='Balance', digits='Account')
+
+    def init(self):
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_move_line_account_date_index
+            ON account_move_line (account_id, date)
+        """)
+
+    def _lock_account(self, account_id):
+        """Take the lock of the snapshots of an account until the end of the
+        transaction. The writers of items share it, they only wait for a
+        running rollforward of the account, which takes it exclusively."""
+        self._cr.execute("SELECT pg_advisory_xact_lock_shared(%s, %s)",
+                         (SNAPSHOT_LOCK, account_id))
+
+    def _get_liquidity_accounts(self):
+        return self.env['account.account'].search([
+            ('user_type_id.name', '=', 'Bank and Cash')])
+
+    @api.model
+    def _cron_rollforward(self):
+        """Add the missing snapshots up to yesterday."""
+        date_to = fields.Date.context_today(self) - relativedelta(days=1)
+        for account in self._get_liquidity_accounts():
+            # wait for the writers of the items of the account, then read
+            # them in a new transaction: the session lock outlives the
+            # commit, the snapshot of a transaction is taken at its first
+            # query
+            self._cr.execute("SELECT pg_advisory_lock(%s, %s)",
+                             (SNAPSHOT_LOCK, account.id))
+            try:
+                self.env.cr.commit()
+                for state in SNAPSHOT_STATES:
+                    self._check_last_snapshot(account, state)
+                    self._rollforward(account, state, date_to)
+                self.env.cr.commit()
+            except Exception:
+                self.env.cr.rollback()
+                raise
+            finally:
+                self._cr.execute("SELECT pg_advisory_unlock(%s, %s)",
+                                 (SNAPSHOT_LOCK, account.id))
+
+    def _check_last_snapshot(self, account, state):
+        """Drop the snapshots of the account if the last one does not match
+        its items, e.g. an item written by a transaction started before the
+        previous rollforward: every snapshot is a running total, a wrong one
+        makes the last one wrong too."""
+        self._cr.execute("""
+            SELECT snapshot.date FROM (
+                SELECT date, balance FROM account_dashboard_bank_balance
+                WHERE account_id = %(account_id)s
+                AND parent_state = %(state)s
+                ORDER BY date DESC LIMIT 1
+            ) snapshot
+            WHERE ROUND(snapshot.balance::numeric, 6) != ROUND(COALESCE((
+                SELECT SUM(balance) FROM account_move_line
+                WHERE account_id = %(account_id)s
+                AND parent_state = %(state)s
+                AND date <= snapshot.date
+            ), 0)::numeric, 6)
+        """, {'account_id': account.id, 'state': state})
+        if self._cr.fetchone():
+            _logger.warning("Bank balance snapshots of account %s (%s) did "
+                            "not match its items and are recomputed",
+                            account.id, state)
+            self._cr.execute("""
+                DELETE FROM account_dashboard_bank_balance
+                WHERE account_id = %s AND parent_state = %s
+            """, (account.id, state))
+
+    def _rollforward(self, account, state, date_to):
+        self._cr.execute("""
+            SELECT date, balance FROM account_dashboard_bank_balance
+            WHERE account_id = %s AND parent_state = %s
+            ORDER BY date DESC LIMIT 1
+        """, (account.id, state))
+        last = self._cr.fetchone()
+        if last:
+            date_from, balance = last[0] + relativedelta(days=1), last[1]
+        else:
+            self._cr.execute("""
+                SELECT MIN(date) FROM account_move_line
+                WHERE account_id = %s AND parent_state = %s
+            """, (account.id, state))
+            date_from, balance = self._cr.fetchone()[0], 0.0
+        if not date_from or date_from > date_to:
+            return
+        # running total of the daily movements
+        self._cr.execute("""
+            INSERT INTO account_dashboard_bank_balance
+                (company_id, account_id, parent_state, date, balance)
+            SELECT %(company_id)s, %(account_id)s, %(state)s, day::date,
+                   %(balance)s + SUM(COALESCE(moves.balance, 0))
+                       OVER (ORDER BY day)
+            FROM generate_series(%(date_from)s::date, %(date_to)s::date,
+                                 interval '1 day') day
+            LEFT JOIN (
+                SELECT date, SUM(balance) AS balance
+                FROM account_move_line
+                WHERE account_id = %(account_id)s
+                AND parent_state = %(state)s
+                AND date >= %(date_from)s AND date <= %(date_to)s
+                GROUP BY date
+            ) moves ON moves.date = day::date
+        """, {
+            'company_id': account.company_id.id,
+            'account_id': account.id,
+            'state': state,
+            'balance': balance,
+            'date_from': date_from,
+            'date_to': date_to,
+        })
+
+    @api.model
+    def _invalidate_lines(self, lines):
+        """Delete the snapshots the journal items are part of."""
+        if not lines.ids:
+            return
+        self.env['account.move.line'].flush(LINE_FIELDS + ['balance'], lines)
+        # snapshots stop at yesterday, the items of today cannot race with
+        # the rollforward
+        self._cr.execute("""
+            SELECT DISTINCT line.account_id
+            FROM account_move_line line
+            JOIN account_account account ON account.id = line.account_id
+            JOIN account_account_type account_type
+                ON account_type.id = account.user_type_id
+            WHERE line.id IN %s AND line.date < %s
+            AND account_type.name = 'Bank and Cash'
+        """, (tuple(lines.ids), fields.Date.context_today(self)))
+        for account_id, in sorted(self._cr.fetchall()):
+            self._lock_account(account_id)
+        self._cr.execute("""
+            DELETE FROM account_dashboard_bank_balance snapshot
+            USING (
+                SELECT account_id, MIN(date) AS date FROM account_move_line
+                WHERE id IN %s GROUP BY account_id
+            ) line
+            WHERE snapshot.account_id = line.account_id
+            AND snapshot.date >= line.date
+        """, (tuple(lines.ids),))
+
+    @api.model
+    def _get_balances(self, company_ids, states, date=None):
+        """Balance of the bank and cash accounts at the end of the date,
+        or including every item if no date is given."""
+        self._cr.execute("""
+            WITH accounts AS (
+                SELECT account_account.id, account_account.name
+                FROM account_account
+                JOIN account_account_type
+                    ON account_account_type.id = account_account.user_type_id
+                WHERE account_account_type.name = 'Bank and Cash'
+                AND account_account.company_id IN %(company_ids)s
+            ), snapshots AS (
+                SELECT DISTINCT ON (account_id, parent_state)
+                       account_id, parent_state, date, balance
+                FROM account_dashboard_bank_balance
+                WHERE account_id IN (SELECT id FROM accounts)
+                AND parent_state IN %(states)s
+                AND (%(date)s::date IS NULL OR date <= %(date)s)
+                ORDER BY account_id, parent_state, date DESC
+            )
+            SELECT accounts.name AS name, SUM(total.balance) AS balance,
+                   MIN(accounts.id) AS id
+            FROM (
+                SELECT account_id, balance FROM snapshots
+                UNION ALL
+                SELECT line.account_id, line.balance
+                FROM account_move_line line
+                LEFT JOIN snapshots
+                    ON snapshots.account_id = line.account_id
+                    AND snapshots.parent_state = line.parent_state
+                WHERE line.account_id IN (SELECT id FROM accounts)
+                AND line.parent_state IN %(states)s
+                AND line.company_id IN %(company_ids)s
+                AND (snapshots.date IS NULL OR line.date > snapshots.date)
+                AND (%(date)s::date IS NULL OR line.date <= %(date)s)
+            ) total
+            JOIN accounts ON accounts.id = total.account_id
+            GROUP BY accounts.name
+        """, {
+            'company_ids': tuple(company_ids),
+            'states': tuple(states),
+            'date': date,
+        })
+        return self._cr.dictfetchall()
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def write(self, vals):
+        if not any(field in vals for field in MOVE_FIELDS):
+            return super(AccountMove, self).write(vals)
+        snapshots = self.env['account.dashboard.bank.balance']
+        snapshots._invalidate_lines(self.line_ids)
+        res = super(AccountMove, self).write(vals)
+        snapshots._invalidate_lines(self.line_ids)
+        return res
+
+
+class AccountMoveLine(models.Model):
+    _inherit = 'account.move.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(AccountMoveLine, self).create(vals_list)
+        self.env['account.dashboard.bank.balance']._invalidate_lines(lines)
+        return lines
+
+    def write(self, vals):
+        if not any(field in vals for field in LINE_FIELDS):
+            return super(AccountMoveLine, self).write(vals)
+        snapshots = self.env['account.dashboard.bank.balance']
+        snapshots._invalidate_lines(self)
+        res = super(AccountMoveLine, self).write(vals)
+        snapshots._invalidate_lines(self)
+        return res
+
+    def unlink(self):
+        self.env['account.dashboard.bank.balance']._invalidate_lines(self)
+        return super(AccountMoveLine, self).unlink()
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import copy
+from collections import defaultdict
+from contextlib import contextmanager
+
+from odoo import api, fields, models
+
+# journal item fields whose change moves an amount between aggregate rows
+LINE_FIELDS = ['debit', 'credit', 'balance', 'account_id', 'date',
+               'company_id', 'parent_state']
+# journal entry fields propagated to the stored fields of its items
+MOVE_FIELDS = ['state', 'date', 'company_id']
+# bus notification sent to the dashboards when the totals change
+DASHBOARD_NOTIFICATION = 'account_dashboard/delta'
+# changes of the transaction queued for the dashboards
+NOTIFICATION_DATA = ['account_dashboard_deltas',
+                     'account_dashboard_unreconciled']
+
+
+@contextmanager
+def dashboard_savepoint(cr):
+    """Savepoint also rolling back the dashboard notifications queued
+    inside of it, for the callers committing after a failed savepoint."""
+    data = cr.precommit.data
+    saved = {name: copy.deepcopy(data[name])
+             for name in NOTIFICATION_DATA if name in data}
+    try:
+        with cr.savepoint():
+            yield
+    except Exception:
+        for name in NOTIFICATION_DATA:
+            if name in data:
+                data[name].clear()
+                data[name].update(saved.get(name, {}))
+        raise
+
+
+class AccountDashboardMonthly(models.Model):
+    """Monthly debit/credit totals of the income and expense accounts.
+
+    Rows are only ever inserted: every change of a journal item adds a
+    delta row, so concurrent postings never update the same row. The
+    deltas are merged back to one row per key by the daily compaction.
+    """
+    _name = 'account.dashboard.monthly'
+    _description = 'Dashboard Monthly Profit and Loss'
+    _log_access = False
+
+    company_id = fields.Many2one('res.company', string='Company',
+                                 required=True, index=True)
+    internal_group = fields.Char(string='Internal Group', required=True)
+    parent_state = fields.Char(string='Status', required=True)
+    month = fields.Date(string='Month', required=True, index=True)
+    debit = fields.Float(string='Debit', digits='Account')
+    credit = fields.Float(string='Credit', digits='Account')
+
+    def init(self):
+        self._cr.execute("SELECT 1 FROM account_dashboard_monthly LIMIT 1")
+        if not self._cr.fetchone():
+            self._rebuild()
+
+    def _select_lines_query(self, where):
+        return """
+            SELECT line.company_id, account.internal_group,
+                   line.parent_state,
+                   date_trunc('month', line.date)::date AS month,
+                   %(sign)s * SUM(line.debit), %(sign)s * SUM(line.credit)
+            FROM account_move_line line
+            JOIN account_account account ON account.id = line.account_id
+            WHERE account.internal_group IN ('income', 'expense')
+            AND line.parent_state IN ('posted', 'draft')
+            AND """ + where + """
+            GROUP BY line.company_id, account.internal_group,
+                     line.parent_state, month
+        """
+
+    @api.model
+    def _add_lines(self, lines, sign):
+        """Add (sign=1) or remove (sign=-1) the amounts of journal items."""
+        if not lines.ids:
+            return
+        self.env['account.move.line'].flush(LINE_FIELDS, lines)
+        self._notify_lines(lines, sign)
+        self._cr.execute("""
+            INSERT INTO account_dashboard_monthly
+                (company_id, internal_group, parent_state, month, debit, credit)
+        """ + self._select_lines_query("line.id IN %(ids)s"),
+                         {'sign': sign, 'ids': tuple(lines.ids)})
+
+    @api.model
+    def _read_lines(self, lines):
+        """Amounts of the journal items counted in the totals, per item."""
+        if not lines.ids:
+            return {}
+        self.env['account.move.line'].flush(LINE_FIELDS, lines)
+        self._cr.execute("""
+            SELECT line.id, line.company_id, account.internal_group,
+                   line.parent_state, line.date, line.debit, line.credit
+            FROM account_move_line line
+            JOIN account_account account ON account.id = line.account_id
+            WHERE account.internal_group IN ('income', 'expense')
+            AND line.parent_state IN ('posted', 'draft')
+            AND line.id IN %s
+        """, (tuple(lines.ids),))
+        return {row[0]: row[1:] for row in self._cr.fetchall()}
+
+    @api.model
+    def _add_changes(self, before, after):
+        """Add the differences between two readings of the journal items,
+        for the items whose amounts changed only."""
+        deltas = self._get_notification_data('account_dashboard_deltas')
+        rows = defaultdict(lambda: [0.0, 0.0])
+        for line_id in set(before) | set(after):
+            if before.get(line_id) == after.get(line_id):
+                continue
+            for values, sign in ((before.get(line_id), -1),
+                                 (after.get(line_id), 1)):
+                if not values:
+                    continue
+                company_id, group, state, date, debit, credit = values
+                for delta in (deltas[(company_id, group, state, date)],
+                              rows[(company_id, group, state,
+                                    date.replace(day=1))]):
+                    delta[0] += sign * debit
+                    delta[1] += sign * credit
+        for (company_id, group, state, month), (debit, credit) in \
+                rows.items():
+            if debit or credit:
+                self._cr.execute("""
+                    INSERT INTO account_dashboard_monthly
+                        (company_id, internal_group, parent_state, month,
+                         debit, credit)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (company_id, group, state, month, debit, credit))
+
+    def _get_notification_data(self, name):
+        """Changes of the transaction to send to the dashboards when it is
+        committed."""
+        data = self._cr.precommit.data
+        if 'account_dashboard_deltas' not in data:
+            data['account_dashboard_deltas'] = defaultdict(
+                lambda: [0.0, 0.0])
+            data['account_dashboard_unreconciled'] = defaultdict(int)
+            self._cr.precommit.add(self._send_notifications)
+        return data[name]
+
+    @api.model
+    def _notify_lines(self, lines, sign):
+        deltas = self._get_notification_data('account_dashboard_deltas')
+        for line in lines:
+            group = line.account_id.internal_group
+            if group in ('income', 'expense') and \
+                    line.parent_state in ('posted', 'draft'):
+                delta = deltas[(line.company_id.id, group, line.parent_state,
+                                line.date)]
+                delta[0] += sign * line.debit
+                delta[1] += sign * line.credit
+
+    @api.model
+    def _notify_unreconciled(self, rows):
+        """Queue the changes of the unreconciled items counts, rows of
+        company, state, month and count."""
+        counts = self._get_notification_data('account_dashboard_unreconciled')
+        for company_id, state, month, count in rows:
+            counts[(company_id, state, month)] += count
+
+    @api.model
+    def _send_notifications(self):
+        """Send the changes of the totals of every company on its channel."""
+        data = self._cr.precommit.data
+        messages = defaultdict(list)
+        deltas = data.pop('account_dashboard_deltas', {})
+        for (company_id, group, state, date), (debit, credit) in \
+                deltas.items():
+            if debit or credit:
+                messages[company_id].append({
+                    'internal_group': group,
+                    'parent_state': state,
+                    'date': fields.Date.to_string(date),
+                    'debit': debit,
+                    'credit': credit,
+                })
+        counts = data.pop('account_dashboard_unreconciled', {})
+        for (company_id, state, date), count in counts.items():
+            if count:
+                messages[company_id].append({
+                    'internal_group': 'unreconciled',
+                    'parent_state': state,
+                    'date': fields.Date.to_string(date),
+                    'count': count,
+                })
+        if not messages:
+            return
+        # only the accounting users of a company receive its changes, on
+        # the private channel of their partner
+        users = self.env['res.users'].sudo().search([
+            ('share', '=', False),
+            ('groups_id', 'in',
+             self.env.ref('account.group_account_user').id),
+            ('company_ids', 'in', list(messages)),
+        ])
+        notifications = []
+        for user in users:
+            for company_id in set(user.company_ids.ids) & set(messages):
+                notifications.append((
+                    user.partner_id, DASHBOARD_NOTIFICATION,
+                    {'company_id': company_id,
+                     'deltas': messages[company_id]}))
+        self.env['bus.bus'].sudo()._sendmany(notifications)
+
+    @api.model
+    def _rebuild(self):
+        """Regenerate the whole table from the journal items."""
+        self._cr.execute("DELETE FROM account_dashboard_monthly")
+        self._cr.execute("""
+            INSERT INTO account_dashboard_monthly
+                (company_id, internal_group, parent_state, month, debit, credit)
+        """ + self._select_lines_query("TRUE"), {'sign': 1})
+        self.invalidate_cache()
+        return True
+
+    @api.model
+    def _cron_compact(self):
+        """Merge the delta rows to a single row per key."""
+        self._cr.execute("""
+            WITH deltas AS (
+                DELETE FROM account_dashboard_monthly RETURNING *
+            )
+            INSERT INTO account_dashboard_monthly
+                (company_id, internal_group, parent_state, month, debit, credit)
+            SELECT company_id, internal_group, parent_state, month,
+                   SUM(debit), SUM(credit)
+            FROM deltas
+            GROUP BY company_id, internal_group, parent_state, month
+            HAVING SUM(debit) != 0 OR SUM(credit) != 0
+        """)
+        self.invalidate_cache()
+
+    @api.model
+    def _get_totals(self, company_ids, states, date_from, date_to,
+                    groups=('income', 'expense')):
+        """Sum of debit and credit per internal group on [date_from, date_to)."""
+        self._cr.execute("""
+            SELECT internal_group, SUM(debit) AS debit, SUM(credit) AS credit
+            FROM account_dashboard_monthly
+            WHERE company_id IN %s AND parent_state IN %s
+            AND internal_group IN %s AND month >= %s AND month < %s
+            GROUP BY internal_group
+        """, (tuple(company_ids), tuple(states), tuple(groups),
+              date_from, date_to))
+        return {row['internal_group']: row for row in self._cr.dictfetchall()}
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def write(self, vals):
+        if self.env.context.get('skip_dashboard_monthly') or \
+                not any(field in vals for field in MOVE_FIELDS):
+            return super(AccountMove, self).write(vals)
+        # the items written by an enclosing write of items are counted by it
+        tracked = self.env.context.get('dashboard_monthly_line_ids', ())
+        monthly = self.env['account.dashboard.monthly']
+        monthly._add_lines(self.line_ids.filtered(
+            lambda line: line.id not in tracked), -1)
+        res = super(AccountMove, self.with_context(
+            skip_dashboard_monthly=True)).write(vals)
+        monthly._add_lines(self.line_ids.filtered(
+            lambda line: line.id not in tracked), 1)
+        return res
+
+
+class AccountMoveLine(models.Model):
+    _inherit = 'account.move.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(AccountMoveLine, self).create(vals_list)
+        if not self.env.context.get('skip_dashboard_monthly'):
+            self.env['account.dashboard.monthly']._add_lines(lines, 1)
+        return lines
+
+    def write(self, vals):
+        if self.env.context.get('skip_dashboard_monthly') or \
+                not any(field in vals for field in LINE_FIELDS):
+            return super(AccountMoveLine, self).write(vals)
+        # the other items of the entry rebalanced by the write go through
+        # their own write, the items already written by an enclosing write
+        # are counted by it
+        tracked = self.env.context.get('dashboard_monthly_line_ids',
+                                       frozenset())
+        lines = self.filtered(lambda line: line.id not in tracked)
+        monthly = self.env['account.dashboard.monthly']
+        before = monthly._read_lines(lines)
+        res = super(AccountMoveLine, self.with_context(
+            dashboard_monthly_line_ids=tracked | frozenset(lines.ids))
+        ).write(vals)
+        monthly._add_changes(before, monthly._read_lines(lines.exists()))
+        return res
+
+    def unlink(self):
+        if not self.env.context.get('skip_dashboard_monthly'):
+            tracked = self.env.context.get('dashboard_monthly_line_ids', ())
+            self.env['account.dashboard.monthly']._add_lines(self.filtered(
+                lambda line: line.id not in tracked), -1)
+        return super(AccountMoveLine, self).unlink()
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import json
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools import date_utils
+
+from .account_dashboard import DASHBOARD_ALL_COMPANY_TILES, \
+    DASHBOARD_LANG_TILES, DASHBOARD_TILES
+
+_logger = logging.getLogger(__name__)
+
+# values of the posted entries toggle of the dashboard
+SNAPSHOT_STATES = {'posted': 'posted', 'all': False}
+# transactions started that long before the scheduled action are assumed
+# to be committed before it reads the journal items
+SNAPSHOT_MARGIN = timedelta(minutes=10)
+
+
+class AccountDashboardSnapshot(models.Model):
+    """Dashboard tiles precomputed by a scheduled action.
+
+    A snapshot is used as long as no journal entry, journal item or
+    reconciliation of its companies was modified after it was computed.
+    Deleted items and reconciliations leave no write date behind, their
+    deletion drops the snapshots of their companies. The tiles reading
+    every company are not precomputed, a change in a company outside of the
+    selection would not be noticed.
+    """
+    _name = 'account.dashboard.snapshot'
+    _description = 'Dashboard Snapshot'
+    _log_access = False
+
+    company_key = fields.Char(string='Companies', required=True, index=True,
+                              help="Sorted ids of the selected companies")
+    state = fields.Selection([('posted', 'Posted Entries'),
+                              ('all', 'All Entries')],
+                             string='Entries', required=True)
+    date = fields.Date(string='Date', required=True,
+                       help="Day the periods of the tiles are based on")
+    computed_at = fields.Datetime(
+        string='Computed On', required=True,
+        help="Start of the transaction the tiles were computed in, less a "
+             "margin: the write date of an item is the start of the "
+             "transaction writing it")
+    values = fields.Text(string='Values', required=True)
+
+    def _get_company_key(self, company_ids):
+        return ','.join(str(company_id) for company_id in sorted(company_ids))
+
+    def _get_company_sets(self):
+        """Company selections to precompute: every company on its own and
+        the combinations of the ``base_accounting_kit.dashboard_company_sets``
+        parameter, e.g. ``1,2;1,3``."""
+        companies = self.env['res.company']
+        company_sets = [companies._complete_report_company_ids(company.ids)
+                        for company in companies.search([])]
+        param = self.env['ir.config_parameter'].sudo().get_param(
+            'base_accounting_kit.dashboard_company_sets', '')
+        for company_set in param.split(';'):
+            company_ids = [int(company_id) for company_id in
+                           company_set.split(',') if company_id.strip()]
+            if company_ids:
+                # same ids as the selection of the web client
+                company_sets.append(
+                    companies._complete_report_company_ids(company_ids))
+        return company_sets
+
+    @api.model
+    def _cron_prewarm(self):
+        """Compute the dashboard tiles of every company selection."""
+        moves = self.env['account.move']
+        today = fields.Date.context_today(self)
+        for company_ids in self._get_company_sets():
+            # every selection is computed in its own transaction
+            self._cr.execute("SELECT now() AT TIME ZONE 'UTC'")
+            computed_at = self._cr.fetchone()[0] - SNAPSHOT_MARGIN
+            company_moves = moves.with_context(dashboard_company_ids=company_ids)
+            for state, post in SNAPSHOT_STATES.items():
+                values = {
+                    tile: company_moves._compute_dashboard_tile(tile, post)
+                    for tile in DASHBOARD_TILES
+                    if tile not in DASHBOARD_LANG_TILES
+                    and tile not in DASHBOARD_ALL_COMPANY_TILES
+                }
+                key = self._get_company_key(company_ids)
+                self.search([('company_key', '=', key),
+                             ('state', '=', state)]).unlink()
+                self.create({
+                    'company_key': key,
+                    'state': state,
+                    'date': today,
+                    'computed_at': computed_at,
+                    'values': json.dumps(values,
+                                         default=date_utils.json_default),
+                })
+            # release the locks of the snapshot rows between selections
+            self.env.cr.commit()
+            _logger.info("Dashboard snapshot computed for companies %s",
+                         company_ids)
+
+    @api.model
+    def _invalidate_companies(self, company_ids):
+        """Drop the snapshots of the selections including the companies."""
+        if not company_ids:
+            return
+        self._cr.execute("""
+            DELETE FROM account_dashboard_snapshot
+            WHERE string_to_array(company_key, ',')::int[] && %s::int[]
+        """, (list(company_ids),))
+
+    @api.model
+    def _get_snapshot(self, company_ids, post):
+        """Return the tiles of the selection and the time they were computed
+        at, or ``({}, False)`` when there is no up to date snapshot."""
+        state = 'posted' if post == 'posted' else 'all'
+        snapshot = self.search([
+            ('company_key', '=', self._get_company_key(company_ids)),
+            ('state', '=', state),
+            ('date', '=', fields.Date.context_today(self)),
+        ], limit=1)
+        if not snapshot:
+            return {}, False
+        self._cr.execute("""
+            SELECT 1 FROM unnest(%(company_ids)s) AS company(id)
+            WHERE EXISTS (
+                SELECT 1 FROM account_move
+                WHERE account_move.company_id = company.id
+                AND account_move.write_date > %(computed_at)s
+            ) OR EXISTS (
+                SELECT 1 FROM account_move_line
+                WHERE account_move_line.company_id = company.id
+                AND account_move_line.write_date > %(computed_at)s
+            ) OR EXISTS (
+                SELECT 1 FROM account_partial_reconcile
+                WHERE account_partial_reconcile.company_id = company.id
+                AND account_partial_reconcile.write_date > %(computed_at)s
+            )
+        """, {
+            'company_ids': list(company_ids),
+            'computed_at': snapshot.computed_at,
+        })
+        if self._cr.fetchone():
+            return {}, False
+        return json.loads(snapshot.values), snapshot.computed_at
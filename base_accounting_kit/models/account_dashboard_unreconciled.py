@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import logging
+from collections import defaultdict
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# journal item fields deciding whether and where an item is counted
+LINE_FIELDS = ['debit', 'credit', 'balance', 'account_id', 'date',
+               'company_id', 'parent_state', 'full_reconcile_id']
+# journal entry fields propagated to the stored fields of its items
+MOVE_FIELDS = ['state', 'date', 'company_id']
+
+
+class AccountDashboardUnreconciled(models.Model):
+    """Number of unreconciled items of the reconcilable accounts per month.
+
+    Like the monthly profit and loss totals, rows are only ever inserted
+    and merged back by the daily consistency check.
+    """
+    _name = 'account.dashboard.unreconciled'
+    _description = 'Dashboard Unreconciled Items'
+    _log_access = False
+
+    company_id = fields.Many2one('res.company', string='Company',
+                                 required=True, index=True)
+    account_id = fields.Many2one('account.account', string='Account',
+                                 required=True)
+    parent_state = fields.Char(string='Status', required=True)
+    month = fields.Date(string='Month', required=True, index=True)
+    count = fields.Integer(string='Count')
+
+    def init(self):
+        self._cr.execute("SELECT 1 FROM account_dashboard_unreconciled LIMIT 1")
+        if not self._cr.fetchone():
+            self._rebuild()
+
+    def _select_lines_query(self, where):
+        return """
+            SELECT line.company_id, line.account_id, line.parent_state,
+                   date_trunc('month', line.date)::date AS month,
+                   %(sign)s * COUNT(*)
+            FROM account_move_line line
+            JOIN account_account account ON account.id = line.account_id
+            WHERE account.reconcile IS TRUE
+            AND line.full_reconcile_id IS NULL AND line.balance != 0
+            AND """ + where + """
+            GROUP BY line.company_id, line.account_id, line.parent_state,
+                     month
+        """
+
+    @api.model
+    def _add_lines(self, lines, sign):
+        """Count (sign=1) or uncount (sign=-1) the unreconciled items among
+        the journal items."""
+        if not lines.ids:
+            return
+        self.env['account.move.line'].flush(LINE_FIELDS, lines)
+        self._cr.execute("""
+            INSERT INTO account_dashboard_unreconciled
+                (company_id, account_id, parent_state, month, count)
+        """ + self._select_lines_query("line.id IN %(ids)s") + """
+            RETURNING company_id, parent_state, month, count
+        """, {'sign': sign, 'ids': tuple(lines.ids)})
+        self.env['account.dashboard.monthly']._notify_unreconciled(
+            self._cr.fetchall())
+
+    @api.model
+    def _read_lines(self, lines):
+        """Counter of the unreconciled items among the journal items, per
+        item."""
+        if not lines.ids:
+            return {}
+        self.env['account.move.line'].flush(LINE_FIELDS, lines)
+        self._cr.execute("""
+            SELECT line.id, line.company_id, line.account_id,
+                   line.parent_state,
+                   date_trunc('month', line.date)::date AS month
+            FROM account_move_line line
+            JOIN account_account account ON account.id = line.account_id
+            WHERE account.reconcile IS TRUE
+            AND line.full_reconcile_id IS NULL AND line.balance != 0
+            AND line.id IN %s
+        """, (tuple(lines.ids),))
+        return {row[0]: row[1:] for row in self._cr.fetchall()}
+
+    @api.model
+    def _add_changes(self, before, after):
+        """Add the differences between two readings of the journal items,
+        for the items whose counter changed only."""
+        counts = defaultdict(int)
+        for line_id in set(before) | set(after):
+            if before.get(line_id) == after.get(line_id):
+                continue
+            if line_id in before:
+                counts[before[line_id]] -= 1
+            if line_id in after:
+                counts[after[line_id]] += 1
+        rows = []
+        for (company_id, account_id, state, month), count in counts.items():
+            if count:
+                self._cr.execute("""
+                    INSERT INTO account_dashboard_unreconciled
+                        (company_id, account_id, parent_state, month, count)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (company_id, account_id, state, month, count))
+                rows.append((company_id, state, month, count))
+        self.env['account.dashboard.monthly']._notify_unreconciled(rows)
+
+    @api.model
+    def _rebuild(self, account_ids=None):
+        """Regenerate the counters from the journal items, of the given
+        accounts only if any."""
+        where = "line.account_id IN %(account_ids)s" if account_ids \
+            else "TRUE"
+        params = {'sign': 1, 'account_ids': tuple(account_ids or [0])}
+        self._cr.execute("""
+            DELETE FROM account_dashboard_unreconciled
+            WHERE """ + where.replace('line.', ''), params)
+        self._cr.execute("""
+            INSERT INTO account_dashboard_unreconciled
+                (company_id, account_id, parent_state, month, count)
+        """ + self._select_lines_query(where), params)
+        self.invalidate_cache()
+        return True
+
+    @api.model
+    def _cron_check(self):
+        """Compare the counters to the journal items, then regenerate them,
+        which also merges the rows inserted since the last check."""
+        self._cr.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT company_id, account_id, parent_state, month,
+                       SUM(count) AS count
+                FROM account_dashboard_unreconciled
+                GROUP BY company_id, account_id, parent_state, month
+                HAVING SUM(count) != 0
+            ) counter
+            FULL OUTER JOIN (
+        """ + self._select_lines_query("TRUE").replace(
+            "%(sign)s * COUNT(*)", "COUNT(*) AS count") + """
+            ) line USING (company_id, account_id, parent_state, month)
+            WHERE counter.count IS DISTINCT FROM line.count
+        """)
+        mismatches = self._cr.fetchone()[0]
+        if mismatches:
+            _logger.warning("%s dashboard unreconciled item counters were "
+                            "wrong and have been recomputed", mismatches)
+        self._rebuild()
+
+    @api.model
+    def _get_count(self, date_from=None, date_to=None, company_ids=None,
+                   states=None):
+        """Number of unreconciled items on [date_from, date_to)."""
+        where = ["TRUE"]
+        params = []
+        if date_from:
+            where.append("month >= %s AND month < %s")
+            params += [date_from, date_to]
+        if company_ids:
+            where.append("company_id IN %s")
+            params.append(tuple(company_ids))
+        if states:
+            where.append("parent_state IN %s")
+            params.append(tuple(states))
+        self._cr.execute("""
+            SELECT COALESCE(SUM(count), 0) AS count
+            FROM account_dashboard_unreconciled
+            WHERE """ + " AND ".join(where), params)
+        return self._cr.dictfetchall()
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def write(self, vals):
+        if self.env.context.get('skip_dashboard_unreconciled') or \
+                not any(field in vals for field in MOVE_FIELDS):
+            return super(AccountMove, self).write(vals)
+        # the items written by an enclosing write of items are counted by it
+        tracked = self.env.context.get('dashboard_unreconciled_line_ids', ())
+        counter = self.env['account.dashboard.unreconciled']
+        counter._add_lines(self.line_ids.filtered(
+            lambda line: line.id not in tracked), -1)
+        res = super(AccountMove, self.with_context(
+            skip_dashboard_unreconciled=True)).write(vals)
+        counter._add_lines(self.line_ids.filtered(
+            lambda line: line.id not in tracked), 1)
+        return res
+
+
+class AccountMoveLine(models.Model):
+    _inherit = 'account.move.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(AccountMoveLine, self).create(vals_list)
+        if not self.env.context.get('skip_dashboard_unreconciled'):
+            self.env['account.dashboard.unreconciled']._add_lines(lines, 1)
+        return lines
+
+    def write(self, vals):
+        if self.env.context.get('skip_dashboard_unreconciled') or \
+                not any(field in vals for field in LINE_FIELDS):
+            return super(AccountMoveLine, self).write(vals)
+        # the other items of the entry rebalanced by the write go through
+        # their own write, the items already written by an enclosing write
+        # are counted by it
+        tracked = self.env.context.get('dashboard_unreconciled_line_ids',
+                                       frozenset())
+        lines = self.filtered(lambda line: line.id not in tracked)
+        counter = self.env['account.dashboard.unreconciled']
+        before = counter._read_lines(lines)
+        res = super(AccountMoveLine, self.with_context(
+            dashboard_unreconciled_line_ids=tracked | frozenset(lines.ids))
+        ).write(vals)
+        counter._add_changes(before, counter._read_lines(lines.exists()))
+        return res
+
+    def unlink(self):
+        if not self.env.context.get('skip_dashboard_unreconciled'):
+            tracked = self.env.context.get('dashboard_unreconciled_line_ids',
+                                           ())
+            self.env['account.dashboard.unreconciled']._add_lines(
+                self.filtered(lambda line: line.id not in tracked), -1)
+        return super(AccountMoveLine, self).unlink()
+
+
+class AccountFullReconcile(models.Model):
+    _inherit = 'account.full.reconcile'
+
+    def unlink(self):
+        # the items are unreconciled by the database, on delete set null
+        lines = self.reconciled_line_ids
+        res = super(AccountFullReconcile, self).unlink()
+        lines.invalidate_cache(['full_reconcile_id'])
+        tracked = self.env.context.get('dashboard_unreconciled_line_ids', ())
+        self.env['account.dashboard.unreconciled']._add_lines(
+            lines.filtered(lambda line: line.id not in tracked), 1)
+        return res
+
+
+class AccountAccount(models.Model):
+    _inherit = 'account.account'
+
+    def write(self, vals):
+        res = super(AccountAccount, self).write(vals)
+        if 'reconcile' in vals:
+            self.flush(['reconcile'])
+            self.env['account.dashboard.unreconciled']._rebuild(self.ids)
+        return res
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import logging
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+from .account_dashboard_monthly import dashboard_savepoint
+
+_logger = logging.getLogger(__name__)
+
+
+class AccountReconciliationJob(models.Model):
+    """Apply the reconcile models to the open statement lines of a journal
+    in the background.
+
+    The lines are processed by the cron in chunks, in the order of their
+    id, and every chunk is committed with the id of its last line. A job
+    interrupted by a timeout or a restart resumes after that line.
+
+    A running job is only ever written by the cron: cancelling it inserts
+    a request the cron looks for after every chunk.
+    """
+    _name = 'account.reconciliation.job'
+    _description = 'Bank Reconciliation Job'
+    _order = 'id desc'
+
+    name = fields.Char(string='Name', compute='_compute_name')
+    journal_id = fields.Many2one('account.journal', string='Journal',
+                                 required=True,
+                                 domain=[('type', 'in', ('bank', 'cash'))])
+    company_id = fields.Many2one(related='journal_id.company_id', store=True)
+    date_from = fields.Date(string='Start Date')
+    date_to = fields.Date(string='End Date')
+    date_planned = fields.Datetime(
+        string='Planned Date',
+        help="The job is started by the scheduler from this date, e.g. "
+             "overnight. Leave it empty to start as soon as possible.")
+    chunk_size = fields.Integer(string='Lines per Chunk', default=500,
+                                required=True)
+    state = fields.Selection(selection=[('draft', 'Draft'),
+                                        ('queued', 'Queued'),
+                                        ('running', 'Running'),
+                                        ('done', 'Done'),
+                                        ('failed', 'Failed')],
+                             default='draft', string='Status', readonly=True,
+                             copy=False)
+    line_count = fields.Integer(string='Statement Lines', readonly=True,
+                                copy=False)
+    processed_count = fields.Integer(string='Processed Lines', readonly=True,
+                                     copy=False)
+    reconciled_count = fields.Integer(string='Reconciled Lines',
+                                      readonly=True, copy=False)
+    last_st_line_id = fields.Integer(
+        string='Checkpoint', readonly=True, copy=False,
+        help="Id of the last statement line processed, the job resumes "
+             "after it.")
+    progress = fields.Float(string='Progress', compute='_compute_progress')
+    date_start = fields.Datetime(string='Started On', readonly=True,
+                                 copy=False)
+    date_end = fields.Datetime(string='Ended On', readonly=True, copy=False)
+    error = fields.Text(string='Error', readonly=True, copy=False)
+    cancel_ids = fields.One2many('account.reconciliation.job.cancel',
+                                 'job_id', string='Cancel Requests',
+                                 readonly=True, copy=False)
+    cancel_requested = fields.Boolean(
+        string='Cancelling', compute='_compute_cancel_requested',
+        help="The job stops after its current chunk.")
+
+    @api.depends('journal_id', 'date_from', 'date_to')
+    def _compute_name(self):
+        for job in self:
+            job.name = ' - '.join(filter(None, [
+                job.journal_id.name,
+                job.date_from and fields.Date.to_string(job.date_from),
+                job.date_to and fields.Date.to_string(job.date_to),
+            ]))
+
+    @api.depends('line_count', 'processed_count', 'state')
+    def _compute_progress(self):
+        for job in self:
+            if job.state == 'done':
+                job.progress = 100.0
+            elif job.line_count:
+                job.progress = min(
+                    100.0, 100.0 * job.processed_count / job.line_count)
+            else:
+                job.progress = 0.0
+
+    @api.depends('cancel_ids')
+    def _compute_cancel_requested(self):
+        for job in self:
+            job.cancel_requested = bool(job.cancel_ids)
+
+    def _get_statement_line_domain(self):
+        self.ensure_one()
+        domain = [('journal_id', '=', self.journal_id.id),
+                  ('is_reconciled', '=', False),
+                  ('id', '>', self.last_st_line_id)]
+        if self.date_from:
+            domain.append(('date', '>=', self.date_from))
+        if self.date_to:
+            domain.append(('date', '<=', self.date_to))
+        return domain
+
+    def action_queue(self):
+        """Queue the jobs, a failed job resumes from its checkpoint."""
+        for job in self:
+            if job.state not in ('draft', 'failed'):
+                raise UserError(_("Only draft or failed jobs can be queued."))
+            if job.chunk_size < 1:
+                raise UserError(_("A chunk must contain at least one line."))
+            remaining = self.env['account.bank.statement.line'].search_count(
+                job._get_statement_line_domain())
+            job.write({
+                'state': 'queued',
+                'line_count': job.processed_count + remaining,
+                'error': False,
+            })
+        cron = self.env.ref(
+            'base_accounting_kit.account_reconciliation_job_cron')
+        for date_planned in set(self.mapped('date_planned')):
+            cron._trigger(date_planned or None)
+
+    def action_cancel(self):
+        """Stop the jobs, a running job stops after its current chunk and
+        resumes from its checkpoint when queued again."""
+        self.filtered(lambda job: job.state == 'queued').write(
+            {'state': 'draft'})
+        # writing the job would conflict with the commit of the chunk
+        self.env['account.reconciliation.job.cancel'].create([
+            {'job_id': job.id} for job in self
+            if job.state == 'running' and not job.cancel_ids
+        ])
+
+    @api.model
+    def _cron_process(self):
+        """Run the queued jobs whose planned date is reached, and resume the
+        ones interrupted while running."""
+        jobs = self.search([
+            ('state', 'in', ('queued', 'running')),
+            '|', ('date_planned', '=', False),
+            ('date_planned', '<=', fields.Datetime.now()),
+        ], order='id')
+        for job in jobs:
+            job._process()
+
+    def _reconcile_statement_lines(self, st_lines):
+        """Apply the reconcile models of the company to the statement lines,
+        the ones matched by an auto-validated model are reconciled.
+
+        :return: number of reconciled statement lines
+        """
+        reconcile_models = self.env['account.reconcile.model'].search([
+            ('rule_type', '!=', 'writeoff_button'),
+            ('company_id', '=', self.company_id.id),
+        ])
+        partner_map = self.env['account.reconciliation.widget'].\
+            _get_bank_statement_line_partners(st_lines)
+        matching = reconcile_models._apply_rules(st_lines,
+                                                 partner_map=partner_map)
+        return len([st_line for st_line in st_lines
+                    if matching[st_line.id].get('status') == 'reconciled'])
+
+    def _process(self):
+        self.ensure_one()
+        # the chunks run in the company of the journal, whatever the
+        # companies of the cron user
+        self = self.with_company(self.company_id)
+        StatementLine = self.env['account.bank.statement.line']
+        self.write({
+            'state': 'running',
+            'date_start': self.date_start or fields.Datetime.now(),
+        })
+        self.env.cr.commit()
+        while True:
+            # the job may have been cancelled since the last chunk
+            self.invalidate_cache(['state', 'cancel_ids'])
+            if self.cancel_ids:
+                self.write({'state': 'draft'})
+                self.cancel_ids.sudo().unlink()
+                self.env.cr.commit()
+            if self.state != 'running':
+                _logger.info("Reconciliation job %s cancelled after "
+                             "statement line %s", self.id,
+                             self.last_st_line_id)
+                return
+            st_lines = StatementLine.search(
+                self._get_statement_line_domain(), order='id',
+                limit=self.chunk_size)
+            if not st_lines:
+                break
+            try:
+                with dashboard_savepoint(self.env.cr):
+                    reconciled_count = self._reconcile_statement_lines(
+                        st_lines)
+            except Exception as e:
+                _logger.exception("Reconciliation job %s failed after "
+                                  "statement line %s", self.id,
+                                  self.last_st_line_id)
+                self.env.clear()
+                self.write({'state': 'failed', 'error': str(e)})
+                self.cancel_ids.sudo().unlink()
+                self.env.cr.commit()
+                return
+            self.write({
+                'processed_count': self.processed_count + len(st_lines),
+                'reconciled_count': self.reconciled_count + reconciled_count,
+                'last_st_line_id': st_lines[-1].id,
+            })
+            # the checkpoint is saved with the reconciliations of the chunk
+            self.env.cr.commit()
+        self.write({'state': 'done', 'date_end': fields.Datetime.now()})
+        self.cancel_ids.sudo().unlink()
+        self.env.cr.commit()
+
+
+class AccountReconciliationJobCancel(models.Model):
+    """Cancellation of a running job, requested by a user and removed by the
+    cron when it stops the job."""
+    _name = 'account.reconciliation.job.cancel'
+    _description = 'Bank Reconciliation Job Cancel Request'
+
+    job_id = fields.Many2one('account.reconciliation.job', string='Job',
+                             required=True, index=True, ondelete='cascade')
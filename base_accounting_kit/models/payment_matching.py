@@ -19,12 +19,25 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
+import base64
 import copy
+import datetime
+import json
+import logging
+from collections import defaultdict
 
-from odoo import api, fields, models, _
+import psycopg2
+
+from odoo import api, fields, models, tools, _
+from odoo.addons.base.models.res_bank import sanitize_account_number
 from odoo.exceptions import UserError
 from odoo.osv import expression
 from odoo.tools.misc import formatLang, format_date, parse_date
+from odoo.tools.sql import column_exists, create_column
+
+from .account_dashboard_monthly import dashboard_savepoint
+
+_logger = logging.getLogger(__name__)
 
 
 class AccountReconciliation(models.AbstractModel):
@@ -36,7 +49,8 @@ class AccountReconciliation(models.AbstractModel):
     ####################################################
 
     @api.model
-    def process_bank_statement_line(self, st_line_ids, data):
+    def process_bank_statement_line(self, st_line_ids, data, batch=False,
+                                    commit_every=0):
         """Handles data sent from the bank statement reconciliation widget
         (and can otherwise serve as an old-API bridge)
 
@@ -45,33 +59,101 @@ class AccountReconciliation(models.AbstractModel):
             'counterpart_aml_dicts', 'payment_aml_ids' and 'new_aml_dicts',
             whose value is the same as described in process_reconciliation
             except that ids are used instead of recordsets.
+        :param batch: validate all the data first, then create the journal
+            items of all the statement lines at once
+        :param commit_every: in batch mode, commit every that many statement
+            lines; a failing chunk is rolled back alone and its statement
+            lines are returned under 'failed_statement_line_ids'
         :returns dict: used as a hook to add additional keys.
         """
         st_lines = self.env['account.bank.statement.line'].browse(st_line_ids)
-        AccountMoveLine = self.env['account.move.line']
+        if batch:
+            return self._process_bank_statement_line_batch(
+                st_lines, data, commit_every)
         ctx = dict(self._context, force_price_include=False)
 
         processed_moves = self.env['account.move']
         for st_line, datum in zip(st_lines, copy.deepcopy(data)):
-            payment_aml_rec = AccountMoveLine.browse(datum.get('payment_aml_ids', []))
-
-            for aml_dict in datum.get('counterpart_aml_dicts', []):
-                aml_dict['move_line'] = AccountMoveLine.browse(
-                    aml_dict['counterpart_aml_id']
-                )
-                del aml_dict['counterpart_aml_id']
-
+            datum = self._prepare_statement_line_datum(datum)
             if datum.get('partner_id') is not None:
                 st_line.write({'partner_id': datum['partner_id']})
 
             ctx['default_to_check'] = datum.get('to_check')
             moves = st_line.with_context(ctx).process_reconciliation(
-                datum.get('counterpart_aml_dicts', []),
-                payment_aml_rec,
-                datum.get('new_aml_dicts', []))
+                datum['counterpart_aml_dicts'],
+                datum['payment_aml_rec'],
+                datum['new_aml_dicts'])
             processed_moves = (processed_moves | moves)
         return {'moves': processed_moves.ids, 'statement_line_ids': processed_moves.mapped('line_ids.statement_line_id').ids}
 
+    def _prepare_statement_line_datum(self, datum):
+        """Replace the ids of the data of a statement line by recordsets."""
+        AccountMoveLine = self.env['account.move.line']
+        datum['payment_aml_rec'] = AccountMoveLine.browse(
+            datum.get('payment_aml_ids', []))
+        datum.setdefault('counterpart_aml_dicts', [])
+        datum.setdefault('new_aml_dicts', [])
+        for aml_dict in datum['counterpart_aml_dicts']:
+            aml_dict['move_line'] = AccountMoveLine.browse(
+                aml_dict.pop('counterpart_aml_id'))
+        return datum
+
+    def _process_bank_statement_line_batch(self, st_lines, data,
+                                           commit_every=0):
+        """Reconcile many statement lines at once, see
+        process_bank_statement_line."""
+        data = [self._prepare_statement_line_datum(datum)
+                for datum in copy.deepcopy(data)]
+        # check everything before the first write
+        for st_line, datum in zip(st_lines, data):
+            st_line._check_reconciliation_data(datum)
+        ctx = dict(self._context, force_price_include=False)
+        st_lines = st_lines.with_context(ctx)
+
+        # payments are posted and dated one by one, leave them to the
+        # regular process
+        processed_moves = self.env['account.move']
+        batch_lines, batch_data = [], []
+        for st_line, datum in zip(st_lines, data):
+            if datum['payment_aml_rec']:
+                if datum.get('partner_id') is not None:
+                    st_line.write({'partner_id': datum['partner_id']})
+                processed_moves |= st_line.with_context(
+                    default_to_check=datum.get('to_check'),
+                ).process_reconciliation(
+                    datum['counterpart_aml_dicts'],
+                    datum['payment_aml_rec'],
+                    datum['new_aml_dicts'])
+            else:
+                batch_lines.append(st_line.id)
+                batch_data.append(datum)
+
+        failed_lines = self.env['account.bank.statement.line']
+        size = commit_every or len(batch_lines) or 1
+        for index in range(0, len(batch_lines), size):
+            chunk = st_lines.browse(batch_lines[index:index + size])
+            chunk_data = batch_data[index:index + size]
+            if not commit_every:
+                processed_moves |= chunk._process_reconciliation_batch(
+                    chunk_data)
+                continue
+            try:
+                with dashboard_savepoint(self.env.cr):
+                    moves = chunk._process_reconciliation_batch(chunk_data)
+                self.env.cr.commit()
+                processed_moves |= moves
+            except Exception:
+                _logger.exception("Bank statement lines %s could not be "
+                                  "reconciled", chunk.ids)
+                self.env.clear()
+                failed_lines |= chunk
+        return {
+            'moves': processed_moves.ids,
+            'statement_line_ids': processed_moves.mapped(
+                'line_ids.statement_line_id').ids,
+            'failed_statement_line_ids': failed_lines.ids,
+        }
+
     @api.model
     def get_move_lines_for_bank_statement_line(self, st_line_id, partner_id=None, excluded_ids=None, search_str=False, offset=0, limit=None, mode=None):
         """ Returns move lines for the bank statement reconciliation widget,
@@ -84,10 +166,28 @@ class AccountReconciliation(models.AbstractModel):
                 result
             :param search_str: optional search (can be the amout, display_name,
                 partner name, move line name)
-            :param offset: useless but kept in stable to preserve api
+            :param offset: useless but kept in stable to preserve api, see
+                get_move_lines_page_for_bank_statement_line to page the result
             :param limit: number of the result to search
             :param mode: 'rp' for receivable/payable or 'other'
         """
+        return self.get_move_lines_page_for_bank_statement_line(
+            st_line_id, partner_id=partner_id, excluded_ids=excluded_ids,
+            search_str=search_str, limit=limit, mode=mode)['lines']
+
+    @api.model
+    def get_move_lines_page_for_bank_statement_line(self, st_line_id, partner_id=None, excluded_ids=None, search_str=False, limit=None, mode=None, token=False):
+        """ Returns a page of the move lines of
+            get_move_lines_for_bank_statement_line, the items of the same
+            amount as the statement line first, then by due date
+
+            :param token: continuation token of the previous page, False for
+                the first page
+            :returns dict: the move lines formatted as a list of dicts under
+                'lines', the number of move lines of all the pages under
+                'count' and the token of the next page, or False on the last
+                page, under 'token'
+        """
         st_line = self.env['account.bank.statement.line'].browse(st_line_id)
 
         # Blue lines = payment on bank account not assigned to a statement yet
@@ -99,80 +199,190 @@ class AccountReconciliation(models.AbstractModel):
             partner_id = st_line.partner_id.id
 
         domain = self._domain_move_lines_for_reconciliation(st_line, aml_accounts, partner_id, excluded_ids=excluded_ids, search_str=search_str, mode=mode)
-        recs_count = self.env['account.move.line'].search_count(domain)
-
         from_clause, where_clause, where_clause_params = self.env['account.move.line']._where_calc(domain).get_sql()
+        self.env['account.move'].flush()
+        self.env['account.move.line'].flush()
+        self.env['account.bank.statement'].flush()
+
+        # the items whose residual is the amount of the statement line come
+        # first, in the currency of the journal
+        company_currency = st_line.journal_id.company_id.currency_id
+        journal_currency = st_line.journal_id.currency_id or company_currency
+        if journal_currency == company_currency:
+            other_amount = '"account_move_line".amount_residual IS DISTINCT FROM %s::numeric'
+            amount_params = [st_line.amount]
+        else:
+            other_amount = '("account_move_line".currency_id, "account_move_line".amount_residual_currency) IS DISTINCT FROM (%s, %s::numeric)'
+            amount_params = [journal_currency.id, st_line.amount]
+        # the count is taken over all the pages, before the keyset condition
         query_str = '''
-            SELECT "account_move_line".id FROM {from_clause}
-            {where_str}
-            ORDER BY ("account_move_line".debit - "account_move_line".credit) = {amount} DESC,
-                "account_move_line".date_maturity ASC,
-                "account_move_line".id ASC
+            SELECT id, other_amount, maturity, count FROM (
+                SELECT "account_move_line".id,
+                    {other_amount} AS other_amount,
+                    COALESCE("account_move_line".date_maturity, '9999-12-31') AS maturity,
+                    COUNT(*) OVER () AS count
+                FROM {from_clause}
+                {where_str}
+            ) AS candidate
+            {keyset_str}
+            ORDER BY other_amount, maturity, id
             {limit_str}
         '''.format(
+            other_amount=other_amount,
             from_clause=from_clause,
             where_str=where_clause and (" WHERE %s" % where_clause) or '',
-            amount=st_line.amount,
+            keyset_str=token and 'WHERE (other_amount, maturity, id) > (%s, %s::date, %s)' or '',
             limit_str=limit and ' LIMIT %s' or '',
         )
-        params = where_clause_params + (limit and [limit] or [])
-        self.env['account.move'].flush()
-        self.env['account.move.line'].flush()
-        self.env['account.bank.statement'].flush()
+        params = amount_params + where_clause_params
+        if token:
+            params += self._decode_move_lines_token(token)
+        if limit:
+            # one more row tells whether there is a next page
+            params.append(limit + 1)
         self._cr.execute(query_str, params)
         res = self._cr.fetchall()
 
+        next_token = False
+        if limit and len(res) > limit:
+            res = res[:limit]
+            next_token = self._encode_move_lines_token(res[-1][:3])
+        recs_count = res and res[0][3] or 0
         aml_recs = self.env['account.move.line'].browse([i[0] for i in res])
         target_currency = st_line.currency_id or st_line.journal_id.currency_id or st_line.journal_id.company_id.currency_id
-        return self._prepare_move_lines(aml_recs, target_currency=target_currency, target_date=st_line.date, recs_count=recs_count)
+        return {
+            'lines': self._prepare_move_lines(aml_recs, target_currency=target_currency, target_date=st_line.date, recs_count=recs_count),
+            'count': recs_count,
+            'token': next_token,
+        }
+
+    def _encode_move_lines_token(self, key):
+        other_amount, maturity, line_id = key
+        return base64.urlsafe_b64encode(json.dumps(
+            [other_amount, str(maturity), line_id]).encode()).decode()
+
+    def _decode_move_lines_token(self, token):
+        try:
+            other_amount, maturity, line_id = json.loads(
+                base64.urlsafe_b64decode(token.encode()))
+        except (ValueError, TypeError):
+            raise UserError(_("Invalid continuation token."))
+        return [bool(other_amount), maturity, int(line_id)]
 
     @api.model
-    def _get_bank_statement_line_partners(self, st_lines):
-        params = []
-
-        # Add the res.partner.ban's IR rules. In case partners are not shared between companies,
-        # identical bank accounts may exist in a company we don't have access to.
-        ir_rules_query = self.env['res.partner.bank']._where_calc([])
-        self.env['res.partner.bank']._apply_ir_rules(ir_rules_query, 'read')
-        from_clause, where_clause, where_clause_params = ir_rules_query.get_sql()
-        if where_clause:
-            where_bank = ('AND %s' % where_clause).replace('res_partner_bank', 'bank')
-            params += where_clause_params
-        else:
-            where_bank = ''
-
-        # Add the res.partner's IR rules. In case partners are not shared between companies,
-        # identical partners may exist in a company we don't have access to.
-        ir_rules_query = self.env['res.partner']._where_calc([])
-        self.env['res.partner']._apply_ir_rules(ir_rules_query, 'read')
-        from_clause, where_clause, where_clause_params = ir_rules_query.get_sql()
-        if where_clause:
-            where_partner = ('AND %s' % where_clause).replace('res_partner', 'p3')
-            params += where_clause_params
-        else:
-            where_partner = ''
+    def get_open_items_for_statement_lines(self, st_line_ids, tolerance=0.0, limit=5):
+        """ Returns the open journal items whose residual amount is the
+            amount of the statement lines, for a whole statement at once
+
+            :param st_line_ids: ids of the statement lines
+            :param tolerance: maximum difference between the amounts
+            :param limit: number of items per statement line, the closest
+                amounts first
+            :returns dict: ids of the items per statement line id
+        """
+        st_lines = self.env['account.bank.statement.line'].browse(st_line_ids)
+        self.env['account.move'].flush()
+        self.env['account.move.line'].flush()
+        self.env['account.bank.statement.line'].flush()
+        items = self._get_open_items_by_amount(st_lines, tolerance, limit)
+        allowed_ids = set(self.env['account.move.line'].search([
+            ('id', 'in', [aml_id for aml_ids in items.values() for aml_id in aml_ids]),
+        ]).ids)
+        return {st_line_id: [aml_id for aml_id in aml_ids if aml_id in allowed_ids]
+                for st_line_id, aml_ids in items.items()}
 
-        query = '''
-            SELECT
-                st_line.id                          AS id,
-                COALESCE(p1.id,p2.id,p3.id)         AS partner_id
-            FROM account_bank_statement_line st_line
-            JOIN account_move move ON move.id = st_line.move_id
-        '''
-        query += "LEFT JOIN res_partner_bank bank ON bank.id = move.partner_bank_id OR bank.sanitized_acc_number ILIKE regexp_replace(st_line.account_number, '\W+', '', 'g') %s\n" % (where_bank)
-        query += 'LEFT JOIN res_partner p1 ON st_line.partner_id=p1.id \n'
-        query += 'LEFT JOIN res_partner p2 ON bank.partner_id=p2.id \n'
-        # By definition the commercial partner_id doesn't have a parent_id set
-        query += 'LEFT JOIN res_partner p3 ON p3.name ILIKE st_line.partner_name %s AND p3.parent_id is NULL \n' % (where_partner)
-        query += 'WHERE st_line.id IN %s'
+    @api.model
+    def _get_open_items_by_amount(self, st_lines, tolerance=0.0, limit=None):
+        """ Look the open items of the statement line amounts up on the
+            open items index, one query for all the statement lines
 
-        params += [tuple(st_lines.ids)]
+            The amount of a statement line is in the currency of its
+            journal: it is compared to the residual amount in currency of
+            the items when the journal is not in the company currency.
 
-        self._cr.execute(query, params)
+            :returns defaultdict: ids of the items per statement line id
+        """
+        result = defaultdict(list)
+        if not st_lines:
+            return result
+        self._cr.execute("""
+            SELECT st_line.id, line.id
+            FROM account_bank_statement_line st_line
+            JOIN account_move st_move ON st_move.id = st_line.move_id
+            JOIN account_journal journal ON journal.id = st_move.journal_id
+            JOIN res_company company ON company.id = st_move.company_id
+            CROSS JOIN LATERAL (
+                SELECT COALESCE(journal.currency_id, company.currency_id) AS currency_id,
+                       journal.currency_id IS NOT NULL
+                       AND journal.currency_id != company.currency_id AS foreign_currency
+            ) journal_currency
+            CROSS JOIN LATERAL (
+                SELECT candidate.id FROM (
+                    SELECT aml.id, aml.amount_residual AS amount, aml.date_maturity
+                    FROM account_move_line aml
+                    WHERE NOT journal_currency.foreign_currency
+                    AND aml.company_id = st_move.company_id
+                    AND aml.amount_residual BETWEEN st_line.amount - %(tolerance)s
+                                                AND st_line.amount + %(tolerance)s
+                    AND aml.reconciled IS NOT TRUE
+                    AND aml.balance != 0
+                    AND aml.parent_state = 'posted'
+                    AND aml.move_id != st_line.move_id
+                    AND (st_move.partner_id IS NULL
+                         OR aml.partner_id = st_move.partner_id)
+                    UNION ALL
+                    SELECT aml.id, aml.amount_residual_currency AS amount, aml.date_maturity
+                    FROM account_move_line aml
+                    WHERE journal_currency.foreign_currency
+                    AND aml.company_id = st_move.company_id
+                    AND aml.currency_id = journal_currency.currency_id
+                    AND aml.amount_residual_currency BETWEEN st_line.amount - %(tolerance)s
+                                                         AND st_line.amount + %(tolerance)s
+                    AND aml.reconciled IS NOT TRUE
+                    AND aml.balance != 0
+                    AND aml.parent_state = 'posted'
+                    AND aml.move_id != st_line.move_id
+                    AND (st_move.partner_id IS NULL
+                         OR aml.partner_id = st_move.partner_id)
+                ) candidate
+                ORDER BY ABS(candidate.amount - st_line.amount),
+                         candidate.date_maturity, candidate.id
+                LIMIT %(limit)s
+            ) line
+            WHERE st_line.id IN %(st_line_ids)s
+        """, {
+            'st_line_ids': tuple(st_lines.ids),
+            'tolerance': tolerance,
+            'limit': limit,
+        })
+        for st_line_id, aml_id in self._cr.fetchall():
+            result[st_line_id].append(aml_id)
+        return result
 
+    @api.model
+    def _get_bank_statement_line_partners(self, st_lines):
+        """ Returns the partner of every statement line: its own one, else
+            the partner detected from its bank account number or the name of
+            the counterpart, stored on the line when it was imported
+        """
+        detected = st_lines.filtered(lambda line: not line.partner_id).detected_partner_id
+        # In case partners are not shared between companies, the detected
+        # partner may belong to a company we don't have access to.
+        allowed_ids = set(self.env['res.partner'].with_context(active_test=False).search([
+            ('id', 'in', detected.ids),
+        ]).ids)
+        # Detect again the partners of the other lines, under the rules of the
+        # user: their bank account or partner may have been created or
+        # renamed since the import, or have an accessible duplicate.
+        missing = st_lines.filtered(
+            lambda line: not line.partner_id and line.detected_partner_id.id not in allowed_ids)
+        found = missing._find_detected_partners() if missing else {}
         result = {}
-        for res in self._cr.dictfetchall():
-            result[res['id']] = res['partner_id']
+        for line in st_lines:
+            partner_id = line.partner_id.id or line.detected_partner_id.id
+            if not line.partner_id and partner_id not in allowed_ids:
+                partner_id = found[line.id]
+            result[line.id] = partner_id or None
         return result
 
     @api.model
@@ -453,12 +663,18 @@ class AccountReconciliation(models.AbstractModel):
             mode = 'customers' if account_type == 'receivable' else 'suppliers'
 
         # Fetch other data
+        propositions = {}
+        if not aml_ids:
+            propositions = self._get_move_line_reconciliation_propositions([
+                (row['account_id'], is_partner and row['partner_id'] or None)
+                for row in rows
+            ])
         for row in rows:
             account = Account.browse(row['account_id'])
             currency = account.currency_id or account.company_id.currency_id
             row['currency_id'] = currency.id
             partner_id = is_partner and row['partner_id'] or None
-            rec_prop = aml_ids and self.env['account.move.line'].browse(aml_ids) or self._get_move_line_reconciliation_proposition(account.id, partner_id)
+            rec_prop = aml_ids and self.env['account.move.line'].browse(aml_ids) or propositions[(account.id, partner_id)]
             row['reconciliation_proposition'] = self._prepare_move_lines(rec_prop, target_currency=currency)
             row['mode'] = mode
             row['company_id'] = account.company_id.id
@@ -478,12 +694,14 @@ class AccountReconciliation(models.AbstractModel):
         """
 
         Partner = self.env['res.partner']
-        Account = self.env['account.account']
 
+        # the write-offs of all the reconciliations are created at once
+        self._process_move_lines_batch([
+            (datum['mv_line_ids'], datum['new_mv_line_dicts'])
+            for datum in data
+            if len(datum['mv_line_ids']) >= 1 or len(datum['mv_line_ids']) + len(datum['new_mv_line_dicts']) >= 2
+        ])
         for datum in data:
-            if len(datum['mv_line_ids']) >= 1 or len(datum['mv_line_ids']) + len(datum['new_mv_line_dicts']) >= 2:
-                self._process_move_lines(datum['mv_line_ids'], datum['new_mv_line_dicts'])
-
             if datum['type'] == 'partner':
                 partners = Partner.browse(datum['id'])
                 partners.mark_as_reconciled()
@@ -492,7 +710,28 @@ class AccountReconciliation(models.AbstractModel):
     # Private
     ####################################################
 
+    @tools.ormcache()
+    def _has_trigram_search(self):
+        """ Whether the search column of the journal items is indexed,
+            the pg_trgm extension being optional """
+        self._cr.execute("""
+            SELECT 1 FROM pg_indexes
+            WHERE indexname = 'account_move_line_reconciliation_search_index'
+        """)
+        return bool(self._cr.fetchone())
+
     def _str_domain_for_mv_line(self, search_str):
+        if self._has_trigram_search():
+            # account code, entry name, reference, label and partner name of
+            # the open items are searched in a single indexed column; the
+            # due date is only added when the search string is a date, so
+            # the planner can keep using the trigram index
+            domain = [('reconciliation_search', 'ilike', search_str)]
+            date_maturity = self._parse_search_date(search_str)
+            if date_maturity:
+                domain = expression.OR([
+                    domain, [('date_maturity', '=', date_maturity)]])
+            return domain
         return [
             '|', ('account_id.code', 'ilike', search_str),
             '|', ('move_id.name', 'ilike', search_str),
@@ -501,6 +740,18 @@ class AccountReconciliation(models.AbstractModel):
             '&', ('name', '!=', '/'), ('name', 'ilike', search_str)
         ]
 
+    @api.model
+    def _parse_search_date(self, search_str):
+        """ Returns the date typed in the search string in the user
+            language format, or False if it is not a date
+            :param search_str: search string
+        """
+        try:
+            value = parse_date(self.env, search_str)
+        except (ValueError, IndexError, TypeError):
+            return False
+        return isinstance(value, datetime.date) and value
+
     @api.model
     def _domain_move_lines(self, search_str):
         """ Returns the domain from the search_str search
@@ -540,7 +791,7 @@ class AccountReconciliation(models.AbstractModel):
         return str_domain
 
     @api.model
-    def _domain_move_lines_for_reconciliation(self, st_line, aml_accounts, partner_id, excluded_ids=[], search_str=False, mode='rp'):
+    def _domain_move_lines_for_reconciliation(self, st_line, aml_accounts, partner_id, excluded_ids=None, search_str=False, mode='rp'):
         """ Return the domain for account.move.line records which can be used for bank statement reconciliation.
 
             :param aml_accounts:
@@ -552,8 +803,8 @@ class AccountReconciliation(models.AbstractModel):
         AccountMoveLine = self.env['account.move.line']
 
         #Always exclude the journal items that have been marked as 'to be checked' in a former bank statement reconciliation
-        to_check_excluded = AccountMoveLine.search(AccountMoveLine._get_suspense_moves_domain()).ids
-        excluded_ids.extend(to_check_excluded)
+        # (as a subquery, the ids of the items are never loaded)
+        to_check_excluded = AccountMoveLine._search(AccountMoveLine._get_suspense_moves_domain())
 
         domain_reconciliation = [
             '&', '&', '&',
@@ -586,10 +837,11 @@ class AccountReconciliation(models.AbstractModel):
         # Domain factorized for all reconciliation use cases
         if search_str:
             str_domain = self._domain_move_lines(search_str=search_str)
-            str_domain = expression.OR([
-                str_domain,
-                [('partner_id.name', 'ilike', search_str)]
-            ])
+            if not self._has_trigram_search():
+                str_domain = expression.OR([
+                    str_domain,
+                    [('partner_id.name', 'ilike', search_str)]
+                ])
             domain = expression.AND([
                 domain,
                 str_domain
@@ -600,6 +852,7 @@ class AccountReconciliation(models.AbstractModel):
                 [('id', 'not in', excluded_ids)],
                 domain
             ])
+        domain = expression.AND([[('id', 'not in', to_check_excluded)], domain])
         # filter on account.move.line having the same company as the statement line
         domain = expression.AND([domain, [('company_id', '=', st_line.company_id.id)]])
 
@@ -644,40 +897,59 @@ class AccountReconciliation(models.AbstractModel):
             :param target_currency: currency (browse) you want the move line debit/credit converted into
             :param target_date: date to use for the monetary conversion
         """
-        context = dict(self._context or {})
-        ret = []
+        if not move_lines:
+            return []
+        Currency = self.env['res.currency']
+        rows = self._read_move_lines(move_lines)
+        account_names = dict(move_lines.account_id.name_get())
+        journal_names = dict(move_lines.journal_id.name_get())
+        currencies = Currency.browse({row['company_currency_id'] for row in rows})
+        if target_currency:
+            currencies |= target_currency
+
+        # rates of all the currencies, loaded once per company and date
+        rates = {}
+
+        def convert(amount, from_currency, to_currency, company_id, date):
+            if (company_id, date) not in rates:
+                rates[(company_id, date)] = currencies._get_rates(
+                    self.env['res.company'].browse(company_id), date)
+            company_rates = rates[(company_id, date)]
+            return to_currency.round(amount * company_rates[to_currency.id] / company_rates[from_currency.id])
 
-        for line in move_lines:
-            company_currency = line.company_id.currency_id
-            line_currency = (line.currency_id and line.amount_currency) and line.currency_id or company_currency
+        ret = []
+        for line in rows:
+            company_currency = Currency.browse(line['company_currency_id'])
+            line_currency = (line['currency_id'] and line['amount_currency']) and Currency.browse(line['currency_id']) or company_currency
+            move_name = line['move_name']
             ret_line = {
-                'id': line.id,
-                'name': line.name and line.name != '/' and line.move_id.name != line.name and line.move_id.name + ': ' + line.name or line.move_id.name,
-                'ref': line.move_id.ref or '',
+                'id': line['id'],
+                'name': line['name'] and line['name'] != '/' and move_name != line['name'] and move_name + ': ' + line['name'] or move_name,
+                'ref': line['move_ref'] or '',
                 # For reconciliation between statement transactions and already registered payments (eg. checks)
                 # NB : we don't use the 'reconciled' field because the line we're selecting is not the one that gets reconciled
-                'account_id': [line.account_id.id, line.account_id.display_name],
-                'already_paid': line.account_id.internal_type == 'liquidity',
-                'account_code': line.account_id.code,
-                'account_name': line.account_id.name,
-                'account_type': line.account_id.internal_type,
-                'date_maturity': format_date(self.env, line.date_maturity),
-                'date': format_date(self.env, line.date),
-                'journal_id': [line.journal_id.id, line.journal_id.display_name],
-                'partner_id': line.partner_id.id,
-                'partner_name': line.partner_id.name,
+                'account_id': [line['account_id'], account_names[line['account_id']]],
+                'already_paid': line['account_type'] == 'liquidity',
+                'account_code': line['account_code'],
+                'account_name': line['account_name'],
+                'account_type': line['account_type'],
+                'date_maturity': format_date(self.env, line['date_maturity']),
+                'date': format_date(self.env, line['date']),
+                'journal_id': [line['journal_id'], journal_names[line['journal_id']]],
+                'partner_id': line['partner_id'] or False,
+                'partner_name': line['partner_name'] or False,
                 'currency_id': line_currency.id,
             }
 
-            debit = line.debit
-            credit = line.credit
-            amount = line.amount_residual
-            amount_currency = line.amount_residual_currency
+            debit = line['debit']
+            credit = line['credit']
+            amount = line['amount_residual']
+            amount_currency = line['amount_residual_currency']
 
             # For already reconciled lines, don't use amount_residual(_currency)
-            if line.account_id.internal_type == 'liquidity':
+            if line['account_type'] == 'liquidity':
                 amount = debit - credit
-                amount_currency = line.amount_currency
+                amount_currency = line['amount_currency']
 
             target_currency = target_currency or company_currency
 
@@ -702,29 +974,25 @@ class AccountReconciliation(models.AbstractModel):
             # the value of the amount_currency or the debit-credit if no amount currency
             if target_currency == company_currency:
                 if line_currency == target_currency:
-                    amount = amount
                     amount_currency = ""
                     total_amount = debit - credit
                     total_amount_currency = ""
                 else:
-                    amount = amount
-                    amount_currency = amount_currency
                     total_amount = debit - credit
-                    total_amount_currency = line.amount_currency
+                    total_amount_currency = line['amount_currency']
 
             if target_currency != company_currency:
                 if line_currency == target_currency:
                     amount = amount_currency
                     amount_currency = ""
-                    total_amount = line.amount_currency
+                    total_amount = line['amount_currency']
                     total_amount_currency = ""
                 else:
-                    amount_currency = line.currency_id and amount_currency or amount
-                    company = line.account_id.company_id
-                    date = target_date or line.date
-                    amount = company_currency._convert(amount, target_currency, company, date)
-                    total_amount = company_currency._convert((line.debit - line.credit), target_currency, company, date)
-                    total_amount_currency = line.currency_id and line.amount_currency or (line.debit - line.credit)
+                    amount_currency = line['currency_id'] and amount_currency or amount
+                    date = target_date or line['date']
+                    amount = convert(amount, company_currency, target_currency, line['account_company_id'], date)
+                    total_amount = convert(debit - credit, company_currency, target_currency, line['account_company_id'], date)
+                    total_amount_currency = line['currency_id'] and line['amount_currency'] or (debit - credit)
 
             ret_line['recs_count'] = recs_count
             ret_line['debit'] = amount > 0 and amount or 0
@@ -737,6 +1005,37 @@ class AccountReconciliation(models.AbstractModel):
             ret.append(ret_line)
         return ret
 
+    @api.model
+    def _read_move_lines(self, move_lines):
+        """ Returns the columns of the move lines and of their entry, account,
+            company and partner shown by the widget, in a single query, in
+            the order of move_lines
+        """
+        self.env['account.move'].flush(['name', 'ref'])
+        self.env['account.move.line'].flush()
+        self._cr.execute("""
+            SELECT line.id, line.name, line.date, line.date_maturity,
+                   line.debit, line.credit, line.amount_currency,
+                   line.amount_residual, line.amount_residual_currency,
+                   line.currency_id, line.partner_id, line.account_id,
+                   line.journal_id,
+                   move.name AS move_name, move.ref AS move_ref,
+                   account.code AS account_code,
+                   account.name AS account_name,
+                   account.internal_type AS account_type,
+                   account.company_id AS account_company_id,
+                   company.currency_id AS company_currency_id,
+                   partner.name AS partner_name
+            FROM account_move_line line
+            JOIN account_move move ON move.id = line.move_id
+            JOIN account_account account ON account.id = line.account_id
+            JOIN res_company company ON company.id = line.company_id
+            LEFT JOIN res_partner partner ON partner.id = line.partner_id
+            WHERE line.id IN %s
+        """, [tuple(move_lines.ids)])
+        rows = {row['id']: row for row in self._cr.dictfetchall()}
+        return [rows[line_id] for line_id in move_lines.ids]
+
     @api.model
     def _get_statement_line(self, st_line):
         """ Returns the data required by the bank statement reconciliation widget to display a statement line """
@@ -782,54 +1081,72 @@ class AccountReconciliation(models.AbstractModel):
     @api.model
     def _get_move_line_reconciliation_proposition(self, account_id, partner_id=None):
         """ Returns two lines whose amount are opposite """
+        key = (account_id, partner_id)
+        return self._get_move_line_reconciliation_propositions([key])[key]
 
+    @api.model
+    def _get_move_line_reconciliation_propositions(self, keys):
+        """ Returns two lines whose amount are opposite for many accounts:
+            the open items of all the accounts are read once and paired on
+            their absolute residual amount
+
+            :param keys: list of (account_id, partner_id) tuples, partner_id
+                being None to pair the items of any partner
+            :returns dict: the pair of lines, or an empty recordset, per key
+        """
         Account_move_line = self.env['account.move.line']
+        result = {key: Account_move_line for key in keys}
+        if not keys:
+            return result
 
-        ir_rules_query = Account_move_line._where_calc([])
-        Account_move_line._apply_ir_rules(ir_rules_query, 'read')
-        from_clause, where_clause, where_clause_params = ir_rules_query.get_sql()
-        where_str = where_clause and (" WHERE %s" % where_clause) or ''
-
-        # Get pairs
-        query = """
-            SELECT a.id, b.id
-            FROM account_move_line a, account_move_line b,
-                 account_move move_a, account_move move_b,
-                 account_journal journal_a, account_journal journal_b
-            WHERE a.id != b.id
-            AND move_a.id = a.move_id
-            AND move_a.state = 'posted'
-            AND move_a.journal_id = journal_a.id
-            AND move_b.id = b.move_id
-            AND move_b.journal_id = journal_b.id
-            AND move_b.state = 'posted'
-            AND a.amount_residual = -b.amount_residual
-            AND a.balance != 0.0
-            AND b.balance != 0.0
-            AND NOT a.reconciled
-            AND a.account_id = %s
-            AND (%s IS NULL AND b.account_id = %s)
-            AND (%s IS NULL AND NOT b.reconciled OR b.id = %s)
-            AND (%s is NULL OR (a.partner_id = %s AND b.partner_id = %s))
-            AND a.id IN (SELECT "account_move_line".id FROM {0})
-            AND b.id IN (SELECT "account_move_line".id FROM {0})
-            ORDER BY a.date desc
-            LIMIT 1
-            """.format(from_clause + where_str)
         move_line_id = self.env.context.get('move_line_id') or None
-        params = [
-            account_id,
-            move_line_id, account_id,
-            move_line_id, move_line_id,
-            partner_id, partner_id, partner_id,
-        ] + where_clause_params + where_clause_params
-        self.env.cr.execute(query, params)
-
-        pairs = self.env.cr.fetchall()
-
-        if pairs:
-            return Account_move_line.browse(pairs[0])
-        return Account_move_line
+        domain = [
+            ('account_id', 'in', list({account_id for account_id, partner_id in keys})),
+            ('parent_state', '=', 'posted'),
+            ('balance', '!=', 0.0),
+            ('amount_residual', '!=', 0.0),
+        ]
+        if move_line_id:
+            domain += ['|', ('reconciled', '=', False), ('id', '=', move_line_id)]
+        else:
+            domain += [('reconciled', '=', False)]
+        query = Account_move_line._where_calc(domain)
+        Account_move_line._apply_ir_rules(query, 'read')
+        from_clause, where_clause, where_clause_params = query.get_sql()
+        Account_move_line.flush(['account_id', 'partner_id', 'parent_state', 'balance',
+                                 'amount_residual', 'reconciled', 'date'])
+        self.env.cr.execute("""
+            SELECT "account_move_line".id, "account_move_line".account_id,
+                   "account_move_line".partner_id, "account_move_line".amount_residual,
+                   "account_move_line".date, "account_move_line".reconciled
+            FROM {0} WHERE {1}
+        """.format(from_clause, where_clause or 'TRUE'), where_clause_params)
+
+        # items of every key, by absolute residual then by sign
+        groups = {key: defaultdict(lambda: ([], [])) for key in keys}
+        for line in self.env.cr.dictfetchall():
+            amount = line['amount_residual']
+            for key in ((line['account_id'], None), (line['account_id'], line['partner_id'])):
+                if key in groups:
+                    groups[key][abs(amount)][amount < 0].append(line)
+                if not line['partner_id']:
+                    break
+
+        for key, amounts in groups.items():
+            best = None
+            for debits, credits in amounts.values():
+                for lines, others in ((debits, credits), (credits, debits)):
+                    if move_line_id:
+                        others = [line for line in others if line['id'] == move_line_id]
+                    if not others:
+                        continue
+                    # the most recent open item with a counterpart
+                    for line in lines:
+                        if not line['reconciled'] and (best is None or line['date'] > best[0]['date']):
+                            best = (line, others[0])
+            if best:
+                result[key] = Account_move_line.browse([best[0]['id'], best[1]['id']])
+        return result
 
     @api.model
     def _process_move_lines(self, move_line_ids, new_mv_line_dicts):
@@ -837,124 +1154,236 @@ class AccountReconciliation(models.AbstractModel):
 
             :param new_mv_line_dicts: list of dicts containing values suitable for account_move_line.create()
         """
-        if len(move_line_ids) < 1 or len(move_line_ids) + len(new_mv_line_dicts) < 2:
-            raise UserError(_('A reconciliation must involve at least 2 move lines.'))
-
-        account_move_line = self.env['account.move.line'].browse(move_line_ids)
-        writeoff_lines = self.env['account.move.line']
-
-        # Create writeoff move lines
-        if len(new_mv_line_dicts) > 0:
-            company_currency = account_move_line[0].account_id.company_id.currency_id
-            same_currency = False
-            currencies = list(set([aml.currency_id or company_currency for aml in account_move_line]))
-            if len(currencies) == 1 and currencies[0] != company_currency:
-                same_currency = True
-            # We don't have to convert debit/credit to currency as all values in the reconciliation widget are displayed in company currency
-            # If all the lines are in the same currency, create writeoff entry with same currency also
-            for mv_line_dict in new_mv_line_dicts:
+        self._process_move_lines_batch([(move_line_ids, new_mv_line_dicts)])
+
+    @api.model
+    def _process_move_lines_batch(self, reconciliations):
+        """ _process_move_lines of many reconciliations, the write-off entries
+            of all of them being created and posted together
+
+            :param reconciliations: list of (move_line_ids, new_mv_line_dicts) tuples
+        """
+        writeoffs = []
+        for move_line_ids, new_mv_line_dicts in reconciliations:
+            if len(move_line_ids) < 1 or len(move_line_ids) + len(new_mv_line_dicts) < 2:
+                raise UserError(_('A reconciliation must involve at least 2 move lines.'))
+
+            account_move_line = self.env['account.move.line'].browse(move_line_ids)
+            if len(new_mv_line_dicts) > 0:
+                company_currency = account_move_line[0].account_id.company_id.currency_id
+                same_currency = False
+                currencies = list(set([aml.currency_id or company_currency for aml in account_move_line]))
+                if len(currencies) == 1 and currencies[0] != company_currency:
+                    same_currency = True
+                # We don't have to convert debit/credit to currency as all values in the reconciliation widget are displayed in company currency
+                # If all the lines are in the same currency, create writeoff entry with same currency also
                 if not same_currency:
-                    mv_line_dict['amount_currency'] = False
-                writeoff_lines += account_move_line._create_writeoff([mv_line_dict])
+                    for mv_line_dict in new_mv_line_dicts:
+                        mv_line_dict['amount_currency'] = False
+            writeoffs.append((account_move_line, new_mv_line_dicts))
 
-            (account_move_line + writeoff_lines).reconcile()
-        else:
-            account_move_line.reconcile()
+        writeoff_lines = self.env['account.move.line']._create_writeoffs(writeoffs)
+        # reconcile() only matches items of a single account, one call per
+        # reconciliation
+        for (account_move_line, new_mv_line_dicts), lines in zip(writeoffs, writeoff_lines):
+            (account_move_line + lines).reconcile()
 
 
 class AccountInvoiceLine(models.Model):
     _inherit = 'account.move.line'
 
+    reconciliation_search = fields.Text(
+        string='Reconciliation Search', compute='_compute_reconciliation_search',
+        store=True,
+        help="Technical field holding the account code, entry name, "
+             "reference, label and partner name of the open items, searched "
+             "by the reconciliation widget.")
+
+    # depending on the partner name means renaming a partner recomputes the
+    # search text of all of its journal items; only the open items of the
+    # reconcilable and liquidity accounts hold a value, the other ones are
+    # never searched by the widget and keep an empty one
+    @api.depends('account_id.code', 'account_id.reconcile',
+                 'account_id.internal_type', 'move_id.name', 'move_id.ref',
+                 'name', 'partner_id.name', 'reconciled')
+    def _compute_reconciliation_search(self):
+        for line in self:
+            if line.reconciled or not (
+                    line.account_id.reconcile
+                    or line.account_id.internal_type == 'liquidity'):
+                line.reconciliation_search = False
+                continue
+            line.reconciliation_search = ' '.join(filter(None, [
+                line.account_id.code,
+                line.move_id.name,
+                line.move_id.ref,
+                line.name != '/' and line.name,
+                line.partner_id.name,
+            ])) or False
+
+    def _auto_init(self):
+        # fill the search column in SQL instead of computing it record by
+        # record on large databases
+        if not column_exists(self._cr, 'account_move_line', 'reconciliation_search'):
+            create_column(self._cr, 'account_move_line', 'reconciliation_search', 'text')
+            self._cr.execute("""
+                UPDATE account_move_line line
+                SET reconciliation_search = NULLIF(concat_ws(' ',
+                    account.code, move.name, move.ref, NULLIF(line.name, '/'),
+                    (SELECT partner.name FROM res_partner partner
+                     WHERE partner.id = line.partner_id)), '')
+                FROM account_move move, account_account account
+                WHERE move.id = line.move_id
+                AND account.id = line.account_id
+                AND (account.reconcile OR account.internal_type = 'liquidity')
+                AND line.reconciled IS NOT TRUE
+            """)
+        return super(AccountInvoiceLine, self)._auto_init()
+
+    def init(self):
+        super(AccountInvoiceLine, self).init()
+        self._init_reconciliation_search_index()
+        # open items looked up on their residual amount by the bank
+        # statement reconciliation
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_move_line_open_items_index
+            ON account_move_line (company_id, amount_residual, account_id,
+                                  partner_id)
+            WHERE reconciled IS NOT TRUE AND balance != 0
+        """)
+        # and on their residual amount in currency for the journals in a
+        # foreign currency
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_move_line_open_items_currency_index
+            ON account_move_line (company_id, currency_id,
+                                  amount_residual_currency, partner_id)
+            WHERE reconciled IS NOT TRUE AND balance != 0
+        """)
+
+    def _init_reconciliation_search_index(self):
+        """ Index the search column with trigrams when pg_trgm is available,
+            the search falls back to the regular ilike domain otherwise """
+        self._cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if not self._cr.fetchone():
+            try:
+                with self._cr.savepoint():
+                    self._cr.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            except psycopg2.Error:
+                _logger.info("The pg_trgm extension is not available, the "
+                             "reconciliation widget search is not indexed")
+                return
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_move_line_reconciliation_search_index
+            ON account_move_line USING gin (reconciliation_search gin_trgm_ops)
+        """)
+        self.env['account.reconciliation.widget'].clear_caches()
+
     def _create_writeoff(self, writeoff_vals):
         """ Create a writeoff move per journal for the account.move.lines in self. If debit/credit is not specified in vals,
             the writeoff amount will be computed as the sum of amount_residual of the given recordset.
             :param writeoff_vals: list of dicts containing values suitable for account_move_line.create(). The data in vals will
                 be processed to create bot writeoff account.move.line and their enclosing account.move.
         """
+        return self._create_writeoffs([(self, writeoff_vals)])[0]
+
+    @api.model
+    def _create_writeoffs(self, writeoffs):
+        """ Bulk version of _create_writeoff: the writeoff moves of all the
+            groups are created with a single create() then posted at once.
+            :param writeoffs: list of (move lines, writeoff_vals) tuples, as
+                self and the argument of _create_writeoff
+            :returns: list of the writeoff move.lines to reconcile, one
+                recordset per group
+        """
         def compute_writeoff_counterpart_vals(values):
             line_values = values.copy()
             line_values['debit'], line_values['credit'] = line_values['credit'], line_values['debit']
             if 'amount_currency' in values:
                 line_values['amount_currency'] = -line_values['amount_currency']
             return line_values
-        # Group writeoff_vals by journals
-        writeoff_dict = {}
-        for val in writeoff_vals:
-            journal_id = val.get('journal_id', False)
-            if not writeoff_dict.get(journal_id, False):
-                writeoff_dict[journal_id] = [val]
-            else:
-                writeoff_dict[journal_id].append(val)
-
-        partner_id = self.env['res.partner']._find_accounting_partner(self[0].partner_id).id
-        company_currency = self[0].account_id.company_id.currency_id
-        writeoff_currency = self[0].account_id.currency_id or company_currency
-        line_to_reconcile = self.env['account.move.line']
-        # Iterate and create one writeoff by journal
-        writeoff_moves = self.env['account.move']
-        for journal_id, lines in writeoff_dict.items():
-            total = 0
-            total_currency = 0
-            writeoff_lines = []
-            date = fields.Date.today()
-            for vals in lines:
-                # Check and complete vals
-                if 'account_id' not in vals or 'journal_id' not in vals:
-                    raise UserError(_("It is mandatory to specify an account and a journal to create a write-off."))
-                if ('debit' in vals) ^ ('credit' in vals):
-                    raise UserError(_("Either pass both debit and credit or none."))
-                if 'date' not in vals:
-                    vals['date'] = self._context.get('date_p') or fields.Date.today()
-                vals['date'] = fields.Date.to_date(vals['date'])
-                if vals['date'] and vals['date'] < date:
-                    date = vals['date']
-                if 'name' not in vals:
-                    vals['name'] = self._context.get('comment') or _('Write-Off')
-                if 'analytic_account_id' not in vals:
-                    vals['analytic_account_id'] = self.env.context.get('analytic_id', False)
-                #compute the writeoff amount if not given
-                if 'credit' not in vals and 'debit' not in vals:
-                    amount = sum([r.amount_residual for r in self])
-                    vals['credit'] = amount > 0 and amount or 0.0
-                    vals['debit'] = amount < 0 and abs(amount) or 0.0
-                vals['partner_id'] = partner_id
-                total += vals['debit']-vals['credit']
-                if 'amount_currency' not in vals and writeoff_currency != company_currency:
-                    vals['currency_id'] = writeoff_currency.id
-                    sign = 1 if vals['debit'] > 0 else -1
-                    vals['amount_currency'] = sign * abs(sum([r.amount_residual_currency for r in self]))
-                    total_currency += vals['amount_currency']
-
-                writeoff_lines.append(compute_writeoff_counterpart_vals(vals))
-
-            # Create balance line
-            writeoff_lines.append({
-                'name': _('Write-Off'),
-                'debit': total > 0 and total or 0.0,
-                'credit': total < 0 and -total or 0.0,
-                'amount_currency': total_currency,
-                'currency_id': total_currency and writeoff_currency.id or False,
-                'journal_id': journal_id,
-                'account_id': self[0].account_id.id,
-                'partner_id': partner_id
-                })
 
-            # Create the move
-            writeoff_move = self.env['account.move'].create({
-                'journal_id': journal_id,
-                'date': date,
-                'state': 'draft',
-                'line_ids': [(0, 0, line) for line in writeoff_lines],
-            })
-            writeoff_moves += writeoff_move
-            line_to_reconcile += writeoff_move.line_ids.filtered(lambda r: r.account_id == self[0].account_id).sorted(key='id')[-1:]
+        move_vals_list = []
+        # group and account of the line to reconcile of every move
+        move_targets = []
+        for group_index, (lines, writeoff_vals) in enumerate(writeoffs):
+            if not writeoff_vals:
+                continue
+            # Group writeoff_vals by journals
+            writeoff_dict = {}
+            for val in writeoff_vals:
+                writeoff_dict.setdefault(val.get('journal_id', False), []).append(val)
+
+            partner_id = self.env['res.partner']._find_accounting_partner(lines[0].partner_id).id
+            company_currency = lines[0].account_id.company_id.currency_id
+            writeoff_currency = lines[0].account_id.currency_id or company_currency
+            # residual of the group, computed once for all its writeoffs
+            amount_residual = sum(lines.mapped('amount_residual'))
+            amount_residual_currency = sum(lines.mapped('amount_residual_currency'))
+            # one writeoff by journal
+            for journal_id, journal_vals in writeoff_dict.items():
+                total = 0
+                total_currency = 0
+                writeoff_lines = []
+                date = fields.Date.today()
+                for vals in journal_vals:
+                    # Check and complete vals
+                    if 'account_id' not in vals or 'journal_id' not in vals:
+                        raise UserError(_("It is mandatory to specify an account and a journal to create a write-off."))
+                    if ('debit' in vals) ^ ('credit' in vals):
+                        raise UserError(_("Either pass both debit and credit or none."))
+                    if 'date' not in vals:
+                        vals['date'] = self._context.get('date_p') or fields.Date.today()
+                    vals['date'] = fields.Date.to_date(vals['date'])
+                    if vals['date'] and vals['date'] < date:
+                        date = vals['date']
+                    if 'name' not in vals:
+                        vals['name'] = self._context.get('comment') or _('Write-Off')
+                    if 'analytic_account_id' not in vals:
+                        vals['analytic_account_id'] = self.env.context.get('analytic_id', False)
+                    #compute the writeoff amount if not given
+                    if 'credit' not in vals and 'debit' not in vals:
+                        vals['credit'] = amount_residual > 0 and amount_residual or 0.0
+                        vals['debit'] = amount_residual < 0 and abs(amount_residual) or 0.0
+                    vals['partner_id'] = partner_id
+                    total += vals['debit']-vals['credit']
+                    if 'amount_currency' not in vals and writeoff_currency != company_currency:
+                        vals['currency_id'] = writeoff_currency.id
+                        sign = 1 if vals['debit'] > 0 else -1
+                        vals['amount_currency'] = sign * abs(amount_residual_currency)
+                        total_currency += vals['amount_currency']
+
+                    writeoff_lines.append(compute_writeoff_counterpart_vals(vals))
+
+                # Create balance line
+                writeoff_lines.append({
+                    'name': _('Write-Off'),
+                    'debit': total > 0 and total or 0.0,
+                    'credit': total < 0 and -total or 0.0,
+                    'amount_currency': total_currency,
+                    'currency_id': total_currency and writeoff_currency.id or False,
+                    'journal_id': journal_id,
+                    'account_id': lines[0].account_id.id,
+                    'partner_id': partner_id
+                    })
 
-        #post all the writeoff moves at once
+                move_vals_list.append({
+                    'journal_id': journal_id,
+                    'date': date,
+                    'state': 'draft',
+                    'line_ids': [(0, 0, line) for line in writeoff_lines],
+                })
+                move_targets.append((group_index, lines[0].account_id))
+
+        # Create and post all the writeoff moves at once
+        writeoff_moves = self.env['account.move'].create(move_vals_list)
         if writeoff_moves:
             writeoff_moves.action_post()
 
-        # Return the writeoff move.line which is to be reconciled
-        return line_to_reconcile
+        # Return the writeoff move.lines which are to be reconciled
+        lines_to_reconcile = [self.env['account.move.line'] for writeoff in writeoffs]
+        for writeoff_move, (group_index, account) in zip(writeoff_moves, move_targets):
+            lines_to_reconcile[group_index] += writeoff_move.line_ids.filtered(lambda r: r.account_id == account).sorted(key='id')[-1:]
+        return lines_to_reconcile
 
 
 class AccountBankStatement(models.Model):
@@ -983,6 +1412,63 @@ class AccountBankStatementLine(models.Model):
     move_name = fields.Char(string='Journal Entry Name', readonly=True,
                             default=False, copy=False,
                             help="Technical field holding the number given to the journal entry, automatically set when the statement line is reconciled then stored to set the same number again if the line is cancelled, set to draft and re-processed again.")
+    detected_partner_id = fields.Many2one(
+        'res.partner', string='Detected Partner', readonly=True,
+        compute='_compute_detected_partner_id', store=True,
+        help="Technical field holding the partner found from the bank account number or the name of the counterpart, proposed by the reconciliation widget.")
+
+    @api.depends('partner_name', 'account_number', 'partner_bank_id')
+    def _compute_detected_partner_id(self):
+        partners = self._find_detected_partners()
+        for line in self:
+            line.detected_partner_id = partners[line.id]
+
+    def _find_detected_partners(self):
+        """ Resolve the partners of all the lines at once, from a map of the
+            sanitized bank account numbers and a map of the exact names of
+            the commercial partners, among the partners readable by the
+            current user
+        """
+        numbers = {line.id: sanitize_account_number(line.account_number)
+                   for line in self if line.account_number}
+        names = {line.id: line.partner_name.strip().lower()
+                 for line in self if line.partner_name and line.partner_name.strip()}
+
+        bank_partners = defaultdict(list)
+        if numbers:
+            banks = self.env['res.partner.bank'].search_read([
+                ('sanitized_acc_number', 'in', list(set(numbers.values()))),
+            ], ['sanitized_acc_number', 'partner_id'], order='id')
+            for bank in banks:
+                bank_partners[bank['sanitized_acc_number']].append(bank['partner_id'][0])
+
+        name_partners = defaultdict(list)
+        if names:
+            self.env['res.partner'].flush(['name', 'parent_id'])
+            # By definition the commercial partner_id doesn't have a parent_id set
+            self._cr.execute("""
+                SELECT lower(name), id FROM res_partner
+                WHERE lower(name) IN %s AND parent_id IS NULL
+                ORDER BY id
+            """, [tuple(set(names.values()))])
+            for name, partner_id in self._cr.fetchall():
+                name_partners[name].append(partner_id)
+
+        candidates = {
+            line.id: line.partner_bank_id.sudo().partner_id.ids
+            + bank_partners.get(numbers.get(line.id), [])
+            + name_partners.get(names.get(line.id), [])
+            for line in self
+        }
+        # The raw query above bypasses the record rules: keep the first
+        # candidate of every line the user can read.
+        allowed_ids = set(self.env['res.partner'].with_context(active_test=False).search([
+            ('id', 'in', list({pid for pids in candidates.values() for pid in pids})),
+        ]).ids)
+        return {
+            line_id: next((pid for pid in pids if pid in allowed_ids), False)
+            for line_id, pids in candidates.items()
+        }
 
     def process_reconciliation(self, counterpart_aml_dicts=None, payment_aml_rec=None, new_aml_dicts=None):
         """Match statement lines with existing payments (eg. checks) and/or
@@ -1158,6 +1644,110 @@ class AccountBankStatementLine(models.Model):
         counterpart_moves._check_balanced()
         return counterpart_moves
 
+    def _check_reconciliation_data(self, datum):
+        """Raise if the data of the statement line cannot be processed, the
+        same checks as process_reconciliation but without any write."""
+        self.ensure_one()
+        if any(rec.statement_id for rec in datum['payment_aml_rec']):
+            raise UserError(_("A selected move line was already reconciled."))
+        if not self._context.get("suspense_moves_mode") and any(
+                aml_dict["move_line"].reconciled
+                for aml_dict in datum['counterpart_aml_dicts']):
+            raise UserError(_("A selected move line was already reconciled."))
+        if self.move_name and not datum['counterpart_aml_dicts'] \
+                and not datum['new_aml_dicts']:
+            raise UserError(_('Operation not allowed. Since your statement line already received a number (%s), you cannot reconcile it entirely with existing journal entries otherwise it would make a gap in the numbering. You should book an entry and make a regular revert of it in case you want to cancel it.') % (self.move_name))
+
+    def _process_reconciliation_batch(self, data):
+        """process_reconciliation of many statement lines without payments:
+        the journal items of all the lines are created at once, then the
+        entries are posted together before being reconciled.
+
+        :param data: one dict per statement line of self, as given to
+            process_bank_statement_line with recordsets instead of ids
+        :returns: the journal entries of the statement lines
+        """
+        aml_obj = self.env["account.move.line"].with_context(
+            check_move_validity=False)
+
+        # one write per partner instead of one per statement line
+        partner_lines = defaultdict(list)
+        for st_line, datum in zip(self, data):
+            if datum.get('partner_id') is not None:
+                partner_lines[datum['partner_id']].append(st_line.id)
+        for partner_id, st_line_ids in partner_lines.items():
+            self.browse(st_line_ids).write({'partner_id': partner_id})
+
+        st_lines = self.browse([
+            st_line.id for st_line, datum in zip(self, data)
+            if datum['counterpart_aml_dicts'] or datum['new_aml_dicts']])
+        st_line_ids = set(st_lines.ids)
+        st_lines.move_id.line_ids.with_context(force_delete=True).unlink()
+        sequences = {}
+        for statement in st_lines.statement_id:
+            sequences.update({line_id: sequence for sequence, line_id
+                              in enumerate(statement.line_ids.ids, 1)})
+
+        vals_list = []
+        to_reconcile = []
+        to_link = defaultdict(lambda: self.env["account.move.line"])
+        for st_line, datum in zip(self, data):
+            if st_line.id not in st_line_ids:
+                continue
+            st_line.sequence = sequences[st_line.id]
+            vals_list.append(st_line._prepare_liquidity_move_line_vals())
+            date = st_line.date or fields.Date.today()
+            for aml_dict in datum['counterpart_aml_dicts'] + \
+                    datum['new_aml_dicts']:
+                if aml_dict.get("tax_ids") and \
+                        isinstance(aml_dict["tax_ids"][0], int):
+                    aml_dict["tax_ids"] = [(4, id, None)
+                                           for id in aml_dict["tax_ids"]]
+                aml_dict["move_id"] = st_line.move_id.id
+                aml_dict["partner_id"] = st_line.partner_id.id
+                aml_dict["statement_line_id"] = st_line.id
+                st_line._prepare_move_line_for_currency(aml_dict, date)
+            vals_list += datum['new_aml_dicts']
+            for aml_dict in datum['counterpart_aml_dicts']:
+                counterpart = aml_dict.pop("move_line")
+                if not counterpart.statement_line_id:
+                    to_link[st_line.id] |= counterpart
+                if counterpart.partner_id.id:
+                    aml_dict["partner_id"] = counterpart.partner_id.id
+                aml_dict["account_id"] = counterpart.account_id.id
+                to_reconcile.append((len(vals_list), counterpart))
+                vals_list.append(aml_dict)
+        new_amls = aml_obj.create(vals_list)
+        for st_line_id, counterparts in to_link.items():
+            counterparts.write({"statement_line_id": st_line_id})
+        to_check = self.browse([st_line.id for st_line, datum
+                                in zip(self, data) if datum.get('to_check')])
+        (st_lines & to_check).move_id.write({'to_check': True})
+
+        moves = st_lines.move_id
+        moves.filtered(lambda move: move.state == 'draft').with_context(
+            skip_account_move_synchronization=True).action_post()
+        # reconcile() only matches items of a single account: one call per
+        # counterpart
+        invoices = self.env["account.move"]
+        for index, counterpart in to_reconcile:
+            (new_amls[index] | counterpart).reconcile()
+            invoices |= counterpart.move_id
+        invoices.filtered(
+            lambda move: move.is_invoice(include_receipts=True)
+        )._compute_amount()
+
+        for st_line in st_lines:
+            st_line.move_name = st_line.move_id.name
+        for st_line in self:
+            if st_line.account_number and st_line.partner_id \
+                    and not st_line.bank_account_id:
+                st_line.partner_bank_id = \
+                    st_line._find_or_create_bank_account()
+
+        moves._check_balanced()
+        return moves
+
     def _prepare_move_line_for_currency(self, aml_dict, date):
         self.ensure_one()
         company_currency = self.journal_id.company_id.currency_id
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import api, models
+from odoo.http import request
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    @api.model
+    def _get_report_company_ids(self):
+        """Companies selected in the company switcher of the web client.
+
+        The ``cids`` cookie is resolved once per HTTP request and kept on
+        the request; outside of one (cron, shell, tests) the companies of
+        the environment are used. A single company is followed by ``0`` so
+        the result can always be given to an ``IN`` clause.
+
+        :return: a new list of company ids on every call
+        """
+        if not request:
+            return self._complete_report_company_ids(self.env.companies.ids)
+        cache = getattr(request, 'report_company_ids', None)
+        if cache is None:
+            cache = request.report_company_ids = {}
+        if self.env.uid not in cache:
+            cids = request.httprequest.cookies.get('cids') or ''
+            allowed_ids = set(self.env.user.company_ids.ids)
+            company_ids = [int(cid) for cid in cids.split(',')
+                           if cid.isdigit() and int(cid) in allowed_ids]
+            cache[self.env.uid] = company_ids or [self.env.company.id]
+        return self._complete_report_company_ids(cache[self.env.uid])
+
+    @api.model
+    def _complete_report_company_ids(self, company_ids):
+        company_ids = list(company_ids)
+        if len(company_ids) == 1:
+            company_ids.append(0)
+        return company_ids
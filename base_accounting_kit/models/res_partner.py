@@ -44,6 +44,15 @@ class ResPartner(models.Model):
          ('no_action_needed', 'No action needed')],
         string='Followup status')
 
+    def init(self):
+        super(ResPartner, self).init()
+        # exact names of the commercial partners matched with the
+        # counterparts of the bank statement lines
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS res_partner_commercial_lower_name_index
+            ON res_partner (lower(name)) WHERE parent_id IS NULL
+        """)
+
     def _compute_for_followup(self):
         """
         Compute the fields 'total_due', 'total_overdue' , 'next_reminder_date' and 'followup_status'
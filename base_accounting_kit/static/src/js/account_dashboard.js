@@ -3,7 +3,9 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
     var AbstractAction = require('web.AbstractAction');
     var ajax = require('web.ajax');
     var core = require('web.core');
+    var field_utils = require('web.field_utils');
     var rpc = require('web.rpc');
+    var session = require('web.session');
     var web_client = require('web.web_client');
     var _t = core._t;
     var QWeb = core.qweb;
@@ -11,6 +13,9 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
     var currency;
     var ActionMenu = AbstractAction.extend({
         contentTemplate: 'Invoicedashboard',
+        // compute the missing tiles on several database connections at once,
+        // opt-in as they are taken from the pool shared by all the requests
+        parallel_bundle: false,
         events: {
             'click .invoice_dashboard': 'onclick_dashboard',
             'click #prog_bar': 'onclick_prog_bar',
@@ -69,7 +74,10 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                 e.stopPropagation();
                 var $target = $(e.target);
                 var value = $target.val();
-                if (value == 'income_this_year'){
+                if (this.$('#compare_companies').prop('checked')) {
+                    this.load_bundle([this.get_income_tile()]);
+                }
+                else if (value == 'income_this_year'){
                     this.onclick_income_this_year(this.$('#income_expense_values').val());
                 }
                 else if (value == 'income_this_month'){
@@ -82,6 +90,10 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                     this.onclick_income_last_year(this.$('#income_expense_values').val());
                 }
             },
+            'change #compare_companies': function(e) {
+                e.stopPropagation();
+                this.load_bundle([this.get_income_tile()]);
+            },
 
             'change #toggle-two': 'onclick_toggle_two',
             'click #unreconciled_counts_this_year': 'unreconciled_year',
@@ -117,9 +129,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -139,9 +149,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -161,9 +169,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -183,9 +189,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -205,9 +209,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -227,9 +229,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -249,9 +249,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -271,9 +269,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -296,9 +292,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -321,9 +315,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -346,9 +338,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -371,9 +361,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -396,9 +384,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -421,9 +407,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -446,9 +430,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
@@ -471,23 +453,20 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
                         [false, 'form']
                     ],
                     type: 'ir.actions.act_window',
-                    domain: [
-                        ['id', 'in', result]
-                    ],
+                    domain: result,
                 });
             })
         },
 
         onclick_toggle_two: function(ev) {
-            this.onclick_aged_payable(this.$('#aged_receivable_values').val());
-            this.onclick_aged_receivable(this.$('#aged_payable_value').val());
-            this.onclick_invoice_this_year(ev);
-            this.onclick_invoice_this_month(ev);
-
-            this.onclick_income_this_month(ev);
-            this.onclick_income_last_month(ev);
-            this.onclick_income_last_year(ev);
-            this.onclick_income_this_year(ev);
+            var invoice_period = this.$('#invoice_values').val() == 'this_year' ? 'current_year' : 'current_month';
+            this.load_bundle([
+                'overdues_' + this.$('#aged_receivable_values').val(),
+                'latebills_' + this.$('#aged_payable_value').val(),
+                'total_invoice_' + invoice_period,
+                this.get_income_tile(),
+                'cash_forecast',
+            ]);
         },
 
         onclick_top_10_month: function(f) {
@@ -1114,601 +1093,525 @@ odoo.define('AccountingDashboard.AccountingDashboard', function(require) {
             })
         },
 
-        renderElement: function(ev) {
-            var self = this;
-            $.when(this._super())
-            .then(function(ev) {
-                $('#toggle-two').bootstrapToggle({
-                    on: 'View All Entries',
-                    off: 'View Posted Entries'
-                });
-                var posted = false;
-                if ($('#toggle-two')[0].checked == true) {
-                    posted = "posted"
-                }
-                rpc.query({
-                    model: "account.move",
-                    method: "get_currency",
-                }).then(function(result) {
-                    currency = result;
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "get_income_this_month",
-                    args: [posted],
-                }).then(function(result) {
-                    var ctx = document.getElementById("canvas").getContext('2d');
-                    // Define the data
-                    var income = result.income; // Add data values to array
-                    var expense = result.expense;
-                    var profit = result.profit;
+        get_posted: function() {
+            var posted = false;
+            if ($('#toggle-two')[0].checked == true) {
+                posted = "posted"
+            }
+            return posted;
+        },
 
-                    var labels = result.date; // Add labels to array
-                    // End Defining data
+        render_income_expense: function(result, labels) {
+            var ctx = document.getElementById("canvas").getContext('2d');
+            // Define the data
+            var income = result.income; // Add data values to array
+            var expense = result.expense;
+            var profit = result.profit;
+            // End Defining data
+            if (window.myCharts != undefined)
+                window.myCharts.destroy();
+            window.myCharts = new Chart(ctx, {
+                type: 'bar',
+                data: {
+                    labels: labels,
+                    datasets: [{
+                            label: 'Income', // Name the series
+                            data: income, // Specify the data values array
+                            backgroundColor: '#66aecf',
+                            borderColor: '#66aecf',
 
-                    // End Defining data
-                    if (window.myCharts != undefined)
-                        window.myCharts.destroy();
-                    window.myCharts = new Chart(ctx, {
-                        //var myChart = new Chart(ctx, {
-                        type: 'bar',
-                        data: {
-                            labels: labels,
-                            datasets: [{
-                                    label: 'Income', // Name the series
-                                    data: income, // Specify the data values array
-                                    backgroundColor: '#66aecf',
-                                    borderColor: '#66aecf',
-
-                                    borderWidth: 1, // Specify bar border width
-                                    type: 'bar', // Set this data to a line chart
-                                    fill: false
-                                },
-                                {
-                                    label: 'Expense', // Name the series
-                                    data: expense, // Specify the data values array
-                                    backgroundColor: '#6993d6',
-                                    borderColor: '#6993d6',
-
-                                    borderWidth: 1, // Specify bar border width
-                                    type: 'bar', // Set this data to a line chart
-                                    fill: false
-                                },
-                                {
-                                    label: 'Profit/Loss', // Name the series
-                                    data: profit, // Specify the data values array
-                                    backgroundColor: '#0bd465',
-                                    borderColor: '#0bd465',
-
-                                    borderWidth: 1, // Specify bar border width
-                                    type: 'line', // Set this data to a line chart
-                                    fill: false
-                                }
-                            ]
+                            borderWidth: 1, // Specify bar border width
+                            type: 'bar', // Set this data to a line chart
+                            fill: false
                         },
-                        options: {
-                            responsive: true, // Instruct chart js to respond nicely.
-                            maintainAspectRatio: false, // Add to prevent default behaviour of full-width/height
+                        {
+                            label: 'Expense', // Name the series
+                            data: expense, // Specify the data values array
+                            backgroundColor: '#6993d6',
+                            borderColor: '#6993d6',
+
+                            borderWidth: 1, // Specify bar border width
+                            type: 'bar', // Set this data to a line chart
+                            fill: false
+                        },
+                        {
+                            label: 'Profit/Loss', // Name the series
+                            data: profit, // Specify the data values array
+                            backgroundColor: '#0bd465',
+                            borderColor: '#0bd465',
+
+                            borderWidth: 1, // Specify bar border width
+                            type: 'line', // Set this data to a line chart
+                            fill: false
                         }
+                    ]
+                },
+                options: {
+                    responsive: true, // Instruct chart js to respond nicely.
+                    maintainAspectRatio: false, // Add to prevent default behaviour of full-width/height
+                }
+            });
+        },
+
+        get_income_tile: function() {
+            var tile = this.$('#income_expense_values').val() || 'income_this_month';
+            if (this.$('#compare_companies').prop('checked')) {
+                tile += '_by_company';
+            }
+            return tile;
+        },
+
+        render_income_by_company: function(result, labels) {
+            // one bar per company in every period, the consolidation as a line
+            var colors = ['#66aecf', '#6993d6', '#666fcf', '#7c66cf', '#9c66cf',
+                          '#bc66cf', '#cc5f7f', '#cc815f', '#cca15f', '#99cf66'];
+            var datasets = _.map(result.companies, function(company, index) {
+                var color = colors[index % colors.length];
+                return {
+                    label: company.name,
+                    company_id: company.id,
+                    data: company.profit,
+                    backgroundColor: color,
+                    borderColor: color,
+                    borderWidth: 1,
+                    type: 'bar',
+                    fill: false
+                };
+            });
+            datasets.push({
+                label: _t('Consolidated Profit/Loss'),
+                data: result.profit,
+                backgroundColor: '#0bd465',
+                borderColor: '#0bd465',
+                borderWidth: 1,
+                type: 'line',
+                fill: false
+            });
+            if (window.myCharts != undefined)
+                window.myCharts.destroy();
+            window.myCharts = new Chart(document.getElementById("canvas").getContext('2d'), {
+                type: 'bar',
+                data: {
+                    labels: labels,
+                    datasets: datasets
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                }
+            });
+        },
+
+        render_doughnut: function(canvas, labels, values) {
+            var colors = [
+                '#66aecf ', '#6993d6 ', '#666fcf', '#7c66cf', '#9c66cf',
+                '#bc66cf ', '#b75fcc', ' #cb5fbf ', ' #cc5f7f ', ' #cc6260',
+                '#cc815f', '#cca15f ', '#ccc25f', '#b9cf66', '#99cf66',
+                ' #75cb5f ', '#60cc6c', '#804D8000', '#80B33300', '#80CC80CC', '#f2552c', '#00cccc',
+                '#1f2e2e', '#993333', '#00cca3', '#1a1a00', '#3399ff',
+                '#8066664D', '#80991AFF', '#808E666FF', '#804DB3FF', '#801AB399',
+                '#80E666B3', '#8033991A', '#80CC9999', '#80B3B31A', '#8000E680',
+                '#804D8066', '#80809980', '#80E6FF80', '#801AFF33', '#80999933',
+                '#80FF3380', '#80CCCC00', '#8066E64D', '#804D80CC', '#809900B3',
+                '#80E64D66', '#804DB380', '#80FF4D4D', '#8099E6E6', '#806666FF'
+            ];
+            return new Chart($(canvas), {
+                type: 'doughnut',
+                tooltipFillColor: "rgba(51, 51, 51, 0.55)",
+                data: {
+                    labels: labels,
+                    datasets: [{
+                        data: values,
+                        backgroundColor: colors,
+                        hoverBackgroundColor: colors
+                    }]
+                },
+                options: {
+                    responsive: false
+                }
+            });
+        },
+
+        render_overdues: function(result) {
+            if (window.donut != undefined)
+                window.donut.destroy();
+            window.donut = this.render_doughnut("#canvas1", result.due_partner, result.due_amount);
+        },
+
+        render_latebills: function(result) {
+            if (window.donuts != undefined)
+                window.donuts.destroy();
+            window.donuts = this.render_doughnut("#horizontalbarChart", result.bill_partner, result.bill_amount);
+        },
+
+        render_invoice_totals: function(result, period) {
+            var self = this;
+            var other = period == 'current_month' ? 'current_year' : 'current_month';
+            var blocks = ['total_supplier_invoice_paid', 'total_supplier_invoice', 'total_customer_invoice_paid',
+                          'total_customer_invoice', 'tot_invoice', 'tot_supplier_inv'];
+            _.each(blocks, function(block) {
+                $('#' + block).hide();
+                $('#' + block + '_' + other).hide();
+                $('#' + block + '_' + period).empty();
+                $('#' + block + '_' + period).show();
+            });
+            var tot_invoice = result[0][0]
+            var tot_credit = result[1][0]
+            var tot_supplier_inv = result[2][0]
+            var tot_supplier_refund = result[3][0]
+            var tot_customer_invoice_paid = result[4][0]
+            var tot_supplier_invoice_paid = result[5][0]
+            var tot_customer_credit_paid = result[6][0]
+            var tot_supplier_refund_paid = result[7][0]
+            var customer_invoice_total = (tot_invoice - tot_credit).toFixed(2)
+            var customer_invoice_paid = (tot_customer_invoice_paid - tot_customer_credit_paid).toFixed(2)
+            var supplier_invoice_total = (tot_supplier_inv - tot_supplier_refund).toFixed(2)
+            var supplier_invoice_paid = (tot_supplier_invoice_paid - tot_supplier_refund_paid).toFixed(2)
+
+            $('#tot_supplier_inv_' + period).attr("value", supplier_invoice_paid);
+            $('#tot_supplier_inv_' + period).attr("max", supplier_invoice_total);
+
+            $('#tot_invoice_' + period).attr("value", customer_invoice_paid);
+            $('#tot_invoice_' + period).attr("max", customer_invoice_total);
+
+            customer_invoice_paid = self.format_currency(currency, customer_invoice_paid);
+            customer_invoice_total = self.format_currency(currency, customer_invoice_total);
+            supplier_invoice_paid = self.format_currency(currency, supplier_invoice_paid);
+            supplier_invoice_total = self.format_currency(currency, supplier_invoice_total);
+
+            $('#total_customer_invoice_paid_' + period).append('<div class="logo">' + '<span>' + customer_invoice_paid + '</span><span>Total Paid<span></div>');
+            $('#total_customer_invoice_' + period).append('<div" class="logo">' + '<span>' + customer_invoice_total + '</span><span>Total Invoice<span></div>');
+
+            $('#total_supplier_invoice_paid_' + period).append('<div" class="logo">' + '<span>' + supplier_invoice_paid + '</span><span>Total Paid<span></div>');
+            $('#total_supplier_invoice_' + period).append('<div" class="logo">' + '<span>' + supplier_invoice_total + '</span><span>Total Invoice<span></div>');
+        },
+
+        render_top_10_customers: function(result) {
+            var self = this;
+            var amount;
+            $('#top_10_customers_this_month').empty();
+            _.forEach(result, function(x) {
+                $('#top_10_customers_this_month').show();
+                amount = self.format_currency(currency, x.amount);
+                $('#top_10_customers_this_month').append('<li><div id="line_' + x.parent + '" data-user-id="' + x.parent + '">' + x.customers + '</div>' + '<div id="line_' + x.parent + '" data-user-id="' + x.parent + '">' + amount + '</div>' + '</li>');
+                $('#line_' + x.parent).on("click", function() {
+                    self.do_action({
+                        res_model: 'res.partner',
+                        name: _t('Partner'),
+                        views: [
+                            [false, 'form']
+                        ],
+                        type: 'ir.actions.act_window',
+                        res_id: x.parent,
                     });
-                })
-                var arg = 'this_month';
-                rpc.query({
-                    model: 'account.move',
-                    method: 'get_overdues_this_month_and_year',
-                    args: [posted, arg],
-                }).then(function(result) {
-                    //
-                })
-                var arg = 'this_month';
-                rpc.query({
-                    model: 'account.move',
-                    method: 'get_overdues_this_month_and_year',
-                    args: [posted, arg],
-                }).then(function(result) {
-                    // Doughnut Chart
-                    $(document).ready(function() {
-                        var options = {
-                            // legend: false,
-                            responsive: true,
-                            legend: {
-                                position: 'bottom'
-                            }
-                        };
-                        if (window.donut != undefined)
-                            window.donut.destroy();
-                        window.donut = new Chart($("#canvas1"), {
-                            type: 'doughnut',
-                            tooltipFillColor: "rgba(51, 51, 51, 0.55)",
-                            data: {
-                                labels: result.due_partner,
-                                datasets: [{
-                                    data: result.due_amount,
-                                    backgroundColor: [
-                                        '#66aecf ', '#6993d6 ', '#666fcf', '#7c66cf', '#9c66cf',
-                                        '#bc66cf ', '#b75fcc', ' #cb5fbf ', ' #cc5f7f ', ' #cc6260',
-                                        '#cc815f', '#cca15f ', '#ccc25f', '#b9cf66', '#99cf66',
-                                        ' #75cb5f ', '#60cc6c', '#804D8000', '#80B33300', '#80CC80CC', '#f2552c', '#00cccc',
-                                        '#1f2e2e', '#993333', '#00cca3', '#1a1a00', '#3399ff',
-                                        '#8066664D', '#80991AFF', '#808E666FF', '#804DB3FF', '#801AB399',
-                                        '#80E666B3', '#8033991A', '#80CC9999', '#80B3B31A', '#8000E680',
-                                        '#804D8066', '#80809980', '#80E6FF80', '#801AFF33', '#80999933',
-                                        '#80FF3380', '#80CCCC00', '#8066E64D', '#804D80CC', '#809900B3',
-                                        '#80E64D66', '#804DB380', '#80FF4D4D', '#8099E6E6', '#806666FF'
-                                    ],
-                                    hoverBackgroundColor: [
-                                        '#66aecf ', '#6993d6 ', '#666fcf', '#7c66cf', '#9c66cf',
-                                        '#bc66cf ', '#b75fcc', ' #cb5fbf ', ' #cc5f7f ', ' #cc6260',
-                                        '#cc815f', '#cca15f ', '#ccc25f', '#b9cf66', '#99cf66',
-                                        ' #75cb5f ', '#60cc6c', '#804D8000', '#80B33300', '#80CC80CC', '#f2552c', '#00cccc',
-                                        '#1f2e2e', '#993333', '#00cca3', '#1a1a00', '#3399ff',
-                                        '#8066664D', '#80991AFF', '#808E666FF', '#804DB3FF', '#801AB399',
-                                        '#80E666B3', '#8033991A', '#80CC9999', '#80B3B31A', '#8000E680',
-                                        '#804D8066', '#80809980', '#80E6FF80', '#801AFF33', '#80999933',
-                                        '#80FF3380', '#80CCCC00', '#8066E64D', '#804D80CC', '#809900B3',
-                                        '#80E64D66', '#804DB380', '#80FF4D4D', '#8099E6E6', '#806666FF'
-                                    ]
-                                }]
-                            },
-                            options: {
-                                responsive: false
-                            }
-                        });
-                    });
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "get_total_invoice_current_month",
-                    args: [posted],
-                }).then(function(result) {
-                    $('#total_supplier_invoice_paid').hide();
-                    $('#total_supplier_invoice').hide();
-                    $('#total_customer_invoice_paid').hide();
-                    $('#total_customer_invoice').hide();
-                    $('#tot_invoice').hide();
-                    $('#tot_supplier_inv').hide();
-
-                    $('#total_supplier_invoice_paid_current_month').empty();
-                    $('#total_supplier_invoice_current_month').empty();
-                    $('#total_customer_invoice_paid_current_month').empty();
-                    $('#total_customer_invoice_current_month').empty();
-                    $('#tot_invoice_current_month').empty();
-                    $('#tot_supplier_inv_current_month').empty();
-
-                    $('#total_supplier_invoice_paid_current_year').hide();
-                    $('#total_supplier_invoice_current_year').hide();
-                    $('#total_customer_invoice_paid_current_year').hide();
-                    $('#total_customer_invoice_current_year').hide();
-                    $('#tot_invoice_current_year').hide();
-                    $('#tot_supplier_inv_current_year').hide();
-
-                    $('#total_supplier_invoice_paid_current_month').show();
-                    $('#total_supplier_invoice_current_month').show();
-                    $('#total_customer_invoice_paid_current_month').show();
-                    $('#total_customer_invoice_current_month').show();
-                    $('#tot_invoice_current_month').show();
-                    $('#tot_supplier_inv_current_month').show();
-
-                    var tot_invoice_current_month = result[0][0]
-                    var tot_credit_current_month = result[1][0]
-                    var tot_supplier_inv_current_month = result[2][0]
-                    var tot_supplier_refund_current_month = result[3][0]
-                    var tot_customer_invoice_paid_current_month = result[4][0]
-                    var tot_supplier_invoice_paid_current_month = result[5][0]
-                    var tot_customer_credit_paid_current_month = result[6][0]
-                    var tot_supplier_refund_paid_current_month = result[7][0]
-                    var customer_invoice_total_current_month = (tot_invoice_current_month - tot_credit_current_month).toFixed(2)
-                    var customer_invoice_paid_current_month = (tot_customer_invoice_paid_current_month - tot_customer_credit_paid_current_month).toFixed(2)
-                    var invoice_percentage_current_month = ((customer_invoice_total_current_month / customer_invoice_paid_current_month) * 100).toFixed(2)
-                    var supplier_invoice_total_current_month = (tot_supplier_inv_current_month - tot_supplier_refund_current_month).toFixed(2)
-                    var supplier_invoice_paid_current_month = (tot_supplier_invoice_paid_current_month - tot_supplier_refund_paid_current_month).toFixed(2)
-                    var supplier_percentage_current_month = ((supplier_invoice_total_current_month / supplier_invoice_paid_current_month) * 100).toFixed(2)
-
-                    $('#tot_supplier_inv_current_month').attr("value", supplier_invoice_paid_current_month);
-                    $('#tot_supplier_inv_current_month').attr("max", supplier_invoice_total_current_month);
-
-                    $('#tot_invoice_current_month').attr("value", customer_invoice_paid_current_month);
-                    $('#tot_invoice_current_month').attr("max", customer_invoice_total_current_month);
-                    currency = result[8]
-                    customer_invoice_paid_current_month = self.format_currency(currency, customer_invoice_paid_current_month);
-                    customer_invoice_total_current_month = self.format_currency(currency, customer_invoice_total_current_month);
-                    supplier_invoice_paid_current_month = self.format_currency(currency, supplier_invoice_paid_current_month);
-                    supplier_invoice_total_current_month = self.format_currency(currency, supplier_invoice_total_current_month);
-
-                    $('#total_customer_invoice_paid_current_month').append('<div class="logo">' + '<span>' + customer_invoice_paid_current_month + '</span><span>Total Paid<span></div>');
-                    $('#total_customer_invoice_current_month').append('<div" class="logo">' + '<span>' + customer_invoice_total_current_month + '</span><span>Total Invoice<span></div>');
-
-                    $('#total_supplier_invoice_paid_current_month').append('<div" class="logo">' + '<span>' + supplier_invoice_paid_current_month + '</span><span>Total Paid<span></div>');
-                    $('#total_supplier_invoice_current_month').append('<div" class="logo">' + '<span>' + supplier_invoice_total_current_month + '</span><span>Total Invoice<span></div>');
-                })
-                var arg = 'last_month'
-                rpc.query({
-                    model: 'account.move',
-                    method: 'get_latebillss',
-                    args: [posted, arg],
-                }).then(function(result) {
-                    $(document).ready(function() {
-                        var options = {
-                            // legend: false,
-                            responsive: true,
-                            legend: {
-                                position: 'bottom'
-                            }
-                        };
-                        if (window.donuts != undefined)
-                            window.donuts.destroy();
-                        window.donuts = new Chart($("#horizontalbarChart"), {
-                            type: 'doughnut',
-                            tooltipFillColor: "rgba(51, 51, 51, 0.55)",
-                            data: {
-                                labels: result.bill_partner,
-                                datasets: [{
-                                    data: result.bill_amount,
-                                    backgroundColor: [
-                                        '#66aecf ', '#6993d6 ', '#666fcf', '#7c66cf', '#9c66cf',
-                                        '#bc66cf ', '#b75fcc', ' #cb5fbf ', ' #cc5f7f ', ' #cc6260',
-                                        '#cc815f', '#cca15f ', '#ccc25f', '#b9cf66', '#99cf66',
-                                        ' #75cb5f ', '#60cc6c', '#804D8000', '#80B33300', '#80CC80CC', '#f2552c', '#00cccc',
-                                        '#1f2e2e', '#993333', '#00cca3', '#1a1a00', '#3399ff',
-                                        '#8066664D', '#80991AFF', '#808E666FF', '#804DB3FF', '#801AB399',
-                                        '#80E666B3', '#8033991A', '#80CC9999', '#80B3B31A', '#8000E680',
-                                        '#804D8066', '#80809980', '#80E6FF80', '#801AFF33', '#80999933',
-                                        '#80FF3380', '#80CCCC00', '#8066E64D', '#804D80CC', '#809900B3',
-                                        '#80E64D66', '#804DB380', '#80FF4D4D', '#8099E6E6', '#806666FF'
-                                    ],
-                                    hoverBackgroundColor: [
-                                        '#66aecf ', '#6993d6 ', '#666fcf', '#7c66cf', '#9c66cf',
-                                        '#bc66cf ', '#b75fcc', ' #cb5fbf ', ' #cc5f7f ', ' #cc6260',
-                                        '#cc815f', '#cca15f ', '#ccc25f', '#b9cf66', '#99cf66',
-                                        ' #75cb5f ', '#60cc6c', '#804D8000', '#80B33300', '#80CC80CC', '#f2552c', '#00cccc',
-                                        '#1f2e2e', '#993333', '#00cca3', '#1a1a00', '#3399ff',
-                                        '#8066664D', '#80991AFF', '#808E666FF', '#804DB3FF', '#801AB399',
-                                        '#80E666B3', '#8033991A', '#80CC9999', '#80B3B31A', '#8000E680',
-                                        '#804D8066', '#80809980', '#80E6FF80', '#801AFF33', '#80999933',
-                                        '#80FF3380', '#80CCCC00', '#8066E64D', '#804D80CC', '#809900B3',
-                                        '#80E64D66', '#804DB380', '#80FF4D4D', '#8099E6E6', '#806666FF'
-                                    ]
-                                }]
-                            },
-                            options: {
-                                responsive: false
-                            }
-                        });
-                    });
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "get_overdues",
-                }).then(function(result) {
-                    var due_count = 0;
-                    _.forEach(result, function(x) {
-                        due_count++;
-                        $('#overdues').append('<li><a class="overdue_line_cust" href="#" id="line_' + x.parent + '" data-user-id="' + x.parent + '">' + x.due_partner + '</a>' + '&nbsp;&nbsp;&nbsp;&nbsp;' + '<span>' + x.due_amount + ' ' + currency + '</span>' + '</li>');
-                        //$('#overdues_amounts').append('<li><a class="overdue_line_cust" href="#" id="line_' + x.parent + '" data-user-id="' + x.parent + '">' + x.amount + '</a>' + '<span>'+' '+currency+ '</span>' + '</li>' );
-                    });
-                    $('#due_count').append('<span class="badge badge-danger">' + due_count + ' Due(s)</span>');
-                })
-                var f = 'this_month'
-                rpc.query({
-                    model: "account.move",
-                    method: "get_top_10_customers_month",
-                    args: [posted, f]
-                }).then(function(result) {
-                    var due_count = 0;
-                    var amount;
-                    $('#top_10_customers_this_month').empty();
-                    _.forEach(result, function(x) {
-                        $('#top_10_customers_this_month').show();
-                        due_count++;
-                        amount = self.format_currency(currency, x.amount);
-                        $('#top_10_customers_this_month').append('<li><div id="line_' + x.parent + '" data-user-id="' + x.parent + '">' + x.customers + '</div>' + '<div id="line_' + x.parent + '" data-user-id="' + x.parent + '">' + amount + '</div>' + '</li>');
-                        $('#line_' + x.parent).on("click", function() {
-                            self.do_action({
-                                res_model: 'res.partner',
-                                name: _t('Partner'),
-                                views: [
-                                    [false, 'form']
-                                ],
-                                type: 'ir.actions.act_window',
-                                res_id: x.parent,
-                            });
-                        });
-                    });
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "bank_balance",
-                    args: [posted]
-                })
-                .then(function(result) {
-                    var banks = result['banks'];
-                    var amount;
-                    var balance = result['banking'];
-                    var bnk_ids = result['bank_ids'];
-                    for (var k = 0; k < banks.length; k++) {
-                        amount = self.format_currency(currency, balance[k]);
-                        //                                $('#charts').append('<li><a ' + banks[k] + '" data-user-id="' + banks[k] + '">' + banks[k] + '</a>'+  '&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;' + '<span>'+ balance[k] +'</span>' + '</li>' );
-//                        $('#current_bank_balance').empty()
-
-                        $('#current_bank_balance').append('<li><div val="' + bnk_ids[k] + '"id="b_' + bnk_ids[k] + '">' + banks[k] + '</div><div>' + amount + '</div></li>');
-                        //                                $('#current_bank_balance').append('<li>' + banks[k] +'&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;'+ balance[k] +  '</li>' );
-                        $('#drop_charts_balance').append('<li>' + balance[k].toFixed(2) + '</li>');
-                        $('#b_' + bnk_ids[k]).on("click", function(ev) {
-                            self.do_action({
-                                res_model: 'account.account',
-                                name: _t('Account'),
-                                views: [
-                                    [false, 'form']
-                                ],
-                                type: 'ir.actions.act_window',
-                                res_id: parseInt(this.id.replace('b_', '')),
-                            });
-                        });
-                    }
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "get_latebills",
-                }).then(function(result) {
-                    var late_count = 0;
-                    _.forEach(result, function(x) {
-                        late_count++;
-                        $('#latebills').append('<li><a class="overdue_line_cust" href="#" id="line_' + x.parent + '" data-user-id="' + x.parent + '">' + x.partner + '<span>' + x.amount + ' ' + currency + '</span>' + '</a>' + '</li>');
+                });
+            });
+        },
+
+        render_bank_balance: function(result) {
+            var self = this;
+            var banks = result['banks'];
+            var amount;
+            var balance = result['banking'];
+            var bnk_ids = result['bank_ids'];
+            $('#current_bank_balance').empty();
+            for (var k = 0; k < banks.length; k++) {
+                amount = self.format_currency(currency, balance[k]);
+                $('#current_bank_balance').append('<li><div val="' + bnk_ids[k] + '"id="b_' + bnk_ids[k] + '">' + banks[k] + '</div><div>' + amount + '</div></li>');
+                $('#b_' + bnk_ids[k]).on("click", function(ev) {
+                    self.do_action({
+                        res_model: 'account.account',
+                        name: _t('Account'),
+                        views: [
+                            [false, 'form']
+                        ],
+                        type: 'ir.actions.act_window',
+                        res_id: parseInt(this.id.replace('b_', '')),
                     });
-                    $('#late_count').append('<span class="badge badge-danger">' + late_count + ' Late(s)</span>');
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "get_total_invoice",
-                }).then(function(result) {
-                    var total_invoice = result[0].sum;
-                    total_invoice = total_invoice
-                    $('#total_invoice').append('<span>' + total_invoice + ' ' + currency + '</span> ')
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "get_total_invoice_this_month",
-                    args: [posted],
-                }).then(function(result) {
-                    var invoice_this_month = result[0].sum;
-                    if (invoice_this_month) {
-                        var total_invoices_this_month = invoice_this_month.toFixed(2)
-                        $('#total_invoices_').append('<span>' + total_invoices_this_month + ' ' + currency + '</span> <div class="title">This month</div>')
-                    }
-                })
+                });
+            }
+        },
 
-                rpc.query({
-                    model: "account.move",
-                    method: "get_total_invoice_last_month",
-                }).then(function(result) {
-                    var invoice_last_month = result[0].sum;
-                    var total_invoices_last_month = invoice_last_month
-                    $('#total_invoices_last').append('<span>' + total_invoices_last_month + ' ' + currency + '</span><div class="title">Last month</div>')
-                })
-
-                rpc.query({
-                    model: "account.move",
-                    method: "unreconcile_items"
-                }).then(function(result) {
-                    var unreconciled_count = result[0].count;
-                    $('#unreconciled_items').append('<span>' + unreconciled_count + ' Item(s)</a></span> ')
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "unreconcile_items_this_month",
-                    args: [posted],
-                }).then(function(result) {
-                    var unreconciled_counts_ = result[0].count;
-                    $('#unreconciled_items_').empty()
-                    $('#unreconciled_items_').append('<span>' + unreconciled_counts_ + ' Item(s)</span><div class="title">This month</div>')
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "unreconcile_items_this_year",
-                    args: [posted],
-                })
-                .then(function(result) {
-                    var unreconciled_counts_this_year = result[0].count;
-                    $('#unreconciled_counts_this_year').empty()
-                    $('#unreconciled_counts_this_year').append('<span>' + unreconciled_counts_this_year + '  Item(s)</span><div class="title">This Year</div>')
-                    //$('#unreconciled_counts_this_year').append('<span style= "color:#455e7b;">' + unreconciled_counts_this_year + ' Item(s)</span><div class="title">This Year</div>')
-                })
-
-                rpc.query({
-                    model: "account.move",
-                    method: "unreconcile_items_last_year"
-                }).then(function(result) {
-                    var unreconciled_counts_last_year = result[0].count;
-                    $('#unreconciled_counts_last_year').empty()
-                    $('#unreconciled_counts_last_year').append('<span>' + unreconciled_counts_last_year + '  Item(s)</span><div class="title">Last Year</div>')
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "month_income"
-                }).then(function(result) {
-                    var income = result[0].debit - result[0].credit;
-                    income = -income;
-                    income = self.format_currency(currency, income);
-                    $('#total_income').append('<span>' + income + '</span>')
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "month_income_this_month",
-                    args: [posted],
-                }).then(function(result) {
-                    var incomes_ = result[0].debit - result[0].credit;
-                    if (incomes_) {
-                        incomes_ = -incomes_;
-                        incomes_ = self.format_currency(currency, incomes_);
-                        $('#total_incomes_').empty()
-                        $('#total_incomes_').append('<span>' + incomes_ + '</span><div class="title">This month</div>')
-                    } else {
-                        incomes_ = -incomes_;
-                        incomes_ = self.format_currency(currency, incomes_);
-                        $('#total_incomes_').empty()
-                        $('#total_incomes_').append('<span>' + incomes_ + '</span><div class="title">This month</div>')
-                    }
-                })
+        render_cash_forecast: function(result) {
+            var labels = _.map(result.weeks, function(week) {
+                return moment(week).format('DD MMM');
+            });
+            if (window.cash_forecast != undefined)
+                window.cash_forecast.destroy();
+            window.cash_forecast = new Chart(document.getElementById("cash_forecast_chart").getContext('2d'), {
+                type: 'bar',
+                data: {
+                    labels: labels,
+                    datasets: [{
+                            label: 'Receivable',
+                            data: result.receivable,
+                            backgroundColor: '#66aecf',
+                            borderColor: '#66aecf',
+                            borderWidth: 1,
+                            type: 'bar',
+                            fill: false
+                        },
+                        {
+                            label: 'Payable',
+                            data: result.payable,
+                            backgroundColor: '#6993d6',
+                            borderColor: '#6993d6',
+                            borderWidth: 1,
+                            type: 'bar',
+                            fill: false
+                        },
+                        {
+                            label: 'Cash Position',
+                            data: result.balance,
+                            backgroundColor: '#0bd465',
+                            borderColor: '#0bd465',
+                            borderWidth: 1,
+                            type: 'line',
+                            fill: false
+                        }
+                    ]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                }
+            });
+        },
 
-                rpc.query({
-                    model: "account.move",
-                    method: "month_income_last_month"
-                }).then(function(result) {
-                    var incomes_last = result[0].debit - result[0].credit;
-                    incomes_last = -incomes_last;
-                    incomes_last = self.format_currency(currency, incomes_last);
-                    $('#total_incomes_last').append('<span>' + incomes_last + '</span><div class="title">Last month</div>')
-                })
-
-                rpc.query({
-                    model: "account.move",
-                    method: "month_expense"
-                }).then(function(result) {
-                    var expense = result[0].debit - result[0].credit;
-                    var expenses = expense;
-                    expenses = self.format_currency(currency, expenses);
-                    $('#total_expense').append('<span>' + expenses + '</span>')
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "month_expense_this_month",
-                    args: [posted],
-                }).then(function(result) {
-                    var expense_this_month = result[0].debit - result[0].credit;
-                    if (expense_this_month) {
-                        var expenses_this_month_ = expense_this_month;
-                        expenses_this_month_ = self.format_currency(currency, expenses_this_month_);
-                        $('#total_expenses_').empty()
-                        $('#total_expenses_').append('<span>' + expenses_this_month_ + '</span><div class="title">This month</div>')
-                    } else {
-                        var expenses_this_month_ = expense_this_month;
-                        expenses_this_month_ = self.format_currency(currency, expenses_this_month_);
-                        $('#total_expenses_').empty()
-                        $('#total_expenses_').append('<span>' + expenses_this_month_ + '</span><div class="title">This month</div>')
-                    }
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "month_expense_this_year",
-                    args: [posted],
-                }).then(function(result) {
-                    var expense_this_year = result[0].debit - result[0].credit;
-                    if (expense_this_year) {
-                        var expenses_this_year_ = expense_this_year;
-                        expenses_this_year_ = self.format_currency(currency, expenses_this_year_);
-                        $('#total_expense_this_year').empty();
-                        $('#total_expense_this_year').append('<span >' + expenses_this_year_ + '</span><div class="title">This Year</div>')
-                    } else {
-                        var expenses_this_year_ = expense_this_year;
-                        expenses_this_year_ = self.format_currency(currency, expenses_this_year_);
-                        $('#total_expense_this_year').empty();
-                        $('#total_expense_this_year').append('<span >' + expenses_this_year_ + '</span><div class="title">This Year</div>')
-                    }
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "month_income_last_year"
-                }).then(function(result) {
-                    var incomes_last_year = result[0].debit - result[0].credit;
-                    incomes_last_year = -incomes_last_year
-                    incomes_last_year = self.format_currency(currency, incomes_last_year);
-                    $('#total_incomes_last_year').empty();
-                    $('#total_incomes_last_year').append('<span>' + incomes_last_year + '</span><div class="title">Last Year</div>')
-                })
-                rpc.query({
-                    model: "account.move",
-                    method: "month_income_this_year",
-                    args: [posted],
-                }).then(function(result) {
-                    var incomes_this_year = result[0].debit - result[0].credit;
-                    if (incomes_this_year) {
-                        incomes_this_year = -incomes_this_year;
-                        incomes_this_year = self.format_currency(currency, incomes_this_year);
-                        $('#total_incomes_this_year').empty();
-                        $('#total_incomes_this_year').append('<span>' + incomes_this_year + '</span><div class="title">This Year</div>')
-                    } else {
-                        incomes_this_year = -incomes_this_year;
-                        incomes_this_year = self.format_currency(currency, incomes_this_year);
-                        $('#total_incomes_this_year').empty();
-                        $('#total_incomes_this_year').append('<span>' + incomes_this_year + '</span><div class="title">This Year</div>')
-                    }
-                })
+        render_amount: function(target, amount, title) {
+            $(target).empty();
+            $(target).append('<span>' + this.format_currency(currency, amount) + '</span><div class="title">' + title + '</div>');
+        },
 
-                rpc.query({
-                    model: "account.move",
-                    method: "profit_income_this_month",
-                    args: [posted],
-                }).then(function(result) {
-                    var net_profit = true
-                    if (result[1] == undefined) {
-                        result[1] = 0;
-                        if ((result[0]) > (result[1])) {
-                            net_profit = result[1] - result[0]
-                        }
-                    }
-                    if (result[0] == undefined) {
-                        result[0] = 0;
-                    }
-                    if ((-result[1]) > (result[0])) {
-                        net_profit = -result[1] - result[0]
-                    } else if ((result[1]) > (result[0])) {
-                        net_profit = -result[1] - result[0]
-                    } else {
-                        net_profit = -result[1] - result[0]
-                    }
-                    var profit_this_months = net_profit;
-                    if (profit_this_months) {
-                        var net_profit_this_months = profit_this_months;
-                        net_profit_this_months = self.format_currency(currency, net_profit_this_months);
-                        $('#net_profit_current_months').empty();
-                        //$('#net_profit_current_months').append('<div class="title">Net Profit/Loss &nbsp;&nbsp;&nbsp;</div><span>' + net_profit_this_months + '</span>')
-                        $('#net_profit_current_months').append('<span>' + net_profit_this_months + '</span> <div class="title">This Month</div>')
-                    } else {
-                        var net_profit_this_months = profit_this_months;
-                        net_profit_this_months = self.format_currency(currency, net_profit_this_months);
-                        $('#net_profit_current_months').empty();
-                        //$('#net_profit_current_months').append('<div class="title">Net Profit/Loss &nbsp;&nbsp;&nbsp;</div><span>' + net_profit_this_months + '</span>')
-                        $('#net_profit_current_months').append('<span>' + net_profit_this_months + '</span> <div class="title">This Month</div>')
-                    }
-                })
+        render_net_profit: function(target, result, title) {
+            if (result[1] == undefined) {
+                result[1] = 0;
+            }
+            if (result[0] == undefined) {
+                result[0] = 0;
+            }
+            this.render_amount(target, -result[1] - result[0], title);
+        },
 
-                rpc.query({
-                    model: "account.move",
-                    method: "profit_income_this_year",
-                    args: [posted],
-                }).then(function(result) {
-                    var net_profit = true
-                    if (result[1] == undefined) {
-                        result[1] = 0;
-                        if ((result[0]) > (result[1])) {
-                            net_profit = result[1] - result[0]
-                        }
-                    }
-                    if (result[0] == undefined) {
-                        result[0] = 0;
+        render_bundle: function(result) {
+            var self = this;
+            self.dashboard_values = _.extend(self.dashboard_values || {}, result);
+            if (result.computed_at) {
+                var computed_at = field_utils.parse.datetime(result.computed_at, null, {isUTC: true});
+                $('#dashboard_computed_at').text(_t('Updated ') + field_utils.format.datetime(computed_at));
+            }
+            if (result.currency) {
+                currency = result.currency;
+            }
+            if (result.income_this_month) {
+                self.render_income_expense(result.income_this_month, result.income_this_month.date);
+            }
+            if (result.income_last_month) {
+                self.render_income_expense(result.income_last_month, result.income_last_month.date);
+            }
+            if (result.income_this_year) {
+                self.render_income_expense(result.income_this_year, result.income_this_year.month);
+            }
+            if (result.income_last_year) {
+                self.render_income_expense(result.income_last_year, result.income_last_year.month);
+            }
+            _.each(['this_month', 'last_month', 'this_year', 'last_year'], function(period) {
+                var series = result['income_' + period + '_by_company'];
+                if (series) {
+                    self.render_income_by_company(series, series.date || series.month);
+                }
+            });
+            _.each(['overdues_this_month', 'overdues_this_year'], function(tile) {
+                if (result[tile]) {
+                    self.render_overdues(result[tile]);
+                }
+            });
+            _.each(['latebills_this_month', 'latebills_this_year'], function(tile) {
+                if (result[tile]) {
+                    self.render_latebills(result[tile]);
+                }
+            });
+            if (result.total_invoice_current_month) {
+                self.render_invoice_totals(result.total_invoice_current_month, 'current_month');
+            }
+            if (result.total_invoice_current_year) {
+                self.render_invoice_totals(result.total_invoice_current_year, 'current_year');
+            }
+            if (result.top_10_customers_this_month) {
+                self.render_top_10_customers(result.top_10_customers_this_month);
+            }
+            if (result.bank_balance) {
+                self.render_bank_balance(result.bank_balance);
+            }
+            if (result.cash_forecast) {
+                self.render_cash_forecast(result.cash_forecast);
+            }
+            if (result.unreconcile_items_this_month) {
+                $('#unreconciled_items_').empty()
+                $('#unreconciled_items_').append('<span>' + result.unreconcile_items_this_month[0].count + ' Item(s)</span><div class="title">This month</div>')
+            }
+            if (result.unreconcile_items_this_year) {
+                $('#unreconciled_counts_this_year').empty()
+                $('#unreconciled_counts_this_year').append('<span>' + result.unreconcile_items_this_year[0].count + '  Item(s)</span><div class="title">This Year</div>')
+            }
+            if (result.month_income_this_month) {
+                var income = result.month_income_this_month[0];
+                self.render_amount('#total_incomes_', -(income.debit - income.credit), 'This month');
+            }
+            if (result.month_income_this_year) {
+                var income = result.month_income_this_year[0];
+                self.render_amount('#total_incomes_this_year', -(income.debit - income.credit), 'This Year');
+            }
+            if (result.month_expense_this_month) {
+                var expense = result.month_expense_this_month[0];
+                self.render_amount('#total_expenses_', expense.debit - expense.credit, 'This month');
+            }
+            if (result.month_expense_this_year) {
+                var expense = result.month_expense_this_year[0];
+                self.render_amount('#total_expense_this_year', expense.debit - expense.credit, 'This Year');
+            }
+            if (result.profit_income_this_month) {
+                self.render_net_profit('#net_profit_current_months', result.profit_income_this_month, 'This Month');
+            }
+            if (result.profit_income_this_year) {
+                self.render_net_profit('#net_profit_current_year', result.profit_income_this_year, 'This Year');
+            }
+        },
+
+        subscribe_dashboard: function() {
+            // the changes are sent on the channel of the partner of the user
+            this.call('bus_service', 'onNotification', this, this.on_dashboard_notification);
+            this.call('bus_service', 'startPolling');
+        },
+
+        on_dashboard_notification: function(notifications) {
+            var self = this;
+            var tiles = {};
+            _.each(notifications, function(notification) {
+                if (notification.type !== 'account_dashboard/delta' ||
+                        !_.contains(session.user_context.allowed_company_ids, notification.payload.company_id)) {
+                    return;
+                }
+                _.each(notification.payload.deltas, function(delta) {
+                    if (self.get_posted() === 'posted' && delta.parent_state !== 'posted') {
+                        return;
                     }
-                    if ((-result[1]) > (result[0])) {
-                        net_profit = -result[1] - result[0]
-                    } else if ((result[1]) > (result[0])) {
-                        net_profit = -result[1] - result[0]
-                    } else {
-                        net_profit = -result[1] - result[0]
+                    delta = _.extend({company_id: notification.payload.company_id}, delta);
+                    _.extend(tiles, self.apply_delta(delta));
+                });
+            });
+            if (!_.isEmpty(tiles)) {
+                if (window.myCharts != undefined) {
+                    window.myCharts.update();
+                }
+                self.render_bundle(_.pick(self.dashboard_values, _.keys(tiles)));
+            }
+        },
+
+        apply_delta: function(delta) {
+            // patch the values shown on the dashboard, return the tiles to render again
+            var values = this.dashboard_values || {};
+            var date = moment(delta.date);
+            var periods = {
+                this_month: date.isSame(moment(), 'month'),
+                last_month: date.isSame(moment().subtract(1, 'months'), 'month'),
+                this_year: date.isSame(moment(), 'year'),
+                last_year: date.isSame(moment().subtract(1, 'years'), 'year'),
+            };
+            var tiles = {};
+            if (delta.internal_group === 'unreconciled') {
+                _.each(['this_month', 'this_year'], function(period) {
+                    var tile = 'unreconcile_items_' + period;
+                    if (periods[period] && values[tile]) {
+                        values[tile][0].count += delta.count;
+                        tiles[tile] = true;
                     }
-                    var profit_this_year = net_profit;
-                    if (profit_this_year) {
-                        var net_profit_this_year = profit_this_year;
-                        net_profit_this_year = self.format_currency(currency, net_profit_this_year);
-                        $('#net_profit_current_year').empty();
-                        //                                $('#net_profit_this_year').append('<div class="title">Net Profit/Loss &nbsp;&nbsp;&nbsp;</div><span>' + net_profit_this_year + '</span>')
-                        $('#net_profit_current_year').append('<span>' + net_profit_this_year + '</span> <div class="title">This Year</div>')
+                });
+                return tiles;
+            }
+            var amount = delta.debit - delta.credit;
+            var income_tile = $('#income_expense_values').val() || 'income_this_month';
+            if (periods[income_tile.replace('income_', '')] && window.myCharts != undefined) {
+                var datasets = window.myCharts.data.datasets;
+                var index = income_tile.endsWith('month') ? date.date() - 1 : date.month();
+                if ($('#compare_companies').prop('checked')) {
+                    // the profit of the company and the consolidated line
+                    _.each(datasets, function(dataset) {
+                        if (dataset.company_id === undefined || dataset.company_id === delta.company_id) {
+                            dataset.data[index] -= amount;
+                        }
+                    });
+                }
+                else {
+                    if (delta.internal_group === 'income') {
+                        datasets[0].data[index] -= amount;
                     } else {
-                        var net_profit_this_year = profit_this_year;
-                        net_profit_this_year = self.format_currency(currency, net_profit_this_year);
-                        $('#net_profit_current_year').empty();
-                        //$('#net_profit_this_year').append('<div class="title">Net Profit/Loss &nbsp;&nbsp;&nbsp;</div><span>' + net_profit_this_year + '</span>')
-                        $('#net_profit_current_year').append('<span>' + net_profit_this_year + '</span> <div class="title">This Year</div>')
+                        datasets[1].data[index] += amount;
                     }
-                })
+                    datasets[2].data[index] = datasets[0].data[index] - datasets[1].data[index];
+                }
+            }
+            _.each(['this_month', 'this_year'], function(period) {
+                if (!periods[period]) {
+                    return;
+                }
+                var tile = 'month_' + delta.internal_group + '_' + period;
+                if (values[tile]) {
+                    values[tile][0].debit = (values[tile][0].debit || 0) + delta.debit;
+                    values[tile][0].credit = (values[tile][0].credit || 0) + delta.credit;
+                    tiles[tile] = true;
+                }
+                tile = 'profit_income_' + period;
+                if (values[tile]) {
+                    values[tile][0] = (values[tile][0] || 0) + amount;
+                    tiles[tile] = true;
+                }
+            });
+            return tiles;
+        },
+
+        load_bundle: function(tiles) {
+            var self = this;
+            return rpc.query({
+                model: "account.move",
+                method: "get_dashboard_bundle",
+                args: [tiles, self.get_posted()],
+                kwargs: {parallel: self.parallel_bundle},
+            }).then(function(result) {
+                self.render_bundle(result);
+            });
+        },
+
+        renderElement: function(ev) {
+            var self = this;
+            $.when(this._super())
+            .then(function(ev) {
+                $('#toggle-two').bootstrapToggle({
+                    on: 'View All Entries',
+                    off: 'View Posted Entries'
+                });
+                if ((session.user_context.allowed_company_ids || []).length < 2) {
+                    $('.o_compare_companies').addClass('d-none');
+                }
+                self.load_bundle([
+                    'currency',
+                    'income_this_month',
+                    'overdues_this_month',
+                    'total_invoice_current_month',
+                    'latebills_this_year',
+                    'top_10_customers_this_month',
+                    'bank_balance',
+                    'cash_forecast',
+                    'unreconcile_items_this_month',
+                    'unreconcile_items_this_year',
+                    'month_income_this_month',
+                    'month_income_this_year',
+                    'month_expense_this_month',
+                    'month_expense_this_year',
+                    'profit_income_this_month',
+                    'profit_income_this_year',
+                ]);
+                self.subscribe_dashboard();
             });
         },
 
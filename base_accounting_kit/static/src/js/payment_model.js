@@ -218,7 +218,7 @@ var StatementModel = BasicModel.extend({
      */
     changeOffset: function (handle) {
         var line = this.getLine(handle);
-        return this._performMoveLine(handle, line.mode);
+        return this._performMoveLine(handle, line.mode, undefined, true);
     },
     /**
      * change the partner on the line and fetch the new matched lines
@@ -1355,22 +1355,31 @@ var StatementModel = BasicModel.extend({
      *
      * @private
      * @param {string} handle
+     * @param {string} mode
+     * @param {integer} [limit]
+     * @param {boolean} [next] fetch the page after the loaded lines
      * @returns {Promise}
      */
-    _performMoveLine: function (handle, mode, limit) {
+    _performMoveLine: function (handle, mode, limit, next) {
+        var self = this;
         limit = limit || this.limitMoveLines;
         var line = this.getLine(handle);
         var excluded_ids = _.map(_.union(line.reconciliation_proposition, line.mv_lines_match_rp, line.mv_lines_match_other), function (prop) {
             return _.isNumber(prop.id) ? prop.id : null;
         }).filter(id => id != null);
         var filter = line['filter_'+mode] || "";
+        var token = next && line['token_'+mode] || false;
         return this._rpc({
                 model: 'account.reconciliation.widget',
-                method: 'get_move_lines_for_bank_statement_line',
-                args: [line.id, line.st_line.partner_id, excluded_ids, filter, 0, limit, mode === 'match_rp' ? 'rp' : 'other'],
+                method: 'get_move_lines_page_for_bank_statement_line',
+                args: [line.id, line.st_line.partner_id, excluded_ids, filter, limit, mode === 'match_rp' ? 'rp' : 'other', token],
                 context: this.context,
             })
-            .then(this._formatMoveLine.bind(this, handle, mode));
+            .then(function (result) {
+                // continuation token of the next page, false on the last one
+                line['token_'+mode] = result.token;
+                return self._formatMoveLine(handle, mode, result.lines);
+            });
     },
     /**
      * format the proposition to send information server side
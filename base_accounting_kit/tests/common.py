@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+class AccountDashboardTestCommon(AccountTestInvoicingCommon):
+    """Common base of the tests of the dashboard tables only ever appended
+    to: the rows added on every change of the journal items must sum up to
+    the rows regenerated from scratch."""
+
+    # name of the dashboard model under test
+    dashboard_model = None
+
+    def setUp(self):
+        super(AccountDashboardTestCommon, self).setUp()
+        self.dashboard = self.env[self.dashboard_model]
+        self.dashboard._rebuild()
+
+    def _get_totals(self):
+        """Sums of the rows of the table, per key."""
+        raise NotImplementedError()
+
+    def _count_rows(self):
+        self.env.cr.execute("SELECT COUNT(*) FROM " + self.dashboard._table)
+        return self.env.cr.fetchone()[0]
+
+    def assertRebuilt(self):
+        totals = self._get_totals()
+        self.dashboard._rebuild()
+        self.assertEqual(totals, self._get_totals())
+
+    def _create_entry(self, amount, receivable_side='debit'):
+        revenue_side = receivable_side == 'debit' and 'credit' or 'debit'
+        return self.env['account.move'].create({
+            'move_type': 'entry',
+            'date': fields.Date.from_string('2021-01-15'),
+            'line_ids': [
+                (0, 0, {
+                    'account_id': self.company_data['default_account_receivable'].id,
+                    'partner_id': self.partner_a.id,
+                    receivable_side: amount,
+                }),
+                (0, 0, {
+                    'account_id': self.company_data['default_account_revenue'].id,
+                    revenue_side: amount,
+                }),
+            ],
+        })
+
+    def _get_notified_deltas(self, internal_group):
+        """Changes of the given group sent to the dashboards when the
+        transaction is committed."""
+        self.env['base'].flush()
+        with patch.object(type(self.env['bus.bus']), '_sendmany') as sendmany:
+            self.env.cr.precommit.run()
+        return [delta
+                for notifications in sendmany.call_args_list
+                for notification in notifications[0][0]
+                for delta in notification[2]['deltas']
+                if delta['internal_group'] == internal_group]
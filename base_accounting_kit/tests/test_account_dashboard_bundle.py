@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from psycopg2.pool import PoolError
+
+from odoo import fields
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.tests import tagged
+from odoo.tools import date_utils
+
+from ..models import account_dashboard_snapshot
+from ..models.account_dashboard import DASHBOARD_ALL_COMPANY_TILES, \
+    DASHBOARD_LANG_TILES, DASHBOARD_TILES, dashboard_cache
+
+
+@tagged('post_install', '-at_install')
+class TestAccountDashboardBundle(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super(TestAccountDashboardBundle, cls).setUpClass(
+            chart_template_ref=chart_template_ref)
+        # the tiles are based on the current month and year
+        today = fields.Date.today()
+        cls.init_invoice('out_invoice', invoice_date=today, amounts=[100.0],
+                         post=True)
+        cls.init_invoice('out_invoice', invoice_date=today, amounts=[40.0])
+        cls.init_invoice('in_invoice', invoice_date=today, amounts=[25.0],
+                         post=True)
+
+    def setUp(self):
+        super(TestAccountDashboardBundle, self).setUp()
+        self.moves = self.env['account.move']
+        dashboard_cache.invalidate(self.env.cr.dbname,
+                                   self.moves.get_current_company_value())
+
+    def _get_tile(self, tile, state):
+        """Value of the tile returned by its own method, as called by the
+        dashboard before the bundle."""
+        method, with_state, args = DASHBOARD_TILES[tile]
+        if with_state:
+            args = (state,) + args
+        return getattr(self.moves, method)(*args)
+
+    def _get_bundle(self, tiles, state):
+        result = self.moves.get_dashboard_bundle(tiles, state)
+        self.assertIn('computed_at', result)
+        del result['computed_at']
+        return result
+
+    def test_bundle(self):
+        for state in ('posted', False):
+            expected = {tile: self._get_tile(tile, state)
+                        for tile in DASHBOARD_TILES}
+            self.assertEqual(self._get_bundle(list(DASHBOARD_TILES), state),
+                             expected)
+            # second call served by the cache
+            self.assertEqual(self._get_bundle(list(DASHBOARD_TILES), state),
+                             expected)
+
+    def test_parallel(self):
+        tiles = list(DASHBOARD_TILES)
+        expected = {tile: self._get_tile(tile, 'posted') for tile in tiles}
+        registry = type(self.env.registry)
+        # the bundle is computed on the cursor of the test
+        with patch.object(registry, 'cursor', side_effect=AssertionError):
+            result = self.moves.get_dashboard_bundle(tiles, 'posted',
+                                                     parallel=True)
+        del result['computed_at']
+        self.assertEqual(result, expected)
+        # the tiles are computed on the current cursor when the pool of
+        # connections is exhausted
+        with patch.object(registry, 'cursor', side_effect=PoolError):
+            self.assertEqual(self.moves.with_context(
+                dashboard_company_ids=self.moves.get_current_company_value(),
+            )._compute_dashboard_tiles_parallel(tiles, 'posted'), expected)
+
+    def test_cache_invalidation(self):
+        tile = 'income_this_year'
+        before = self._get_bundle([tile], 'posted')[tile]
+        invoice = self.init_invoice('out_invoice',
+                                    invoice_date=fields.Date.today(),
+                                    amounts=[60.0], post=True)
+        invoice.flush()
+        # the cached tiles are dropped when the transaction is committed
+        self.env.cr.postcommit.run()
+        after = self._get_bundle([tile], 'posted')[tile]
+        self.assertEqual(after, self._get_tile(tile, 'posted'))
+        self.assertNotEqual(before, after)
+
+    def _prewarm(self, margin=timedelta(0)):
+        """Compute the snapshots as the scheduled action does, on the
+        transaction of the test: its items are written at the start of the
+        same transaction, they count as changed within any margin."""
+        with patch.object(type(self.env.cr), 'commit', lambda cr: None), \
+                patch.object(account_dashboard_snapshot, 'SNAPSHOT_MARGIN',
+                             margin):
+            self.env['account.dashboard.snapshot']._cron_prewarm()
+
+    def test_snapshot(self):
+        snapshots = self.env['account.dashboard.snapshot']
+        self._prewarm()
+        company_ids = self.moves.get_current_company_value()
+        for state in ('posted', False):
+            values, computed_at = snapshots._get_snapshot(company_ids, state)
+            self.assertTrue(computed_at)
+            tiles = [tile for tile in DASHBOARD_TILES
+                     if tile not in DASHBOARD_LANG_TILES
+                     and tile not in DASHBOARD_ALL_COMPANY_TILES]
+            self.assertEqual(sorted(values), sorted(tiles))
+            expected = json.loads(json.dumps(
+                {tile: self._get_tile(tile, state) for tile in tiles},
+                default=date_utils.json_default))
+            self.assertEqual(self._get_bundle(tiles, state), expected)
+
+    def test_snapshot_margin(self):
+        self._prewarm(margin=timedelta(minutes=10))
+        snapshots = self.env['account.dashboard.snapshot']
+        company_ids = self.moves.get_current_company_value()
+        self.assertEqual(snapshots._get_snapshot(company_ids, 'posted'),
+                         ({}, False))
+
+    def test_snapshot_deletion(self):
+        invoice = self.init_invoice('out_invoice',
+                                    invoice_date=fields.Date.today(),
+                                    amounts=[60.0])
+        self._prewarm()
+        snapshots = self.env['account.dashboard.snapshot']
+        company_ids = self.moves.get_current_company_value()
+        self.assertTrue(snapshots._get_snapshot(company_ids, False)[1])
+        invoice.unlink()
+        self.assertEqual(snapshots._get_snapshot(company_ids, False),
+                         ({}, False))
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo.tests import tagged
+
+from ..models.account_dashboard_monthly import dashboard_savepoint
+from .common import AccountDashboardTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestAccountDashboardMonthly(AccountDashboardTestCommon):
+
+    dashboard_model = 'account.dashboard.monthly'
+
+    def _get_totals(self):
+        self.env['base'].flush()
+        self.env.cr.execute("""
+            SELECT company_id, internal_group, parent_state, month,
+                   ROUND(SUM(debit)::numeric, 2), ROUND(SUM(credit)::numeric, 2)
+            FROM account_dashboard_monthly
+            GROUP BY company_id, internal_group, parent_state, month
+            HAVING ROUND(SUM(debit)::numeric, 2) != 0
+                OR ROUND(SUM(credit)::numeric, 2) != 0
+        """)
+        return {row[:4]: row[4:] for row in self.env.cr.fetchall()}
+
+    def test_create_and_post(self):
+        self.init_invoice('out_invoice', amounts=[100.0], post=True)
+        self.init_invoice('in_invoice', amounts=[40.0])
+        self.assertRebuilt()
+
+    def test_write_amounts(self):
+        invoice = self.init_invoice('out_invoice', amounts=[100.0])
+        invoice.write({'invoice_line_ids': [
+            (1, invoice.invoice_line_ids.id, {'price_unit': 250.0}),
+        ]})
+        self.assertRebuilt()
+        entry = self._create_entry(80.0)
+        entry.line_ids.with_context(check_move_validity=False).write({
+            'debit': 0.0, 'credit': 0.0})
+        self.assertRebuilt()
+
+    def test_write_date_and_state(self):
+        entry = self._create_entry(60.0)
+        entry.write({'date': fields.Date.from_string('2021-03-10')})
+        self.assertRebuilt()
+        entry.action_post()
+        self.assertRebuilt()
+        entry.button_draft()
+        self.assertRebuilt()
+
+    def test_write_unchanged(self):
+        entry = self._create_entry(60.0)
+        self.env['base'].flush()
+        rows = self._count_rows()
+        line = entry.line_ids.filtered('credit')
+        line.write({'account_id': line.account_id.id})
+        self.env['base'].flush()
+        self.assertEqual(rows, self._count_rows())
+
+    def test_unlink(self):
+        invoice = self.init_invoice('out_invoice', amounts=[100.0, 30.0])
+        invoice.write({'invoice_line_ids': [
+            (2, invoice.invoice_line_ids[0].id),
+        ]})
+        self.assertRebuilt()
+        invoice.unlink()
+        self.assertRebuilt()
+
+    def test_reconcile(self):
+        invoice = self.init_invoice('out_invoice', amounts=[100.0], post=True)
+        self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=invoice.ids,
+        ).create({})._create_payments()
+        self.assertRebuilt()
+
+    def test_savepoint_rollback(self):
+        with self.assertRaises(ValueError):
+            with dashboard_savepoint(self.env.cr):
+                self._create_entry(100.0)
+                self.env['base'].flush()
+                raise ValueError()
+        self._create_entry(60.0)
+        # only the changes of the entry created outside of the savepoint
+        credits = [delta['credit']
+                   for delta in self._get_notified_deltas('income')]
+        self.assertTrue(credits)
+        self.assertEqual(set(credits), {60.0})
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import fields
+from odoo.tests import tagged
+from odoo.tools import mute_logger
+
+from ..models.account_dashboard_monthly import dashboard_savepoint
+from .common import AccountDashboardTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestAccountDashboardUnreconciled(AccountDashboardTestCommon):
+
+    dashboard_model = 'account.dashboard.unreconciled'
+
+    def _get_totals(self):
+        self.env['base'].flush()
+        self.env.cr.execute("""
+            SELECT company_id, account_id, parent_state, month, SUM(count)
+            FROM account_dashboard_unreconciled
+            GROUP BY company_id, account_id, parent_state, month
+            HAVING SUM(count) != 0
+        """)
+        return {row[:4]: row[4] for row in self.env.cr.fetchall()}
+
+    def test_create_and_post(self):
+        self.init_invoice('out_invoice', amounts=[100.0], post=True)
+        self.init_invoice('in_invoice', amounts=[40.0])
+        self.assertRebuilt()
+
+    def test_write_amounts(self):
+        entry = self._create_entry(80.0)
+        entry.line_ids.with_context(check_move_validity=False).write({
+            'debit': 0.0, 'credit': 0.0})
+        self.assertRebuilt()
+        entry.line_ids[0].with_context(check_move_validity=False).write({
+            'debit': 20.0})
+        self.assertRebuilt()
+
+    def test_write_date_and_state(self):
+        entry = self._create_entry(60.0)
+        entry.write({'date': fields.Date.from_string('2021-03-10')})
+        self.assertRebuilt()
+        entry.action_post()
+        self.assertRebuilt()
+        entry.button_draft()
+        self.assertRebuilt()
+
+    def test_write_unchanged(self):
+        entry = self._create_entry(60.0)
+        self.env['base'].flush()
+        rows = self._count_rows()
+        line = entry.line_ids.filtered('debit')
+        line.write({'account_id': line.account_id.id})
+        self.env['base'].flush()
+        self.assertEqual(rows, self._count_rows())
+
+    def test_unlink(self):
+        entry = self._create_entry(60.0)
+        entry.unlink()
+        self.assertRebuilt()
+
+    def test_reconcile(self):
+        invoice = self.init_invoice('out_invoice', amounts=[100.0], post=True)
+        entry = self._create_entry(100.0, receivable_side='credit')
+        entry.action_post()
+        self.assertRebuilt()
+        lines = (invoice + entry).line_ids.filtered(
+            lambda line: line.account_id.reconcile)
+        lines.reconcile()
+        self.assertTrue(lines.full_reconcile_id)
+        self.assertRebuilt()
+        lines.remove_move_reconcile()
+        self.assertRebuilt()
+
+    def test_unlink_full_reconcile(self):
+        invoice = self.init_invoice('out_invoice', amounts=[100.0], post=True)
+        entry = self._create_entry(100.0, receivable_side='credit')
+        entry.action_post()
+        lines = (invoice + entry).line_ids.filtered(
+            lambda line: line.account_id.reconcile)
+        lines.reconcile()
+        totals = self._get_totals()
+        lines.full_reconcile_id.unlink()
+        self.assertFalse(lines.full_reconcile_id)
+        self.assertRebuilt()
+        self.assertNotEqual(totals, self._get_totals())
+
+    def test_toggle_reconcile(self):
+        revenue = self.company_data['default_account_revenue']
+        entry = self._create_entry(60.0)
+        key = (self.env.company.id, revenue.id, 'draft',
+               fields.Date.from_string('2021-01-01'))
+        self.assertNotIn(key, self._get_totals())
+        revenue.reconcile = True
+        self.assertEqual(self._get_totals().get(key), 1)
+        self.assertRebuilt()
+        entry.unlink()
+        revenue.reconcile = False
+        self.assertRebuilt()
+
+    def test_notifications(self):
+        self._get_notified_deltas('unreconciled')
+        entry = self._create_entry(60.0)
+        self.assertEqual(self._get_notified_deltas('unreconciled'), [{
+            'internal_group': 'unreconciled',
+            'parent_state': 'draft',
+            'date': '2021-01-01',
+            'count': 1,
+        }])
+        entry.action_post()
+        deltas = self._get_notified_deltas('unreconciled')
+        self.assertEqual(
+            {delta['parent_state']: delta['count'] for delta in deltas},
+            {'draft': -1, 'posted': 1})
+
+    @mute_logger('odoo.addons.base_accounting_kit.models.'
+                 'account_dashboard_unreconciled')
+    def test_cron_check(self):
+        self._create_entry(60.0).action_post()
+        totals = self._get_totals()
+        # the rows added since the last check are merged
+        self.dashboard._cron_check()
+        self.assertEqual(self._get_totals(), totals)
+        self.assertEqual(self._count_rows(), len(totals))
+        # the wrong counters are fixed
+        self.env.cr.execute("""
+            INSERT INTO account_dashboard_unreconciled
+                (company_id, account_id, parent_state, month, count)
+            VALUES (%s, %s, 'posted', '2021-01-01', 5)
+        """, (self.env.company.id,
+              self.company_data['default_account_receivable'].id))
+        self.assertNotEqual(self._get_totals(), totals)
+        self.dashboard._cron_check()
+        self.assertEqual(self._get_totals(), totals)
+
+    def test_savepoint_rollback(self):
+        self._get_notified_deltas('unreconciled')
+        with self.assertRaises(ValueError):
+            with dashboard_savepoint(self.env.cr):
+                self._create_entry(100.0)
+                self.env['base'].flush()
+                raise ValueError()
+        self._create_entry(60.0)
+        # only the item of the entry created outside of the savepoint
+        self.assertEqual(
+            [delta['count']
+             for delta in self._get_notified_deltas('unreconciled')], [1])
+        self.assertRebuilt()
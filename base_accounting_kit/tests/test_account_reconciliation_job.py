@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.tests import tagged
+from odoo.tools import mute_logger
+
+
+@tagged('post_install', '-at_install')
+class TestAccountReconciliationJob(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super(TestAccountReconciliationJob, cls).setUpClass(
+            chart_template_ref=chart_template_ref)
+        journal = cls.company_data['default_journal_bank']
+        cls.statement = cls.env['account.bank.statement'].create({
+            'name': 'Statement',
+            'journal_id': journal.id,
+            'date': fields.Date.from_string('2019-01-31'),
+            'line_ids': [(0, 0, {
+                'date': fields.Date.from_string('2019-01-31'),
+                'payment_ref': 'Line %s' % index,
+                'amount': 10.0 * (index + 1),
+            }) for index in range(3)],
+        })
+        cls.st_lines = cls.statement.line_ids.sorted('id')
+        cls.job = cls.env['account.reconciliation.job'].create({
+            'journal_id': journal.id,
+            'chunk_size': 1,
+        })
+
+    def _process(self, reconcile=None):
+        """Run the job as the cron does, the chunks being committed on the
+        transaction of the test."""
+        Job = type(self.job)
+        with patch.object(type(self.env.cr), 'commit', lambda cr: None):
+            if reconcile:
+                with patch.object(Job, '_reconcile_statement_lines',
+                                  reconcile):
+                    self.job._process()
+            else:
+                self.job._process()
+
+    def test_process(self):
+        self.job.action_queue()
+        self.assertEqual(self.job.state, 'queued')
+        self.assertEqual(self.job.line_count, 3)
+        self._process()
+        self.assertEqual(self.job.state, 'done')
+        self.assertEqual(self.job.processed_count, 3)
+        self.assertEqual(self.job.last_st_line_id, self.st_lines[-1].id)
+
+    @mute_logger('odoo.addons.base_accounting_kit.models.'
+                 'account_reconciliation_job')
+    def test_resume_after_failure(self):
+        processed = []
+
+        def reconcile(job, st_lines):
+            if len(processed) == 1:
+                raise ValueError("Interrupted")
+            processed.extend(st_lines.ids)
+            return len(st_lines)
+
+        self.job.action_queue()
+        self._process(reconcile)
+        self.assertEqual(self.job.state, 'failed')
+        self.assertEqual(self.job.processed_count, 1)
+        self.assertEqual(self.job.reconciled_count, 1)
+        self.assertEqual(self.job.last_st_line_id, self.st_lines[0].id)
+
+        # resumed after its checkpoint
+        self.job.action_queue()
+        self.assertEqual(self.job.line_count, 3)
+        self._process(lambda job, st_lines: processed.extend(
+            st_lines.ids) or len(st_lines))
+        self.assertEqual(self.job.state, 'done')
+        self.assertEqual(self.job.processed_count, 3)
+        self.assertEqual(self.job.reconciled_count, 3)
+        self.assertEqual(processed, self.st_lines.ids)
+
+    def test_cancel_running(self):
+        processed = []
+
+        def reconcile(job, st_lines):
+            processed.extend(st_lines.ids)
+            job.action_cancel()
+            # the job is left to the cron until the end of the chunk
+            self.assertEqual(job.state, 'running')
+            self.assertTrue(job.cancel_requested)
+            return 0
+
+        self.job.action_queue()
+        self._process(reconcile)
+        self.assertEqual(self.job.state, 'draft')
+        self.assertFalse(self.job.cancel_requested)
+        self.assertEqual(processed, self.st_lines[:1].ids)
+        self.assertEqual(self.job.last_st_line_id, self.st_lines[0].id)
+
+        self.job.action_queue()
+        self._process(lambda job, st_lines: processed.extend(
+            st_lines.ids) or 0)
+        self.assertEqual(self.job.state, 'done')
+        self.assertEqual(processed, self.st_lines.ids)
+
+    def test_cancel_queued(self):
+        self.job.action_queue()
+        self.job.action_cancel()
+        self.assertEqual(self.job.state, 'draft')
+        self.assertFalse(self.job.cancel_ids)
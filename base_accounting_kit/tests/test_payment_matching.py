@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import datetime
+
+from odoo import fields
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+
+@tagged('post_install', '-at_install')
+class TestPaymentMatching(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super(TestPaymentMatching, cls).setUpClass(
+            chart_template_ref=chart_template_ref)
+        cls.widget = cls.env['account.reconciliation.widget']
+        cls.invoices = cls.env['account.move']
+        for amount in (100.0, 50.0, 100.0, 70.0, 30.0):
+            cls.invoices += cls.init_invoice('out_invoice', amounts=[amount],
+                                             post=True)
+        cls.statement = cls.env['account.bank.statement'].create({
+            'name': 'Statement',
+            'journal_id': cls.company_data['default_journal_bank'].id,
+            'date': fields.Date.from_string('2019-01-31'),
+            'line_ids': [(0, 0, {
+                'date': fields.Date.from_string('2019-01-31'),
+                'payment_ref': 'Payment',
+                'partner_id': cls.partner_a.id,
+                'amount': 100.0,
+            })],
+        })
+        cls.st_line = cls.statement.line_ids
+
+    def _get_receivable_line(self, invoice):
+        return invoice.line_ids.filtered(
+            lambda line: line.account_id.internal_type == 'receivable')
+
+    def test_token_round_trip(self):
+        key = (True, datetime.date(2019, 1, 31), 42)
+        token = self.widget._encode_move_lines_token(key)
+        self.assertEqual(self.widget._decode_move_lines_token(token),
+                         [True, '2019-01-31', 42])
+        with self.assertRaises(UserError):
+            self.widget._decode_move_lines_token('not a token')
+
+    def test_pages(self):
+        full = self.widget.get_move_lines_page_for_bank_statement_line(
+            self.st_line.id, mode='rp')
+        self.assertFalse(full['token'])
+        expected_ids = [line['id'] for line in full['lines']]
+        self.assertEqual(len(expected_ids), len(self.invoices))
+        # the items of the amount of the statement line come first
+        self.assertEqual(
+            sorted(expected_ids[:2]),
+            sorted(self._get_receivable_line(
+                self.invoices[0] + self.invoices[2]).ids))
+
+        page_ids = []
+        token = False
+        while True:
+            page = self.widget.get_move_lines_page_for_bank_statement_line(
+                self.st_line.id, limit=2, mode='rp', token=token)
+            self.assertEqual(page['count'], len(expected_ids))
+            self.assertLessEqual(len(page['lines']), 2)
+            page_ids += [line['id'] for line in page['lines']]
+            token = page['token']
+            if not token:
+                break
+        self.assertEqual(page_ids, expected_ids)
+
+    def test_pages_other_account(self):
+        # an item of the amount due earlier, on an account of the other mode
+        account = self.company_data['default_account_revenue'].copy({
+            'code': 'OTHER', 'reconcile': True})
+        self.env['account.move'].create({
+            'move_type': 'entry',
+            'date': fields.Date.from_string('2018-01-01'),
+            'line_ids': [
+                (0, 0, {'account_id': account.id,
+                        'partner_id': self.partner_a.id,
+                        'debit': 100.0,
+                        'date_maturity': fields.Date.from_string('2018-01-01')}),
+                (0, 0, {'account_id': self.company_data['default_account_expense'].id,
+                        'credit': 100.0}),
+            ],
+        }).action_post()
+        page = self.widget.get_move_lines_page_for_bank_statement_line(
+            self.st_line.id, limit=1, mode='rp')
+        self.assertIn(page['lines'][0]['id'], self._get_receivable_line(
+            self.invoices[0] + self.invoices[2]).ids)
+
+    def test_create_writeoffs(self):
+        AccountMoveLine = self.env['account.move.line']
+        expense = self.company_data['default_account_expense']
+        journal = self.company_data['default_journal_misc']
+        groups = [self._get_receivable_line(invoice)
+                  for invoice in self.invoices[:2]]
+        writeoff_lines = AccountMoveLine._create_writeoffs([
+            (lines, [{'account_id': expense.id, 'journal_id': journal.id}])
+            for lines in groups
+        ])
+        self.assertEqual(len(writeoff_lines), len(groups))
+        for lines, writeoff_line in zip(groups, writeoff_lines):
+            self.assertEqual(len(writeoff_line), 1)
+            self.assertEqual(writeoff_line.account_id, lines.account_id)
+            self.assertEqual(writeoff_line.move_id.state, 'posted')
+            self.assertAlmostEqual(writeoff_line.balance,
+                                   -lines.amount_residual)
+            (lines + writeoff_line).reconcile()
+            self.assertTrue(lines.reconciled)
+        # same entries as the write-off of a single group
+        single_line = self._get_receivable_line(self.invoices[2])._create_writeoff(
+            [{'account_id': expense.id, 'journal_id': journal.id}])
+        self.assertEqual(
+            sorted(single_line.move_id.line_ids.mapped(
+                lambda line: (line.account_id.id, line.debit, line.credit))),
+            sorted(writeoff_lines[0].move_id.line_ids.mapped(
+                lambda line: (line.account_id.id, line.debit, line.credit))))
+
+    def test_detected_partner(self):
+        partner = self.env['res.partner'].create({
+            'name': 'Detected Partner SA',
+            'bank_ids': [(0, 0, {'acc_number': 'BE68 5390 0754 7034'})],
+        })
+        # contacts are never detected, only commercial partners
+        self.env['res.partner'].create({
+            'name': 'Contact Partner', 'parent_id': partner.id})
+        statement = self.env['account.bank.statement'].create({
+            'name': 'Statement',
+            'journal_id': self.company_data['default_journal_bank'].id,
+            'date': fields.Date.from_string('2019-01-31'),
+            'line_ids': [(0, 0, dict(
+                vals, date=fields.Date.from_string('2019-01-31'),
+                payment_ref=ref, amount=10.0,
+            )) for ref, vals in [
+                ('number', {'account_number': 'be68539007547034'}),
+                ('name', {'partner_name': ' detected partner sa '}),
+                ('contact', {'partner_name': 'Contact Partner'}),
+                ('unknown', {'partner_name': 'Unknown'}),
+                ('bank', {'account_number': 'BE71 0961 2345 6769'}),
+                ('partner', {'partner_id': self.partner_a.id,
+                             'partner_name': 'Detected Partner SA'}),
+            ]],
+        })
+        lines = {line.payment_ref: line for line in statement.line_ids}
+        self.assertEqual(lines['number'].detected_partner_id, partner)
+        self.assertEqual(lines['name'].detected_partner_id, partner)
+        self.assertFalse(lines['contact'].detected_partner_id)
+        self.assertFalse(lines['unknown'].detected_partner_id)
+        self.assertFalse(lines['bank'].detected_partner_id)
+        partners = self.widget._get_bank_statement_line_partners(
+            statement.line_ids)
+        self.assertEqual(partners[lines['number'].id], partner.id)
+        self.assertIsNone(partners[lines['unknown'].id])
+        # the partner of the line comes before the detected one
+        self.assertEqual(partners[lines['partner'].id], self.partner_a.id)
+        # partners and bank accounts created after the import are found too
+        unknown = self.env['res.partner'].create({'name': 'Unknown'})
+        self.env['res.partner.bank'].create({
+            'acc_number': 'BE71 0961 2345 6769', 'partner_id': self.partner_b.id})
+        partners = self.widget._get_bank_statement_line_partners(
+            statement.line_ids)
+        self.assertEqual(partners[lines['unknown'].id], unknown.id)
+        self.assertEqual(partners[lines['bank'].id], self.partner_b.id)
+
+    def test_reconciliation_search(self):
+        invoice = self.invoices[0]
+        receivable = self._get_receivable_line(invoice)
+        income = invoice.line_ids - receivable
+        self.assertIn(invoice.name, receivable.reconciliation_search)
+        self.assertIn(self.partner_a.name, receivable.reconciliation_search)
+        # the items of the other accounts are never searched by the widget
+        self.assertFalse(any(income.mapped('reconciliation_search')))
+        self.partner_a.name = 'Renamed Partner'
+        self.assertIn('Renamed Partner', receivable.reconciliation_search)
+        self.assertFalse(any(income.mapped('reconciliation_search')))
@@ -1,5 +1,4 @@
 from odoo import fields, models, api, _
-from odoo.http import request
 import ast
 
 from odoo.exceptions import AccessError, UserError, AccessDenied
@@ -89,15 +88,4 @@ class AccountMoveLine(models.Model):
 
 
     def get_current_company_value(self):
-
-        cookies_cids = [int(r) for r in request.httprequest.cookies.get('cids').split(",")] \
-            if request.httprequest.cookies.get('cids') \
-            else [request.env.user.company_id.id]
-        for company_id in cookies_cids:
-            if company_id not in self.env.user.company_ids.ids:
-                cookies_cids.remove(company_id)
-        if not cookies_cids:
-            cookies_cids = [self.env.company.id]
-        if len(cookies_cids) == 1:
-            cookies_cids.append(0)
-        return cookies_cids
\ No newline at end of file
+        return self.env['res.company']._get_report_company_ids()
\ No newline at end of file
@@ -3,7 +3,6 @@ from odoo import fields, models, api, _
 
 import io
 import json
-from odoo.http import request
 from odoo.exceptions import AccessError, UserError, AccessDenied
 
 try:
@@ -82,18 +81,7 @@ class TrialView(models.TransientModel):
         return filters
 
     def get_current_company_value(self):
-
-        cookies_cids = [int(r) for r in request.httprequest.cookies.get('cids').split(",")] \
-            if request.httprequest.cookies.get('cids') \
-            else [request.env.user.company_id.id]
-        for company_id in cookies_cids:
-            if company_id not in self.env.user.company_ids.ids:
-                cookies_cids.remove(company_id)
-        if not cookies_cids:
-            cookies_cids = [self.env.company.id]
-        if len(cookies_cids) == 1:
-            cookies_cids.append(0)
-        return cookies_cids
+        return self.env['res.company']._get_report_company_ids()
 
     def get_filter_data(self, option):
         r = self.env['account.trial.balance'].search([('id', '=', option[0])])